@@ -41,15 +41,16 @@ from modules.utils import (
 )
 
 # 数据加载与核心分析逻辑
-from modules.data_loader import get_trade_dates, read_market_data
+from modules.data_loader import get_trade_dates, read_market_data, clear_market_cache
 from modules.analyzer_market import (
     get_sentiment_trend_report, 
 )
-from modules.main_markdown import render_auction_report_tab  # 引入新封装的函数
+from modules.main_markdown import render_auction_report_tab, get_auction_analysis_data  # 引入新封装的函数
 from modules.trend_analyzer import display_trend_analysis
 # UI 渲染页面 (分模块)
 from modules.ui_sentiment import render_sentiment_dashboard
 from modules.ui_top_stocks import render_top_turnover_page
+from modules.ui_performance import render_performance_page
 
 # =========================================================
 # 5. 后续逻辑开始 (if check_password(): ...)
@@ -86,6 +87,9 @@ if check_password():
         if st.button("📊 个股趋势分析", use_container_width=True):
             st.session_state.active_page = "📊 个股趋势分析"
 
+        if st.button("⏱️ 性能", use_container_width=True):
+            st.session_state.active_page = "⏱️ 性能"
+
 
         # 增加间距把控制中心压下去
         st.markdown("<br>" * 5, unsafe_allow_html=True)
@@ -97,6 +101,8 @@ if check_password():
             target_date = st.date_input("目标日期", value=all_dates.max())
             if st.button("🔄 同步最新数据", use_container_width=True):
                 st.cache_data.clear()
+                clear_market_cache()
+                get_auction_analysis_data.clear()
                 st.rerun()            
   
         # 按钮 1：触发更新所属概念 (对应你的 Update Concepts Daily YAML)
@@ -135,3 +141,6 @@ if check_password():
     elif st.session_state.active_page == "📊 个股趋势分析":  
         # target_date 是你侧边栏 date_input 选中的日期
         display_trend_analysis(target_date)
+
+    elif st.session_state.active_page == "⏱️ 性能":
+        render_performance_page()
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+基准测试：main.py clean_data 的代码提取（逐行 re.findall vs 整列 str.extract）
+用法：python benchmarks/bench_clean_data.py [天数] [重复次数]
+以 data/raw 最近几天的 行情/涨跌停 原始文件模拟抓取结果，计时 清洗 → 统计 → 落盘 全流程，
+并校验两种实现清洗结果一致。
+"""
+
+import os
+import re
+import sys
+import time
+import tempfile
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+import pandas as pd
+from modules.config import DATA_DIR
+from modules.utils import extract_stock_codes
+
+# 与 main.py 的 EN2CN 中涉及代码列的部分一致
+EN2CN = {'code': '股票代码', 'name': '股票简称', '成交额(万)': '成交额'}
+
+
+def clean_data(df, vectorized):
+    """main.py clean_data 的两种实现，仅代码提取一行不同"""
+    df.columns = [re.sub(r'\[.*\]|:.*', '', str(c)) for c in df.columns]
+    df = df.rename(columns={k: EN2CN.get(k, k) for k in df.columns})
+    df = df.loc[:, ~df.columns.duplicated()].copy()
+    if '股票代码' in df.columns:
+        if vectorized:
+            df['股票代码'] = extract_stock_codes(df['股票代码'])
+        else:
+            df['股票代码'] = df['股票代码'].apply(lambda x: re.findall(r'\d{6}', str(x))[0] if re.findall(r'\d{6}', str(x)) else None)
+        df = df.dropna(subset=['股票代码'])
+    return df
+
+
+def capture_to_write(raw, vectorized, out_dir):
+    """清洗 + 成交额统计 + 写出原始文件，对应 main.py 抓取之后到落盘的步骤"""
+    df = clean_data(raw.copy(), vectorized)
+    if '成交额' in df.columns:
+        amt = pd.to_numeric(df['成交额'], errors='coerce').fillna(0)
+        amt.sum(), amt[df['股票代码'].str.startswith('6')].sum()
+    raw.to_csv(os.path.join(out_dir, 'out.csv'), index=False, encoding='utf-8-sig')
+    return df
+
+
+def timed(func, repeat):
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000, result
+
+
+def main(days=3, repeat=5):
+    dates = sorted({p.name[:10] for p in DATA_DIR.glob('*_收盘行情.csv')})[-days:]
+    out_dir = tempfile.mkdtemp()
+    rows = []
+    for d in dates:
+        for kind in ['竞价行情', '收盘行情', '竞价涨跌停', '收盘涨跌停']:
+            path = DATA_DIR / f"{d}_{kind}.csv"
+            if not path.exists():
+                continue
+            # 抓取结果全部是 object 列，与 pd.DataFrame(raw_map).T 一致
+            raw = pd.read_csv(path, encoding='utf-8-sig', dtype=object)
+            t_clean_old, old = timed(lambda: clean_data(raw.copy(), False), repeat)
+            t_clean_new, new = timed(lambda: clean_data(raw.copy(), True), repeat)
+            t_old, _ = timed(lambda: capture_to_write(raw, False, out_dir), repeat)
+            t_new, _ = timed(lambda: capture_to_write(raw, True, out_dir), repeat)
+            rows.append({
+                '文件': path.name, '行数': len(raw),
+                '清洗 apply(ms)': round(t_clean_old, 2), '清洗 extract(ms)': round(t_clean_new, 2),
+                '抓取→落盘 apply(ms)': round(t_old, 2), '抓取→落盘 extract(ms)': round(t_new, 2),
+                '结果一致': old['股票代码'].astype(str).tolist() == new['股票代码'].astype(str).tolist()
+                            and old.index.equals(new.index),
+            })
+
+    report = pd.DataFrame(rows)
+    print(report.to_markdown(index=False))
+    print(f"\n合计 清洗: {report['清洗 apply(ms)'].sum():.1f} → {report['清洗 extract(ms)'].sum():.1f} ms"
+          f" | 抓取→落盘: {report['抓取→落盘 apply(ms)'].sum():.1f} → {report['抓取→落盘 extract(ms)'].sum():.1f} ms"
+          f" | 全部一致: {bool(report['结果一致'].all())}")
+
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:3]]
+    main(*args)
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+基准测试：整批 quotation.stocks() vs 分片并发 ShardedQuoteFetcher
+用法：python benchmarks/bench_quote_fetcher.py [录制文件]
+未指定录制文件时，由 data/raw 最新的 竞价行情 合成；请求全部打到本地回放服务 (qq_standin)。
+"""
+
+import os
+import re
+import sys
+import time
+import tempfile
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import easyquotation
+import pandas as pd
+from modules.config import DATA_DIR
+from modules.quote_fetcher import ShardedQuoteFetcher
+from qq_standin import load_records, serve, synth
+
+# (单请求延迟ms, 失败率)
+SCENARIOS = [(0, 0.0), (50, 0.0), (50, 0.05), (200, 0.1)]
+
+
+def local_quotation(api):
+    """把 easyquotation 的接口地址指向本地回放服务"""
+    base = type(easyquotation.use('qq'))
+    return type('LocalTencent', (base,), {'stock_api': property(lambda self: api)})()
+
+
+def batch_fetch(q, codes):
+    """与 main.py 原逻辑一致：整批请求，失败则整批重试，最多 3 次"""
+    for _ in range(3):
+        try:
+            raw_map = q.stocks(codes, prefix=True)
+            if raw_map:
+                return raw_map
+        except Exception:
+            time.sleep(2)
+    return {}
+
+
+def main(record_path=None):
+    if record_path is None:
+        record_path = os.path.join(tempfile.mkdtemp(), 'qq.txt')
+        synth(sorted(DATA_DIR.glob('*_竞价行情.csv'))[-1], record_path)
+    records = load_records(record_path)
+    codes = [re.sub(r'\D', '', k) for k in records]
+
+    rows = []
+    for delay, fail in SCENARIOS:
+        server = serve(records, port=0, delay_ms=delay, fail_rate=fail, background=True)
+        api = f"http://127.0.0.1:{server.server_port}/q="
+        q = local_quotation(api)
+        fetcher = ShardedQuoteFetcher(q, api=api, backoff=0.1)
+
+        t0 = time.perf_counter()
+        old = batch_fetch(q, codes)
+        t_old = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        new = fetcher.fetch(codes, prefix=True)
+        t_new = time.perf_counter() - t0
+        server.shutdown()
+
+        common = set(old) & set(new)
+        rows.append({
+            '延迟(ms)': delay, '失败率': fail,
+            '整批(s)': round(t_old, 3), '整批只数': len(old),
+            '分片(s)': round(t_new, 3), '分片只数': len(new),
+            '结果一致': all(old[k] == new[k] for k in common),
+        })
+        print(f"  [{delay}ms/{fail:.0%}] {fetcher.report()}")
+
+    print(pd.DataFrame(rows).to_markdown(index=False))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
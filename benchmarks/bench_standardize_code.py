@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+基准测试：股票代码标准化（逐行 apply vs 整列向量化）
+用法：python benchmarks/bench_standardize_code.py [重复次数]
+对 data/raw 下每个含代码列的文件分别计时，并校验两种实现结果一致。
+"""
+
+import os
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+import pandas as pd
+from modules.config import DATA_DIR, CONCEPT_PATH
+from modules.utils import safe_read_csv, standardize_code, standardize_codes
+
+
+def timed(func, repeat):
+    """返回 (最短耗时毫秒, 结果)"""
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000, result
+
+
+def main(repeat=5):
+    files = sorted(DATA_DIR.glob('*.csv')) + [CONCEPT_PATH]
+    rows = []
+    for path in files:
+        df = safe_read_csv(path)
+        col = next((c for c in ['code', '股票代码'] if c in df.columns), None)
+        if col is None:
+            continue
+        codes = df[col]
+        t_old, old = timed(lambda: codes.apply(standardize_code), repeat)
+        t_new, new = timed(lambda: standardize_codes(codes), repeat)
+        rows.append({
+            '文件': path.name, '行数': len(codes),
+            'apply(ms)': round(t_old, 3), '向量化(ms)': round(t_new, 3),
+            '加速比': round(t_old / t_new, 1) if t_new else None,
+            '结果一致': old.astype(str).tolist() == new.astype(str).tolist()
+        })
+
+    report = pd.DataFrame(rows)
+    print(report.to_markdown(index=False))
+    print(f"\n合计 apply: {report['apply(ms)'].sum():.1f} ms | 向量化: {report['向量化(ms)'].sum():.1f} ms"
+          f" | 全部一致: {bool(report['结果一致'].all())}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
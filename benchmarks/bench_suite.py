@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+基准测试套件：在合成数据 (N 只股票 × D 个交易日) 上计时各分析热点路径
+  read_market_data（CSV 冷读 / 快照冷读 / 缓存命中）、analyze_auction_flow、
+  calculate_auto_concepts、fast_daily_calc、get_sentiment_trend_report（全量 / 增量）
+用法：python benchmarks/bench_suite.py [--stocks 5000] [--days 20] [--repeat 3] [--save 结果.csv]
+--save 会把本次结果连同当前提交号追加到 CSV，便于不同提交之间离线对比。
+数据由 synth_market 生成在临时目录，不读写仓库内的 data/metadata。
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd
+from synth_market import generate, use_sandbox
+
+# 分析代码按 pandas 2 的 object 字符串列编写（np.char 直接作用于 .values）
+try:
+    pd.set_option('future.infer_string', False)
+except Exception:
+    pass
+
+
+def timed(func, repeat, setup=None):
+    """返回 (最短毫秒, 平均毫秒, 最后一次结果)；setup 在每次计时前执行，不计入耗时"""
+    costs, result = [], None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        t0 = time.perf_counter()
+        result = func()
+        costs.append(time.perf_counter() - t0)
+    return min(costs) * 1000, sum(costs) / len(costs) * 1000, result
+
+
+def git_rev():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return 'unknown'
+
+
+def run(stocks=5000, days=20, repeat=3, workdir=None):
+    root = workdir or tempfile.mkdtemp(prefix='bench_suite_')
+    t0 = time.perf_counter()
+    dates = generate(root, n_stocks=stocks, n_days=days)
+    print(f"🧪 合成数据 {stocks} 只 × {days} 天 -> {root} ({time.perf_counter() - t0:.1f}s)")
+
+    # 沙盒路径必须在导入分析模块之前生效
+    config = use_sandbox(root)
+    from modules import data_loader
+    from modules.stock_master import build_stock_master
+    from modules.concept_matrix import build_concept_matrix
+    from modules.analyzer import analyze_auction_flow, build_structure_tags, calculate_auto_concepts
+    from modules.analyzer_market import fast_daily_calc, get_sentiment_trend_report
+
+    build_stock_master()
+    build_concept_matrix()
+    read = data_loader.read_market_data
+    today, prev = dates[-1], dates[-2]
+    rows = []
+
+    def add(name, scale, result, n_rows):
+        best, mean, _ = result
+        rows.append({'场景': name, '规模': scale, '最快(ms)': round(best, 1), '平均(ms)': round(mean, 1), '行数': n_rows})
+
+    def read_all():
+        return sum(len(read(d, t)) for d in dates for t in ('竞价行情', '收盘行情'))
+
+    n_files = f"{len(dates) * 2} 个文件"
+    res = timed(read_all, repeat, setup=data_loader.clear_market_cache)
+    add('read_market_data 冷读 CSV', n_files, res, res[2])
+
+    for d in dates:
+        for t in ('竞价行情', '收盘行情'):
+            data_loader.build_market_snapshot(d, t)
+    res = timed(read_all, repeat, setup=data_loader.clear_market_cache)
+    add('read_market_data 冷读快照', n_files, res, res[2])
+    res = timed(read_all, repeat)
+    add('read_market_data 缓存命中', n_files, res, res[2])
+
+    def reset_flow(cold):
+        def setup():
+            build_structure_tags.clear()
+            if cold:
+                data_loader.clear_market_cache()
+        return setup
+
+    res = timed(lambda: analyze_auction_flow(today, prev), repeat, setup=reset_flow(True))
+    add('analyze_auction_flow 冷', '1 个交易日', res, len(res[2][0]) if res[2] else 0)
+    res = timed(lambda: analyze_auction_flow(today, prev), repeat, setup=reset_flow(False))
+    add('analyze_auction_flow 热', '1 个交易日', res, len(res[2][0]) if res[2] else 0)
+
+    df_flow = res[2][0] if res[2] else pd.DataFrame()
+    res = timed(lambda: calculate_auto_concepts(df_flow), repeat)
+    add('calculate_auto_concepts', f"{len(df_flow)} 只", res, len(res[2]))
+
+    for prefix in ('竞价', '收盘'):
+        df_day = read(today, f'{prefix}行情')
+        res = timed(lambda: fast_daily_calc(df_day, prefix), repeat)
+        add(f'fast_daily_calc {prefix}', f"{len(df_day)} 只", res, len(res[2]))
+
+    def reset_trend(keep_until=None):
+        def setup():
+            get_sentiment_trend_report.clear()
+            data_loader.clear_market_cache()
+            if config.SENTIMENT_TREND_PATH.exists():
+                config.SENTIMENT_TREND_PATH.unlink()
+            if keep_until:
+                get_sentiment_trend_report(dates[:keep_until])
+                get_sentiment_trend_report.clear()
+                data_loader.clear_market_cache()
+        return setup
+
+    res = timed(lambda: get_sentiment_trend_report(dates), repeat, setup=reset_trend())
+    add('get_sentiment_trend_report 全量', f"{days} 天", res, len(res[2]) if res[2] is not None else 0)
+    res = timed(lambda: get_sentiment_trend_report(dates), repeat, setup=reset_trend(days - 1))
+    add('get_sentiment_trend_report 增量', '新增 1 天', res, len(res[2]) if res[2] is not None else 0)
+
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='分析热点路径基准测试（合成数据）')
+    parser.add_argument('--stocks', type=int, default=5000, help='股票数')
+    parser.add_argument('--days', type=int, default=20, help='交易日数')
+    parser.add_argument('--repeat', type=int, default=3, help='每个场景重复次数')
+    parser.add_argument('--save', help='把结果追加到该 CSV（附提交号与时间）')
+    args = parser.parse_args()
+
+    rev = git_rev()
+    report = run(args.stocks, args.days, args.repeat)
+    print(f"\n提交 {rev} | {args.stocks} 只 × {args.days} 天 | 重复 {args.repeat} 次\n")
+    print(report.to_markdown(index=False))
+
+    if args.save:
+        out = report.assign(提交=rev, 股票数=args.stocks, 天数=args.days,
+                            时间=pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S'))
+        out.to_csv(args.save, mode='a', index=False, encoding='utf-8-sig', header=not os.path.exists(args.save))
+        print(f"\n✅ 结果已追加到 {args.save}")
+
+
+if __name__ == '__main__':
+    main()
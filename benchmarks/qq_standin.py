@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+腾讯行情接口 (qt.gtimg.cn/q=) 的本地回放服务，用于离线测试分片抓取。
+响应内容来自录制文件：每行一段原始 v_xxx="...";
+
+用法：
+  录制真实响应： python benchmarks/qq_standin.py record 录制.txt
+  由竞价行情合成：python benchmarks/qq_standin.py synth data/raw/2026-01-29_竞价行情.csv 录制.txt
+  启动服务：    python benchmarks/qq_standin.py serve 录制.txt [端口] [延迟ms] [失败率]
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+import pandas as pd
+
+_KEY = re.compile(r'v_(\w+)=')
+
+
+def load_records(path) -> dict:
+    """录制文件 -> {带前缀代码: 原始片段}"""
+    records = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            m = _KEY.search(line)
+            if m:
+                records[m.group(1)] = line.strip()
+    return records
+
+
+def record(path, codes=None):
+    """按 easyquotation 的分片规则请求真实接口，逐只保存原始片段"""
+    import easyquotation
+    from modules.utils import safe_read_csv
+    from modules.config import STOCK_LIST_PATH
+    q = easyquotation.use('qq')
+    if codes is None:
+        codes = [re.sub(r'\D', '', str(c)) for c in safe_read_csv(STOCK_LIST_PATH)['code']]
+    texts = q._fetch_stock_data(q.gen_stock_list(codes))
+    with open(path, 'w', encoding='utf-8') as f:
+        for seg in "".join(texts).split(';'):
+            if _KEY.search(seg):
+                f.write(seg.strip() + ';\n')
+
+
+def synth(csv_path, path):
+    """由已保存的 竞价行情/收盘行情 CSV 合成同格式片段（离线时使用）"""
+    df = pd.read_csv(csv_path, encoding='utf-8-sig', dtype={'code': str}).fillna(0)
+    with open(path, 'w', encoding='utf-8') as f:
+        for r in df.to_dict('records'):
+            fields = ['0'] * 54
+            fields[0], fields[1], fields[2] = '1', r['name'], r['code'][-6:]
+            fields[3], fields[4], fields[5] = r['now'], r['close'], r['open']
+            fields[6] = r['volume'] / 100
+            fields[9], fields[10] = r['bid1'], int(r['bid1_volume'] // 100)
+            fields[19], fields[20] = r['ask1'], int(r['ask1_volume'] // 100)
+            fields[29], fields[30] = '', '20260129092503'
+            fields[31], fields[32] = round(r['now'] - r['close'], 2), r['涨跌(%)']
+            fields[33], fields[34], fields[35] = r['high'], r['low'], ''
+            fields[36], fields[37] = int(r['成交量(手)'] // 100), r['成交额(万)'] / 10000
+            fields[38], fields[43], fields[44], fields[45] = r['turnover'], r['振幅'], r['流通市值'], r['总市值']
+            fields[47], fields[48], fields[49] = r['涨停价'], r['跌停价'], r['量比']
+            f.write(f'v_{r["code"]}="' + '~'.join(str(x) for x in fields) + '";\n')
+
+
+def serve(records: dict, port=8765, delay_ms=0.0, fail_rate=0.0, background=False):
+    """启动回放服务；background=True 时在后台线程运行并返回 server"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if fail_rate and random.random() < fail_rate:
+                self.send_error(502)
+                return
+            if delay_ms:
+                time.sleep(delay_ms / 1000 * random.uniform(0.5, 1.5))
+            codes = self.path.split('q=', 1)[-1].split(',')
+            body = "\n".join(records[c] for c in codes if c in records).encode('gbk', errors='ignore')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; charset=GBK')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    # 加大监听队列，避免并发建连时 SYN 重传带来的 1s 级假延迟
+    server_cls = type('StandinServer', (ThreadingHTTPServer,), {'request_queue_size': 128})
+    server = server_cls(('127.0.0.1', port), Handler)
+    server.daemon_threads = True
+    if background:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+    print(f"📡 回放服务 http://127.0.0.1:{server.server_port}/q= ，{len(records)} 只")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    cmd, args = (sys.argv[1], sys.argv[2:]) if len(sys.argv) > 1 else ('', [])
+    if cmd == 'record':
+        record(args[0])
+    elif cmd == 'synth':
+        synth(args[0], args[1])
+    elif cmd == 'serve':
+        serve(load_records(args[0]), *(float(a) if i else int(a) for i, a in enumerate(args[1:])))
+    else:
+        print(__doc__)
@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+合成行情数据：N 只股票 × D 个交易日，按 data/raw 的原始格式写出
+  {日期}_竞价行情 / 收盘行情 / 竞价涨跌停 / 收盘涨跌停 / 竞价指数 / 收盘指数 .csv
+以及 metadata 下的 所属概念.csv、交易日历.csv 和根目录的 代码.csv。
+
+用法（独立生成）：python benchmarks/synth_market.py 输出目录 [股票数] [天数]
+基准脚本中先 generate() 再 use_sandbox()，之后再导入 modules 下的分析模块，
+所有读写（含股票主表、题材矩阵、趋势表）都落在沙盒目录内，不碰仓库数据。
+"""
+
+import os
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+import numpy as np
+import pandas as pd
+
+QUOTE_COLS = ['name', 'code', 'now', 'close', 'open', 'volume', 'bid1', 'bid1_volume', 'ask1', 'ask1_volume',
+              '涨跌(%)', 'high', 'low', '成交量(手)', '成交额(万)', 'turnover', '振幅', '流通市值', '总市值',
+              '涨停价', '跌停价', '量比']
+LIMIT_COLS = ['股票代码', '股票简称', '最新价', '最新涨跌幅', '涨跌停', '连续涨停天数', '连续跌停天数',
+              '首次涨停时间', '最终涨停时间', '涨停原因类别', '首次跌停时间', '最终跌停时间', '跌停原因类型',
+              'market_code', 'code']
+INDEXES = [('上证指数', 'sh000001'), ('深证成指', 'sz399001'), ('创业板指', 'sz399006')]
+
+# (代码前缀, 市场前缀, 占比, 涨跌停幅度)；前缀之后的位数补足 6 位，各板块容量 10^(6-前缀长度)
+BOARDS = [('60', 'sh', 0.38, 0.10), ('688', 'sh', 0.10, 0.20), ('00', 'sz', 0.25, 0.10),
+          ('30', 'sz', 0.22, 0.20), ('920', 'bj', 0.05, 0.30)]
+HOT_WORDS = ['海南', '海峡两岸', '商业航天', '电子化学', '脑机', '光刻胶', '机器人', '算力', '芯片', '黄金']
+COMMON_TAGS = ['融资融券', '深股通', '沪股通', '证金持股', '国企改革']
+
+
+def _codes(n, rng):
+    """按各板块占比生成不重复的 6 位代码及市场前缀、涨跌停幅度"""
+    weights = np.array([b[2] for b in BOARDS])
+    counts = rng.multinomial(n, weights / weights.sum())
+    codes, prefixes, limits = [], [], []
+    for (head, market, _, limit), k in zip(BOARDS, counts):
+        width = 6 - len(head)
+        tails = rng.choice(10 ** width, size=min(k, 10 ** width), replace=False)
+        codes += [f"{head}{t:0{width}d}" for t in tails]
+        prefixes += [market] * len(tails)
+        limits += [limit] * len(tails)
+    return np.array(codes), np.array(prefixes), np.array(limits)
+
+
+def _concept_table(codes, rng, n_concepts=400):
+    """题材表：题材频次近似 Zipf 分布，部分题材名称带热点关键词，每只股票 3~20 个题材"""
+    names = [f"{HOT_WORDS[i % len(HOT_WORDS)]}{i}概念" if i % 9 == 0 else f"题材{i:03d}"
+             for i in range(n_concepts)]
+    p = 1.0 / np.arange(1, n_concepts + 1) ** 0.9
+    p /= p.sum()
+    industries = [f"行业{a}-细分{a}{b}-子类{a}{b}{c}" for a in range(12) for b in range(3) for c in range(3)]
+    rows = []
+    for code in codes:
+        k = int(np.clip(rng.poisson(8), 3, 20))
+        tags = list(rng.choice(names, size=k, replace=False, p=p)) + list(rng.choice(COMMON_TAGS, size=2, replace=False))
+        rows.append((code, ';'.join(tags), industries[rng.integers(len(industries))]))
+    df = pd.DataFrame(rows, columns=['股票代码', '所属概念', '所属行业'])
+    df.insert(1, '股票简称', '')
+    df.insert(3, '历史涨停原因类别', '')
+    df['code'] = df['股票代码']
+    return df
+
+
+def _limit_rows(codes, names, close, pct, up, down, streak, reasons):
+    """涨跌停表：只列出触及涨停或跌停的股票"""
+    idx = np.nonzero(up | down)[0]
+    suffix = {'6': 'SH', '9': 'BJ'}
+    return pd.DataFrame({
+        '股票代码': [f"{codes[i]}.{suffix.get(codes[i][0], 'SZ')}" for i in idx],
+        '股票简称': names[idx],
+        '最新价': close[idx],
+        '最新涨跌幅': pct[idx],
+        '涨跌停': np.where(up[idx], '涨停', '跌停'),
+        '连续涨停天数': np.where(up[idx], streak[idx], 0),
+        '连续跌停天数': np.where(down[idx], 1, 0),
+        '首次涨停时间': np.where(up[idx], ' 09:30:00', ''),
+        '最终涨停时间': np.where(up[idx], ' 14:00:00', ''),
+        '涨停原因类别': [reasons[i] if up[i] else '' for i in idx],
+        '首次跌停时间': '', '最终跌停时间': '', '跌停原因类型': '',
+        'market_code': 33,
+        'code': codes[idx],
+    }, columns=LIMIT_COLS)
+
+
+def _quote_frame(codes, prefixes, names, prev, price, open_, high, low, amount_wan, up_px, down_px, rng):
+    pct = np.round((price / prev - 1) * 100, 2)
+    # easyquotation 的 '成交额(万)' 实际单位为元（数据加载时不再换算）
+    amount = np.round(amount_wan * 1e4, 0)
+    vol = np.round(amount / np.maximum(price, 0.01), -2)
+    return pd.DataFrame({
+        'name': names, 'code': np.char.add(prefixes.astype(str), codes.astype(str)),
+        'now': price, 'close': prev, 'open': open_, 'volume': vol,
+        'bid1': price, 'bid1_volume': rng.integers(0, 50000, len(codes)) * 100,
+        'ask1': np.round(price * 1.001, 2), 'ask1_volume': rng.integers(0, 50000, len(codes)) * 100,
+        '涨跌(%)': pct, 'high': high, 'low': low, '成交量(手)': vol, '成交额(万)': amount,
+        'turnover': np.round(rng.gamma(1.5, 2.0, len(codes)), 2),
+        '振幅': np.round((high - low) / prev * 100, 2),
+        '流通市值': np.round(rng.lognormal(4, 1, len(codes)), 2), '总市值': np.round(rng.lognormal(4.5, 1, len(codes)), 2),
+        '涨停价': up_px, '跌停价': down_px, '量比': np.round(rng.gamma(2, 0.5, len(codes)), 2),
+    }, columns=QUOTE_COLS)
+
+
+def _index_frame(pcts, prev_levels, stamp):
+    levels = np.round(prev_levels * (1 + pcts / 100), 2)
+    return pd.DataFrame({
+        'name': [n for n, _ in INDEXES], 'code': [c for _, c in INDEXES],
+        'now': levels, 'close': prev_levels, 'open': levels, '涨跌(%)': np.round(pcts, 2),
+        'high': levels, 'low': levels, 'datetime': stamp,
+    }), levels
+
+
+def generate(root, n_stocks=5000, n_days=20, seed=0, start='2025-01-02'):
+    """在 root 下生成 raw/ 与 metadata/，返回交易日列表 (datetime)"""
+    root = Path(root)
+    raw_dir, meta_dir = root / 'raw', root / 'metadata'
+    raw_dir.mkdir(parents=True, exist_ok=True)
+    meta_dir.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+
+    codes, prefixes, limit_pct = _codes(n_stocks, rng)
+    n = len(codes)
+    names = np.array([f"{'*ST' if rng.random() < 0.03 else ''}股票{c}" for c in codes])
+    limit_pct = np.where(np.char.find(names.astype(str), 'ST') >= 0, 0.05, limit_pct)
+
+    concepts = _concept_table(codes, rng)
+    concepts.to_csv(meta_dir / '所属概念.csv', index=False, encoding='utf-8-sig')
+    pd.DataFrame({'code': codes}).to_csv(root / '代码.csv', index=False, encoding='utf-8-sig')
+    reasons = ['+'.join(t.split(';')[:3]) for t in concepts['所属概念']]
+    tag_sets = [set(t.split(';')) for t in concepts['所属概念']]
+    themes = sorted({t for tags in tag_sets for t in tags} - set(COMMON_TAGS))
+
+    dates = pd.bdate_range(start, periods=n_days)
+    pd.DataFrame({'trade_date': dates.strftime('%Y-%m-%d')}).to_csv(meta_dir / '交易日历.csv', index=False)
+
+    prev = np.round(rng.lognormal(2.7, 0.7, n), 2)
+    base_amt = rng.lognormal(10.5, 1.2, n)  # 全天成交额（万）
+    streak = np.zeros(n, dtype=int)
+    idx_prev = np.array([3300.0, 10500.0, 2100.0])
+
+    for d in dates:
+        day = d.strftime('%Y-%m-%d')
+        up_px = np.round(prev * (1 + limit_pct), 2)
+        down_px = np.round(prev * (1 - limit_pct), 2)
+        mood = rng.normal(0, 1)
+        # 每天随机几个热点题材：成分股竞价高开、放量
+        hot = set(rng.choice(themes, size=3, replace=False))
+        in_hot = np.array([not tags.isdisjoint(hot) for tags in tag_sets])
+
+        # 竞价：小幅跳空，极少数一字板
+        gap = np.clip((rng.normal(mood * 0.3, 1.5, n) + in_hot * 2.5) / 100, -limit_pct, limit_pct)
+        auc = np.clip(np.round(prev * (1 + gap), 2), down_px, up_px)
+        one_word = rng.random(n) < 0.004
+        auc[one_word] = up_px[one_word]
+        auc_amt = base_amt * rng.lognormal(-5.0, 0.8, n) * rng.lognormal(0, 0.15) * np.where(in_hot, 3.0, 1.0)
+        df = _quote_frame(codes, prefixes, names, prev, auc, auc, auc, auc, auc_amt, up_px, down_px, rng)
+        df.to_csv(raw_dir / f"{day}_竞价行情.csv", index=False, encoding='utf-8-sig')
+
+        # 收盘：厚尾涨跌幅，封板 / 跌停按价格截断
+        ret = (rng.standard_t(3, n) * 2.2 + mood) / 100
+        close = np.clip(np.round(auc * (1 + ret), 2), down_px, up_px)
+        close[one_word] = up_px[one_word]
+        high = np.minimum(np.maximum(close, auc) * (1 + np.abs(rng.normal(0, 0.01, n))), up_px).round(2)
+        low = np.maximum(np.minimum(close, auc) * (1 - np.abs(rng.normal(0, 0.01, n))), down_px).round(2)
+        amt = base_amt * rng.lognormal(0, 0.4, n)
+        df = _quote_frame(codes, prefixes, names, prev, close, auc, high, low, amt, up_px, down_px, rng)
+        df.to_csv(raw_dir / f"{day}_收盘行情.csv", index=False, encoding='utf-8-sig')
+
+        pct_auc = (auc / prev - 1) * 100
+        pct_close = (close / prev - 1) * 100
+        up_a, down_a = auc >= up_px, auc <= down_px
+        up_c, down_c = close >= up_px, close <= down_px
+        streak = np.where(up_c, streak + 1, 0)
+        _limit_rows(codes, names, auc, pct_auc, up_a, down_a, np.maximum(streak, 1), reasons) \
+            .to_csv(raw_dir / f"{day}_竞价涨跌停.csv", index=False, encoding='utf-8-sig')
+        _limit_rows(codes, names, close, pct_close, up_c, down_c, streak, reasons) \
+            .to_csv(raw_dir / f"{day}_收盘涨跌停.csv", index=False, encoding='utf-8-sig')
+
+        idx_auc = rng.normal(mood * 0.2, 0.3, 3)
+        idx_close = idx_auc + rng.normal(mood * 0.5, 0.8, 3)
+        frame, _ = _index_frame(idx_auc, idx_prev, f"{day} 09:25:03")
+        frame.to_csv(raw_dir / f"{day}_竞价指数.csv", index=False, encoding='utf-8-sig')
+        frame, idx_prev = _index_frame(idx_close, idx_prev, f"{day} 15:00:00")
+        frame.to_csv(raw_dir / f"{day}_收盘指数.csv", index=False, encoding='utf-8-sig')
+
+        prev = close
+    return [d.to_pydatetime() for d in dates]
+
+
+def use_sandbox(root):
+    """
+    把 modules.config 中的数据与元数据路径指向 root（须在导入其它 modules 子模块之前调用，
+    各模块用 from .config import ... 取值）。
+    """
+    from modules import config
+    root = Path(root)
+    meta_dir = root / 'metadata'
+    report_dir = root / 'analysis_results' / 'market_daily'
+    report_dir.mkdir(parents=True, exist_ok=True)
+    config.DATA_DIR = root / 'raw'
+    config.METADATA_DIR = meta_dir
+    config.CONCEPT_PATH = meta_dir / '所属概念.csv'
+    config.CALENDAR_PATH = meta_dir / '交易日历.csv'
+    config.STOCK_LIST_PATH = root / '代码.csv'
+    config.STOCK_MASTER_PATH = meta_dir / '股票主表.csv'
+    config.CONCEPT_MATRIX_PATH = meta_dir / '概念矩阵.npz'
+    config.SAVE_DIR = root / 'analysis_results'
+    config.MARKET_REPORT_DIR = report_dir
+    config.SENTIMENT_TREND_PATH = report_dir / 'daily_sentiment_trend.csv'
+    return config
+
+
+if __name__ == '__main__':
+    out = sys.argv[1] if len(sys.argv) > 1 else 'synth_data'
+    args = [int(a) for a in sys.argv[2:4]]
+    dates = generate(out, *args)
+    print(f"✅ 已生成 {len(dates)} 个交易日 ({dates[0]:%Y-%m-%d} ~ {dates[-1]:%Y-%m-%d}) -> {out}")
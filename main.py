@@ -18,6 +18,15 @@ import json
 import hmac
 import hashlib
 import base64
+from modules.data_loader import build_market_snapshot
+from modules.trade_calendar import get_trade_calendar
+from modules.auction_bundle import build_auction_bundle
+from modules.auction_stream import capture_auction_stream
+from modules.quote_fetcher import ShardedQuoteFetcher
+from modules.scheduler import TargetTimeScheduler
+from modules.universe import load_universe
+from modules.utils import extract_stock_codes
+from modules.profiler import stage, dump_profile
 
 sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
@@ -31,39 +40,26 @@ def get_beijing_time():
 print(f"⏰ 当前脚本启动时间 (北京): {get_beijing_time().strftime('%Y-%m-%d %H:%M:%S')}")
 print(f"⏰ 当前脚本启动时间 (系统本地): {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
-def wait_until_target_time(target_hour, target_minute, target_second):
-    """等待直到北京时间指定时刻"""
+def wait_until_target_time(target_hour, target_minute, target_second, prewarm=None):
+    """等待直到北京时间指定时刻：单调时钟截止点 + 提前预热，返回调度器（无需等待时返回 None）"""
     # 仅在 GitHub 定时任务（schedule）且是早盘时执行等待
     # 如果你想在本地手动运行时也生效，可以去掉 GITHUB_EVENT_NAME 的判断
     is_gh_schedule = os.environ.get("GITHUB_EVENT_NAME") == "schedule"
-    
+
     if is_gh_schedule and target_hour == 9:
-        print(f"🚀 检测到 GitHub 定时任务，开始精准对时，目标北京时间: {target_hour:02d}:{target_minute:02d}:{target_second:02d}")
-        while True:
-            # 获取当前最新的北京时间
-            now_bj = get_beijing_time()
-            
-            # 将当前时间转换为当天总秒数，方便精确对比
-            current_total_seconds = now_bj.hour * 3600 + now_bj.minute * 60 + now_bj.second
-            target_total_seconds = target_hour * 3600 + target_minute * 60 + target_second
-            
-            if current_total_seconds >= target_total_seconds:
-                print(f"⏰ 已到达或错过目标时间 ({now_bj.strftime('%H:%M:%S')})，立即开始运行...")
-                break
-            
-            # 每 10 秒打印一次进度
-            if now_bj.second % 10 == 0:
-                remaining = target_total_seconds - current_total_seconds
-                print(f"⏳ 等待中... 当前北京时间: {now_bj.strftime('%H:%M:%S')}，距离对时点还差 {remaining} 秒")
-            
-            time.sleep(1)
+        scheduler = TargetTimeScheduler(target_hour, target_minute, target_second)
+        scheduler.wait(prewarm)
+        return scheduler
+    return None
 
 # 获取当前北京时间进行初始逻辑判断
 now_bj_start = get_beijing_time()
 
-# 逻辑：如果是早盘（9:25之前）运行，则进入等待逻辑
-if now_bj_start.hour == 9 and now_bj_start.minute < 25:
-    wait_until_target_time(9, 25, 3)
+# 流式采集模式：09:15–09:25 持续轮询并记录竞价逐笔（AUCTION_STREAM=1 或 --stream 开启）
+STREAM_MODE = os.environ.get("AUCTION_STREAM") == "1" or "--stream" in sys.argv
+
+# 逻辑：如果是早盘（9:25之前）运行，则在抓取前对时（名单与连接在触发前预热；流式模式自行轮询到 9:25:03）
+NEED_WAIT = now_bj_start.hour == 9 and now_bj_start.minute < 25 and not STREAM_MODE
 
 # ==================== 1. 配置与参数 ====================
 RAW_DIR = "data/raw"
@@ -135,6 +131,13 @@ EN2CN = {
     '涨跌停': '涨跌停', '连续涨停天数': '连续涨停天数'
 }
 
+# 行情落盘时仅保留的列（流式采集的逐笔文件也只记录这些列）
+KEEP_COLS = [
+    'name', 'code', 'now', 'close', 'open', 'volume', 'bid1', 'bid1_volume', 
+    'ask1', 'ask1_volume', '涨跌(%)', 'high', 'low', '成交量(手)', '成交额(万)', 
+    'turnover', '振幅', '流通市值', '总市值', '涨停价', '跌停价', '量比'
+]
+
 # ==================== 2. 工具函数 ====================
 
 def is_save_time():
@@ -158,64 +161,100 @@ def clean_data(df, is_index=False):
     df = df.rename(columns={k: EN2CN.get(k, k) for k in df.columns})
     df = df.loc[:, ~df.columns.duplicated()].copy()
     if '股票代码' in df.columns and not is_index:
-        df['股票代码'] = df['股票代码'].apply(lambda x: re.findall(r'\d{6}', str(x))[0] if re.findall(r'\d{6}', str(x)) else None)
+        df['股票代码'] = extract_stock_codes(df['股票代码'])
         df = df.dropna(subset=['股票代码'])
     return df
 
 # ==================== 3. 执行流程 ====================
 
 # --- 1. 获取名单 ---
-try:
-    df_stocks = pd.read_csv(STOCK_LIST_PATH, dtype={'code': str})
-    now_t = datetime.datetime.now(datetime.timezone(datetime.timedelta(hours=8))).time()
-    if datetime.time(9, 20) <= now_t <= datetime.time(9, 45):
-        print("🕒 竞价时段，正在同步本月新股名单...")
-        df_new = pywencai.get(question='本月上市的新股', loop=True)
-        if df_new is not None and not df_new.empty:
-            df_new_clean = df_new[['code', '股票简称']].rename(columns={'股票简称':'code_name'})
-            df_stocks = pd.concat([df_stocks, df_new_clean]).drop_duplicates(subset=['code']).reset_index(drop=True)
-            df_stocks.to_csv(STOCK_LIST_PATH, index=False, encoding='utf-8-sig')
-            print("✅ 名单更新完成")
-            print(f"⏰ 当前脚本执行时间 (北京): {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-except Exception as e:
-    print(f"⚠️ 名单读取或更新跳过: {e}")
-
-codes = df_stocks['code'].apply(lambda x: re.sub(r'\D', '', str(x))).tolist()
+def load_stock_codes():
+    """读取预构建的股票池（已带 sh/sz/bj 前缀，由 update_universe.py 刷新）；缺失时回退到 代码.csv"""
+    universe = load_universe()
+    if universe:
+        print(f"📦 股票池 v{universe['version']}：{universe['count']} 只（构建于 {universe['built_at']}）")
+        return universe['prefixed']
+    try:
+        df_stocks = pd.read_csv(STOCK_LIST_PATH, dtype={'code': str})
+        print("⚠️ 未找到股票池，临时由 代码.csv 生成")
+        return df_stocks['code'].apply(lambda x: re.sub(r'\D', '', str(x))).tolist()
+    except Exception as e:
+        print(f"⚠️ 名单读取失败: {e}")
+        return []
 
-# --- 2. 获取行情 ---
 quotation = easyquotation.use('qq')
-df_real = pd.DataFrame()
-for i in range(3):
-    try:
-        raw_map = quotation.stocks(codes, prefix=True)
-        if raw_map:
-            df_real = pd.DataFrame(raw_map).T
-            print(f"✅ 行情获取成功 (第{i+1}次)")
-            print(f"⏰ 当前脚本执行时间 (北京): {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-            break
-    except: time.sleep(2)
+# 分片并发抓取：每片单独重试，慢片/失败片不拖累整批
+fetcher = ShardedQuoteFetcher(quotation)
+codes = []
+
+def prewarm():
+    """触发前预热：读取股票池 + 建立行情连接"""
+    codes[:] = load_stock_codes()
+    fetcher.warm(codes)
+
+scheduler = wait_until_target_time(9, 25, 3, prewarm=prewarm) if NEED_WAIT else None
+if not codes:
+    codes = load_stock_codes()
+
+# --- 2. 获取行情 ---
+with stage('行情抓取') as rec:
+    df_real = pd.DataFrame()
+    if STREAM_MODE and get_beijing_time().time() < datetime.time(9, 25, 3):
+        try:
+            # 收尾帧即 9:25:03 的全量快照，后续落盘流程不变
+            df_real = capture_auction_stream(lambda: fetcher.fetch(codes, prefix=True), KEEP_COLS)
+        except Exception as e:
+            print(f"⚠️ 流式采集失败，回退单次快照: {e}")
+    if df_real.empty:
+        try:
+            raw_map = fetcher.fetch(codes, prefix=True)
+            print(fetcher.report())
+            if raw_map:
+                df_real = pd.DataFrame(raw_map).T
+                print(f"✅ 行情获取成功 (分片并发，{len(df_real)} 只)")
+                if scheduler is not None:
+                    print(f"⏱️ 抓取完成距目标时刻 {scheduler.elapsed_ms()}ms（触发抖动 {scheduler.stats['触发抖动ms']}ms）")
+                print(f"⏰ 当前脚本执行时间 (北京): {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        except Exception as e:
+            print(f"⚠️ 分片抓取失败，回退整批请求: {e}")
+    for i in range(3):
+        if not df_real.empty: break
+        try:
+            raw_map = quotation.stocks(codes, prefix=True)
+            if raw_map:
+                df_real = pd.DataFrame(raw_map).T
+                print(f"✅ 行情获取成功 (第{i+1}次)")
+                print(f"⏰ 当前脚本执行时间 (北京): {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+                break
+        except: time.sleep(2)
+    rec['行数'] = len(df_real)
 
-df_index = pd.DataFrame(quotation.stocks(['sh000001', 'sz399001', 'sz399006'], prefix=True)).T
+with stage('指数抓取'):
+    df_index = pd.DataFrame(quotation.stocks(['sh000001', 'sz399001', 'sz399006'], prefix=True)).T
 
 # --- 3. 动态获取涨跌停 ---
 now_hour = datetime.datetime.now(datetime.timezone(datetime.timedelta(hours=8))).hour
 target_q = '昨日涨跌停' if now_hour < 12 else '涨跌停'
 
-df_yest = pd.DataFrame()
-for i in range(3):
-    try:
-        tmp = pywencai.get(question=target_q, loop=True)
-        if tmp is not None and not tmp.empty:
-            df_yest = tmp.drop_duplicates(subset=['股票代码'])
-            print(f"✅ {target_q}获取成功 (第{i+1}次)")
-            print(f"⏰ 当前脚本执行时间 (北京): {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-            break
-    except: time.sleep(2)
+with stage('涨跌停抓取') as rec:
+    df_yest = pd.DataFrame()
+    for i in range(3):
+        try:
+            tmp = pywencai.get(question=target_q, loop=True)
+            if tmp is not None and not tmp.empty:
+                df_yest = tmp.drop_duplicates(subset=['股票代码'])
+                print(f"✅ {target_q}获取成功 (第{i+1}次)")
+                print(f"⏰ 当前脚本执行时间 (北京): {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+                break
+        except: time.sleep(2)
+    rec['行数'] = len(df_yest)
 
 # --- 4. 清洗 ---
-df_real_c = clean_data(df_real)
-df_index_c = clean_data(df_index, is_index=True)
-df_yest_c = clean_data(df_yest)
+with stage('清洗') as rec:
+    df_real_c = clean_data(df_real)
+    df_index_c = clean_data(df_index, is_index=True)
+    df_yest_c = clean_data(df_yest)
+    rec['行数'] = len(df_real_c)
 
 # --- 5. 合并与统计 ---
 if not df_real_c.empty:
@@ -231,13 +270,6 @@ if not df_real_c.empty:
     if is_save_time():
         suffix = "竞价" if now_hour < 12 else "收盘"
         
-        # 优化：仅保留用户指定的列名
-        KEEP_COLS = [
-            'name', 'code', 'now', 'close', 'open', 'volume', 'bid1', 'bid1_volume', 
-            'ask1', 'ask1_volume', '涨跌(%)', 'high', 'low', '成交量(手)', '成交额(万)', 
-            'turnover', '振幅', '流通市值', '总市值', '涨停价', '跌停价', '量比'
-        ]
-        
         # 仅对行情数据进行列精简
         df_real_filtered = df_real.reindex(columns=[c for c in KEEP_COLS if c in df_real.columns]) if df_real is not None else None
         
@@ -247,9 +279,28 @@ if not df_real_c.empty:
             f"{suffix}指数": df_index, 
             f"{suffix}涨跌停": df_yest
         }
-        for name, data in raw_map.items():
-            if data is not None:
-                data.to_csv(os.path.join(RAW_DIR, f"{curr_date}_{name}.csv"), index=False, encoding='utf-8-sig')
+        with stage('落盘', rows=len(df_real)):
+            for name, data in raw_map.items():
+                if data is not None:
+                    data.to_csv(os.path.join(RAW_DIR, f"{curr_date}_{name}.csv"), index=False, encoding='utf-8-sig')
+
+            # 同步生成列式快照，看板读取时免去 CSV 解析与数值转换
+            snap_date = datetime.datetime.strptime(curr_date, "%Y-%m-%d")
+            for name in raw_map:
+                try:
+                    build_market_snapshot(snap_date, name)
+                except Exception as e:
+                    print(f"⚠️ 列式快照生成跳过 ({name}): {e}")
+
+        # 竞价快照落盘后立即预生成当日分析结果包，看板首屏直接读取
+        if suffix == "竞价":
+            with stage('竞价分析结果包'):
+                try:
+                    prev_date = get_trade_calendar().prev(snap_date)
+                    if prev_date:
+                        build_auction_bundle(snap_date.date(), prev_date)
+                except Exception as e:
+                    print(f"⚠️ 竞价分析结果包生成失败: {e}")
         
         # 统计存储状态
         raw_files = os.listdir(RAW_DIR) if os.path.exists(RAW_DIR) else []
@@ -276,3 +327,5 @@ else:
     print(msg)
     send_dingtalk_msg(msg)
     print(f"⏰ 当前脚本执行时间 (北京): {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+dump_profile('main')
@@ -1,12 +1,33 @@
 import pandas as pd
 import numpy as np
+import scipy.sparse as sp
 from datetime import datetime
 from typing import Optional, Tuple, Dict, Any, List
 from .data_loader import read_market_data, load_concept_data
-from .utils import clean_dataframe,standardize_code
+from .utils import clean_dataframe
+from .stock_master import align_by_id, assign_stock_ids
+from .concept_matrix import load_concept_matrix
+from .keyword_tagger import get_keyword_tagger
 from .config import HOT_KEYWORDS, BLACKLIST, HOT_CONCEPT_LIST
+from .profiler import profiled
 import streamlit as st
-@st.cache_data
+def classify_yesterday_style(df_close: pd.DataFrame) -> np.ndarray:
+    """按收盘行情判定昨日形态（向量化）：昨日炸板 / 昨日大跌 / 昨日大涨 / 普通震荡"""
+    def num(col):
+        if col not in df_close.columns:
+            return pd.Series(0.0, index=df_close.index)
+        return pd.to_numeric(df_close[col], errors='coerce')
+
+    high, close, limit, pct = num('最高价'), num('收盘价'), num('涨停价'), num('涨跌幅')
+    style_conditions = [
+        (high >= limit) & (limit > close),  # 1. 昨日炸板：盘中触及涨停但未封住
+        pct <= -5,                          # 2. 昨日大跌 (跌幅大于等于5%)
+        pct >= 5                            # 3. 昨日大涨 (涨幅大于等于5%)
+    ]
+    return np.select(style_conditions, ['昨日炸板', '昨日大跌', '昨日大涨'], default='普通震荡')
+
+
+@profiled(cache=st.cache_data)
 def build_structure_tags(today_date: datetime, prev_date: datetime) -> pd.DataFrame:
     """构建昨日形态 + 今日竞价放量 → 结构标签"""
     df_today = read_market_data(today_date, '竞价行情')
@@ -18,39 +39,22 @@ def build_structure_tags(today_date: datetime, prev_date: datetime) -> pd.DataFr
         return pd.DataFrame()
 
     # 合并竞价金额并计算放量倍数
-    df = df_today[['股票代码', '股票简称', '涨跌幅', '竞价金额']].copy()
-    df = df.merge(df_yest[['股票代码', '竞价金额']], on='股票代码', suffixes=('_今', '_昨'), how='left')
+    df = df_today[['股票代码', 'stock_id', '股票简称', '涨跌幅', '竞价金额']].rename(columns={'竞价金额': '竞价金额_今'})
+    df['竞价金额_昨'] = align_by_id(df['stock_id'], df_yest, ['竞价金额'])['竞价金额']
     df['竞价金额_昨'] = df['竞价金额_昨'].fillna(1e6)  # 避免除0
     df['竞价放量倍数'] = df['竞价金额_今'] / df['竞价金额_昨']
 
     # 昨日形态判定
     if not df_close.empty:
-        def yesterday_style(row):
-            high = pd.to_numeric(row.get('最高价', 0), errors='coerce') or 0
-            close = pd.to_numeric(row.get('收盘价', 0), errors='coerce') or 0
-            limit = pd.to_numeric(row.get('涨停价', 0), errors='coerce') or 0
-            pct = pd.to_numeric(row.get('涨跌幅', 0), errors='coerce') or 0
-            if high >= limit > close:
-                return '昨日炸板'
-            # 2. 判断昨日大跌 (跌幅大于等于5%, 即 pct <= -5)
-            elif pct <= -5:
-                return '昨日大跌'
-                
-            # 3. 判断昨日大涨 (涨幅大于等于5%)
-            elif pct >= 5:
-                return '昨日大涨'
-            return '普通震荡'
-
-        df_close['昨日形态'] = df_close.apply(yesterday_style, axis=1)
-        df = df.merge(df_close[['股票代码', '昨日形态']], on='股票代码', how='left')
+        df_close['昨日形态'] = classify_yesterday_style(df_close)
+        df = df.join(align_by_id(df['stock_id'], df_close, ['昨日形态']))
 
     df['昨日形态'] = df['昨日形态'].fillna('普通震荡')
 
     # 连板信息
     if not df_limit.empty:
         df_limit = clean_dataframe(df_limit)
-        df = df.merge(df_limit[['股票代码', '连续涨停天数', '涨停原因类别', '涨跌停']],
-                      on='股票代码', how='left')
+        df = df.join(align_by_id(df['stock_id'], df_limit, ['连续涨停天数', '涨停原因类别', '涨跌停']))
 
     df['连续涨停天数'] = pd.to_numeric(df['连续涨停天数'], errors='coerce').fillna(0).astype(int)
 
@@ -93,6 +97,7 @@ def build_structure_tags(today_date: datetime, prev_date: datetime) -> pd.DataFr
     df['结构标签'] = np.select(conditions, choices, default="--")
     return df
 
+@profiled()
 def analyze_auction_flow(today_date: datetime, prev_date: datetime) -> Optional[Tuple[pd.DataFrame, Dict[str, Any]]]:
     """主分析：竞价资金流向 + 结构标签 + 题材标签"""
     df_today = read_market_data(today_date, '竞价行情')
@@ -144,8 +149,9 @@ def analyze_auction_flow(today_date: datetime, prev_date: datetime) -> Optional[
         'metrics_now': metrics_now, 'metrics_old': metrics_old
     }
     
-    df = df_today[['股票代码', '股票简称', '涨跌幅', '竞价金额','竞价价', '涨停价', '昨收盘']].copy()
-    df = df.merge(df_yest[['股票代码', '竞价金额']], on='股票代码', suffixes=('_今', '_昨'), how='outer')
+    # 全外连接需保留昨日独有的股票，这里仍按代码 merge（stock_id 随键一起合并）
+    df = df_today[['股票代码', 'stock_id', '股票简称', '涨跌幅', '竞价金额','竞价价', '涨停价', '昨收盘']].copy()
+    df = df.merge(df_yest[['股票代码', 'stock_id', '竞价金额']], on=['股票代码', 'stock_id'], suffixes=('_今', '_昨'), how='outer')
     df['竞价金额_今'] = df['竞价金额_今'].fillna(0)
     df['竞价金额_昨'] = df['竞价金额_昨'].fillna(0)
     df['增量(亿)'] = (df['竞价金额_今'] - df['竞价金额_昨']) / 1e8
@@ -153,22 +159,24 @@ def analyze_auction_flow(today_date: datetime, prev_date: datetime) -> Optional[
     # 注入结构标签
     df_tags = build_structure_tags(today_date, prev_date)
     if not df_tags.empty:
-        df = df.merge(df_tags[['股票代码', '结构标签']], on='股票代码', how='left')
+        df = df.join(align_by_id(df['stock_id'], df_tags, ['结构标签']))
     df['结构标签'] = df['结构标签'].fillna('--')
 
     # 注入题材数据
     df_concept = load_concept_data()
     if not df_concept.empty:
         #df['short_code'] = df['股票代码'].str.extract(r'(\d{6})')
-        df = df.merge(df_concept, left_on='股票代码', right_on='code', how='left')
+        df = df.join(align_by_id(df['stock_id'], df_concept, ['code', '所属概念', '所属行业', '历史涨停原因类别']))
         df[['所属概念', '所属行业']] = df[['所属概念', '所属行业']].fillna('')
 
-        def match_hot(row):
-            text = f"{row['所属行业']}|{row['所属概念']}"
-            matched = [k for k in HOT_KEYWORDS if k in text]
-            return " / ".join(matched)
-
-        df['热点标签'] = df.apply(match_hot, axis=1)
+        tagger = get_keyword_tagger(HOT_KEYWORDS)
+        if tagger.crosses(';，|'):
+            text = df['所属行业'].astype(str) + '|' + df['所属概念'].astype(str)
+            df['热点标签'] = tagger.tag(text, " / ")
+        else:
+            # 关键词只会落在单个题材名称内，直接复用 股票×题材 矩阵
+            cm = load_concept_matrix()
+            df['热点标签'] = tagger.tag_incidence(cm.rows(df['stock_id']), cm.concepts, " / ")
     
     return df, overview
 
@@ -220,44 +228,65 @@ def calculate_hot_concepts(df: pd.DataFrame) -> List[Dict[str, Any]]:
         })
     return stats
 
+@profiled()
 def calculate_auto_concepts(df: pd.DataFrame) -> pd.DataFrame:
-    """自动识别并计算题材共振数据"""
+    """自动识别并计算题材共振数据（基于 股票 × 题材 稀疏矩阵）"""
     if df.empty or '所属概念' not in df.columns: return pd.DataFrame()
 
-    df_c = df.copy()
-    df_c['涨跌幅_num'] = pd.to_numeric(df_c['涨跌幅'], errors='coerce').fillna(0)
-    df_c['tag_list'] = (df_c['所属概念'].fillna('') + ';' + df_c['所属行业'].fillna('')).str.replace('，', ';').str.split(';')
-    
-    exploded = df_c.explode('tag_list').rename(columns={'tag_list': '题材名称'})
-    exploded = exploded[(~exploded['题材名称'].isin(BLACKLIST)) & (exploded['题材名称'].str.len() >= 2)]
-    if exploded.empty: return pd.DataFrame()
-
-    concept_grp = exploded.groupby('题材名称').agg(
-        家数=('股票代码', 'count'),
-        红盘率_val=('涨跌幅_num', lambda x: (x > 0).mean() * 100),
-        平均涨跌_val=('涨跌幅_num', 'mean'),
-        资金增量_亿=('增量(亿)', 'sum')
-    )
+    cm = load_concept_matrix()
+    ids = df['stock_id'] if 'stock_id' in df.columns else assign_stock_ids(df['股票代码'])
+    sub = cm.rows(ids)  # (当日行 × 题材)
+
+    # 仅统计非黑名单、长度 >= 2 的题材
+    names = cm.concepts
+    keep = np.array([len(n) >= 2 and n not in BLACKLIST for n in names], dtype=bool)
+    sub = (sub @ sp.diags(keep.astype(float))).tocsr()
+    sub.eliminate_zeros()
+    if sub.nnz == 0: return pd.DataFrame()
+
+    pct = pd.to_numeric(df['涨跌幅'], errors='coerce').fillna(0).to_numpy(dtype=float)
+    inc = df['增量(亿)'].to_numpy(dtype=float)
+
+    # 题材聚合 = 矩阵转置与当日数组的乘积
+    # 涨跌幅按 0.01%、增量按 元 取整后再求和：整数求和与累加顺序无关，结果不随矩阵布局变化
+    sub_t = sub.T.tocsr()
+    count = sub_t @ np.ones(len(df))
+    present = np.nonzero(count > 0)[0]
+    count = count[present]
+    concept_grp = pd.DataFrame({
+        '题材名称': names[present],
+        '家数': count.astype('int64'),
+        '红盘率_val': (sub_t @ (pct > 0).astype(float))[present] / count * 100,
+        '平均涨跌_val': (sub_t @ np.rint(pct * 100))[present] / 100 / count,
+        '资金增量_亿': (sub_t @ np.rint(inc * 1e8))[present] / 1e8
+    })
 
-    exploded['rank'] = exploded.groupby('题材名称')['增量(亿)'].rank(ascending=False, method='first')
-    top2_stats = exploded[exploded['rank'] <= 2].groupby('题材名称')['增量(亿)'].sum()
-    concept_grp['top2_sum'] = top2_stats
+    # 每个题材内按增量降序（同值按行序）取前两名：第一名即增量先锋
+    coo = sub.tocoo()
+    reps = coo.data.astype('int64')
+    rows, cols = np.repeat(coo.row, reps), np.repeat(coo.col, reps)
+    order = np.lexsort((rows, -inc[rows], cols))
+    rows, cols = rows[order], cols[order]
+    starts = np.flatnonzero(np.r_[True, cols[1:] != cols[:-1]])
+    first = rows[starts]
+    has_second = (starts + 1 < len(cols)) & (cols[np.minimum(starts + 1, len(cols) - 1)] == cols[starts])
+    second_inc = np.where(has_second, inc[rows[np.minimum(starts + 1, len(rows) - 1)]], 0.0)
+    concept_grp['top2_sum'] = inc[first] + second_inc
     
     concept_grp['状态'] = np.where(
         (concept_grp['top2_sum'] / concept_grp['资金增量_亿'].replace(0, 1) > 0.7),
         "单兵(抱团)", "板块(合力)"
     )
 
-    leaders = exploded[exploded['rank'] == 1].copy()
-    leaders['增量先锋'] = (
+    leaders = df.iloc[first]
+    concept_grp['增量先锋'] = (
         leaders['股票简称'] + "(" + leaders['涨跌幅'].astype(str) + "%) " + 
         "[" + leaders['结构标签'].fillna('--') + "]"
-    )
+    ).to_numpy()
 
-    final = concept_grp.merge(leaders[['题材名称', '增量先锋']], on='题材名称', how='left')
-    final = final[
-        (final['家数'] >= 4) & (final['家数'] <= 100) & 
-        (final['资金增量_亿'] > 0.3) & (final['平均涨跌_val'] > 0)
+    final = concept_grp[
+        (concept_grp['家数'] >= 4) & (concept_grp['家数'] <= 100) & 
+        (concept_grp['资金增量_亿'] > 0.3) & (concept_grp['平均涨跌_val'] > 0)
     ]
     
     final = final.rename(columns={
@@ -267,6 +296,7 @@ def calculate_auto_concepts(df: pd.DataFrame) -> pd.DataFrame:
     return final.sort_values('资金增量(亿)', ascending=False)
 
 
+@profiled()
 def build_zt_tags(today_date: datetime, prev_date: datetime) -> pd.DataFrame:
     """ 构建涨停标签分析表 - 金额单位：亿元 """
     # 1. 读取数据
@@ -301,23 +331,16 @@ def build_zt_tags(today_date: datetime, prev_date: datetime) -> pd.DataFrame:
 
     # 5. 合并概念、行业及历史涨停原因
     if not df_concept.empty:
-        # 统一代码格式
-        c_code = 'code' if 'code' in df_concept.columns else '股票代码'
-        df_concept[c_code] = df_concept[c_code].apply(standardize_code)
-        # 选取的辅助分析列
-        merge_cols = [c_code, '所属概念', '所属行业', '历史涨停原因类别']
+        # load_concept_data 已完成代码标准化并附带 stock_id，按 ID 对齐即可
+        merge_cols = ['code', '所属概念', '所属行业', '历史涨停原因类别']
         merge_cols = [c for c in merge_cols if c in df_concept.columns]
         
-        df_zt = pd.merge(df_zt, df_concept[merge_cols], left_on='股票代码', right_on=c_code, how='left')
+        df_zt = df_zt.join(align_by_id(df_zt['stock_id'], df_concept, merge_cols))
         
         # 匹配热点关键词
         df_zt['热点关键词'] = ""
         if '所属概念' in df_zt.columns:
-            for keyword in HOT_KEYWORDS:
-                mask = df_zt['所属概念'].astype(str).str.contains(keyword, na=False)
-                df_zt.loc[mask, '热点关键词'] = df_zt.loc[mask, '热点关键词'].apply(
-                    lambda x: keyword if x == "" else f"{x},{keyword}"
-                )
+            df_zt['热点关键词'] = get_keyword_tagger(HOT_KEYWORDS).tag(df_zt['所属概念'].astype(str), ",")
     
     # 6. 市值处理
     if '流通市值' in df_zt.columns:
@@ -1,8 +1,15 @@
 # modules/analyzer_market.py
+import os
 import pandas as pd
 import numpy as np
-from concurrent.futures import ThreadPoolExecutor
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from modules.data_loader import read_market_data
+from modules.trade_calendar import get_trade_calendar
+from modules.utils import detect_encoding
+from modules.profiler import profiled, stage, dump_profile
+from modules.stock_master import set_id_registration
 import streamlit as st
 from modules.config import DATA_DIR, SENTIMENT_TREND_PATH
 
@@ -119,7 +126,8 @@ def process_index_data(d, prefix):
 
         # 3. 直接读取源文件，不走 standardized_code，保留原始的 sh000001
         df_raw = pd.DataFrame()
-        for enc in ['gbk', 'utf-8-sig']:
+        first = detect_encoding(file_path)
+        for enc in [first] + [e for e in ['gbk', 'utf-8-sig'] if e != first]:
             try:
                 # 这里不加 dtype=str，让涨跌幅自动识别为浮点数
                 df_raw = pd.read_csv(file_path, encoding=enc)
@@ -174,101 +182,220 @@ def process_single_date(d):
         combined.update(index_sp)
         return combined
     except Exception: return None
-#@st.cache_data
-@st.cache_data(ttl=20000)
-def get_sentiment_trend_report(date_list: list):
-    """一日一行，增量对齐更新逻辑"""
-    # 1. 加载已有数据
-    old_df = pd.DataFrame()
-    if SENTIMENT_TREND_PATH.exists():
-        try:
-            # 读取时确保“日期”列为字符串，防止解析错误
-            old_df = pd.read_csv(SENTIMENT_TREND_PATH, encoding='utf-8-sig', dtype={'日期': str})
-        except Exception as e:
-            st.warning(f"读取旧趋势表失败，将重新计算: {e}")
-
-    # 2. 识别待更新日期 (尚未完成“收盘”数据计算的日期)
-    processed_dates = set()
-    if not old_df.empty and '收盘_总额' in old_df.columns:
-        # 认为如果有“收盘_总额”且大于 0，则该日收盘数据已完整
-        processed_dates = set(old_df[old_df['收盘_总额'] > 0]['日期'].tolist())
-    
-    needed_dates = [d for d in date_list if d.strftime('%Y-%m-%d') not in processed_dates]
+# =========================================================
+# 情绪趋势表：只追加的增量存储
+# 每个日期一行，带 竞价完成 / 收盘完成 标记；同一日期可能被多次追加，读取时以最后一行为准。
+# 新增或变化的日期（及其后一日，diff 依赖前一日）才重新计算衍生列。
+# =========================================================
+SESSION_FLAGS = {'竞价': '竞价完成', '收盘': '收盘完成'}
+TREND_BASE_KEYS = ['总额', '上海额', '创业额', '上涨数', '下跌数', '沪涨', '沪跌', '创涨', '创跌', '涨停', '跌停', '强力', '极弱']
+TREND_DIFF_KEYS = ['涨停', '跌停', '强力', '极弱']
+
+
+def _read_trend_store():
+    """返回 (按日期去重排序后的趋势表, 文件中的物理行数)"""
+    if not SENTIMENT_TREND_PATH.exists():
+        return pd.DataFrame(), 0
+    try:
+        raw = pd.read_csv(SENTIMENT_TREND_PATH, encoding='utf-8-sig', dtype={'日期': str})
+    except Exception as e:
+        st.warning(f"读取旧趋势表失败，将重新计算: {e}")
+        return pd.DataFrame(), 0
 
-    # 3. 执行增量计算
-    new_results = []
-    if needed_dates:
-        with ThreadPoolExecutor(max_workers=6) as executor:
-            new_results = [r for r in executor.map(process_single_date, needed_dates) if r is not None]
-    
-    if not new_results and old_df.empty:
-        return pd.DataFrame()
+    df = raw.drop_duplicates(subset=['日期'], keep='last').sort_values('日期').reset_index(drop=True)
+    for p, flag in SESSION_FLAGS.items():
+        # 旧版文件没有完成标记，按总额补齐
+        total = df[f'{p}_总额'] if f'{p}_总额' in df.columns else pd.Series(0.0, index=df.index)
+        df[flag] = df[flag].astype(bool) if flag in df.columns else (total.fillna(0) > 0)
+    return df, len(raw)
 
-    # 4. 合并与日期对齐
-    new_df = pd.DataFrame(new_results)
-    if not old_df.empty:
-        # 补全 old_df 的 _raw_date 用于后续排序
-        if '_raw_date' not in old_df.columns:
-            old_df['_raw_date'] = pd.to_datetime(old_df['日期'])
-        combined_df = pd.concat([old_df, new_df], ignore_index=True)
-    else:
-        combined_df = new_df
 
-    # 统一转换 _raw_date 为 pandas datetime 格式，解决 Timestamp 与 date 无法比较的问题
-    combined_df['_raw_date'] = pd.to_datetime(combined_df['_raw_date'])
+def _write_trend_store(df: pd.DataFrame):
+    """整表原子写：先写临时文件再替换"""
+    SENTIMENT_TREND_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = SENTIMENT_TREND_PATH.with_name(SENTIMENT_TREND_PATH.name + '.tmp')
+    df.to_csv(tmp, index=False, encoding='utf-8-sig')
+    os.replace(tmp, SENTIMENT_TREND_PATH)
+
 
-    # 5. 去重策略：按日期排序，保留最后一条（覆盖上午的“仅竞价”数据）
-    combined_df = combined_df.sort_values('_raw_date').drop_duplicates(subset=['日期'], keep='last')
+def _append_trend_rows(rows: pd.DataFrame, store: pd.DataFrame, physical_rows: int):
+    """把补丁行追加到文件末尾；表头变化或重复行过多时整表压缩重写"""
+    columns = list(store.columns)
+    header = []
+    if SENTIMENT_TREND_PATH.exists():
+        with open(SENTIMENT_TREND_PATH, encoding='utf-8-sig') as f:
+            header = f.readline().rstrip('\r\n').split(',')
 
-    # 6. 重新计算所有衍生指标（确保 diff 等计算的连续性）
-    # 将数值列中的 NaN 填充为 0
-    numeric_cols = combined_df.select_dtypes(include=[np.number]).columns
-    combined_df[numeric_cols] = combined_df[numeric_cols].fillna(0)
+    if header != columns or physical_rows + len(rows) > 2 * len(store) + 10:
+        _write_trend_store(store)
+        return
 
+    # 单次 write 追加，避免半行写入
+    text = rows[columns].to_csv(index=False, header=False, lineterminator='\n')
+    with open(SENTIMENT_TREND_PATH, 'a', encoding='utf-8', newline='') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _derive_trend_rows(cur: pd.DataFrame, prev: pd.DataFrame) -> pd.DataFrame:
+    """
+    计算衍生指标。cur 为待计算的行，prev 为各行对应的前一交易日（逐行对齐，无前一日为 NaN）。
+    与整表 diff()/pct_change() 的结果一致。
+    """
+    cur = cur.copy()
     for p in ['竞价', '收盘']:
-        # 确保基础统计列存在
-        for k in ['总额', '上海额', '创业额', '上涨数', '下跌数', '沪涨', '沪跌', '创涨', '创跌', '涨停', '跌停', '强力', '极弱']:
-            col = f"{p}_{k}"
-            if col not in combined_df.columns:
-                combined_df[col] = 0.0
+        total, prev_total = cur[f'{p}_总额'], prev[f'{p}_总额']
 
         # 资金维度 (4列)
-        combined_df[f'{p}_资金增减'] = combined_df[f'{p}_总额'].diff()
-        combined_df[f'{p}_增减幅'] = combined_df[f'{p}_总额'].pct_change()
-        combined_df[f'{p}_上海差值'] = combined_df[f'{p}_上海额'].diff()
-        combined_df[f'{p}_创业差值'] = combined_df[f'{p}_创业额'].diff()
+        cur[f'{p}_资金增减'] = total - prev_total
+        cur[f'{p}_增减幅'] = total / prev_total - 1
+        cur[f'{p}_上海差值'] = cur[f'{p}_上海额'] - prev[f'{p}_上海额']
+        cur[f'{p}_创业差值'] = cur[f'{p}_创业额'] - prev[f'{p}_创业额']
 
         # 涨跌比维度 (3列)
-        combined_df[f'{p}_全场涨跌比'] = combined_df[f'{p}_上涨数'] / combined_df[f'{p}_下跌数'].replace(0, 1)
-        combined_df[f'{p}_上海涨跌比'] = combined_df[f'{p}_沪涨'] / combined_df[f'{p}_沪跌'].replace(0, 1)
-        combined_df[f'{p}_创业涨跌比'] = combined_df[f'{p}_创涨'] / combined_df[f'{p}_创跌'].replace(0, 1)
+        cur[f'{p}_全场涨跌比'] = cur[f'{p}_上涨数'] / cur[f'{p}_下跌数'].replace(0, 1)
+        cur[f'{p}_上海涨跌比'] = cur[f'{p}_沪涨'] / cur[f'{p}_沪跌'].replace(0, 1)
+        cur[f'{p}_创业涨跌比'] = cur[f'{p}_创涨'] / cur[f'{p}_创跌'].replace(0, 1)
 
         # 情绪波动维度 (4列)
-        combined_df[f'{p}_涨停_diff'] = combined_df[f'{p}_涨停'].diff()
-        combined_df[f'{p}_跌停_diff'] = combined_df[f'{p}_跌停'].diff()
-        combined_df[f'{p}_强力_diff'] = combined_df[f'{p}_强力'].diff()
-        combined_df[f'{p}_极弱_diff'] = combined_df[f'{p}_极弱'].diff()
-
-        # 4. 连续性校验：如果今日或昨日总额为0，则抹平所有衍生变动指标
-        mask = (combined_df[f'{p}_总额'] == 0) | (combined_df[f'{p}_总额'].shift(1) == 0)
-        derived_cols = [
-            f'{p}_资金增减', f'{p}_增减幅', f'{p}_上海差值', f'{p}_创业差值',
-            f'{p}_涨停_diff', f'{p}_跌停_diff', f'{p}_强力_diff', f'{p}_极弱_diff'
-        ]
-        combined_df.loc[mask, derived_cols] = 0
-        
+        for k in TREND_DIFF_KEYS:
+            cur[f'{p}_{k}_diff'] = cur[f'{p}_{k}'] - prev[f'{p}_{k}']
+
+        # 连续性校验：如果今日或昨日总额为0，则抹平所有衍生变动指标
+        mask = (total == 0) | (prev_total == 0)
+        derived_cols = [f'{p}_资金增减', f'{p}_增减幅', f'{p}_上海差值', f'{p}_创业差值'] + [f'{p}_{k}_diff' for k in TREND_DIFF_KEYS]
+        cur.loc[mask, derived_cols] = 0
+
         # 确保 diff 列为整数类型（在抹平之后转换）
-        for col in [f'{p}_涨停_diff', f'{p}_跌停_diff', f'{p}_强力_diff', f'{p}_极弱_diff']:
-            combined_df[col] = combined_df[col].fillna(0).astype(int)
+        for k in TREND_DIFF_KEYS:
+            cur[f'{p}_{k}_diff'] = cur[f'{p}_{k}_diff'].fillna(0).astype(int)
+    return cur
+
 
-    # 7. 最终整理、保留4位小数并安全写回
-    final_df = combined_df.drop(columns=['_raw_date']).sort_values('日期').reset_index(drop=True)
-    final_df = final_df.round(4)
+def _needs_refresh(store: pd.DataFrame, date_str: str) -> bool:
+    """收盘未完成，或竞价未完成但竞价文件已经落盘的日期需要重新计算"""
+    row = store.loc[store['日期'] == date_str] if not store.empty else store
+    if row.empty:
+        return True
+    row = row.iloc[-1]
+    if not row['收盘完成']:
+        return True
+    return not row['竞价完成'] and (DATA_DIR / f"{date_str}_竞价行情.csv").exists()
 
+
+#@st.cache_data
+@profiled(cache=st.cache_data(ttl=20000))
+def get_sentiment_trend_report(date_list: list):
+    """一日一行，增量对齐更新逻辑：只计算新增/未完成的日期，只追加变化的行"""
+    # 1. 加载已有数据
+    store, physical_rows = _read_trend_store()
+
+    # 2. 识别待更新日期
+    needed_dates = [d for d in date_list if _needs_refresh(store, d.strftime('%Y-%m-%d'))]
+
+    # 3. 执行增量计算
+    new_results = []
+    if needed_dates:
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            new_results = [r for r in executor.map(process_single_date, needed_dates) if r is not None]
+
+    if not new_results and store.empty:
+        return pd.DataFrame()
+    return _merge_trend_results(store, physical_rows, new_results)
+
+
+def _merge_trend_results(store: pd.DataFrame, physical_rows: int, new_results: list) -> pd.DataFrame:
+    """把单日统计结果并入趋势表：只重算、只追加发生变化的行，返回不含完成标记的完整趋势表"""
+    # 4. 新结果补齐基础列与完成标记，并剔除与已存结果相同的日期
+    new_df = pd.DataFrame(new_results).drop(columns=['_raw_date'], errors='ignore')
+    changed = []
+    if not new_df.empty:
+        numeric_cols = new_df.select_dtypes(include=[np.number]).columns
+        new_df[numeric_cols] = new_df[numeric_cols].fillna(0)
+        for p, flag in SESSION_FLAGS.items():
+            for k in TREND_BASE_KEYS:
+                if f'{p}_{k}' not in new_df.columns:
+                    new_df[f'{p}_{k}'] = 0.0
+            new_df[flag] = new_df[f'{p}_总额'] > 0
+
+        known = store.set_index('日期') if not store.empty else pd.DataFrame()
+        for _, row in new_df.iterrows():
+            d = row['日期']
+            if d in known.index:
+                base = [c for c in new_df.columns if c in known.columns and c != '日期']
+                old = known.loc[d, base]
+                if np.allclose(pd.to_numeric(row[base], errors='coerce').round(4).astype(float),
+                               pd.to_numeric(old, errors='coerce').astype(float), equal_nan=True):
+                    continue
+            changed.append(d)
+
+    if not changed:
+        return store.drop(columns=list(SESSION_FLAGS.values()))
+
+    # 5. 合并：变化日期覆盖旧行，其余保持不动
+    merged = pd.concat([store[~store['日期'].isin(changed)] if not store.empty else store,
+                        new_df[new_df['日期'].isin(changed)]], ignore_index=True)
+    merged = merged.sort_values('日期').reset_index(drop=True)
+
+    # 6. 只重算变化行及其后一行的衍生列
+    pos = np.flatnonzero(merged['日期'].isin(changed).to_numpy())
+    pos = np.union1d(pos, pos + 1)
+    pos = pos[pos < len(merged)]
+    prev = merged.shift(1).iloc[pos]
+    patch = _derive_trend_rows(merged.iloc[pos], prev.set_axis(merged.index[pos])).round(4)
+    for col in patch.columns:
+        if col not in merged.columns:
+            merged[col] = np.nan
+    merged.loc[patch.index, patch.columns] = patch
+
+    # 列顺序：沿用旧表，新列在后，完成标记放在最后
+    flags = list(SESSION_FLAGS.values())
+    columns = [c for c in (list(store.columns) or list(merged.columns)) if c not in flags]
+    columns += [c for c in merged.columns if c not in columns and c not in flags] + flags
+    merged = merged[columns]
+
+    # 7. 追加补丁行（原子写/压缩见 _append_trend_rows）
     try:
-        SENTIMENT_TREND_PATH.parent.mkdir(parents=True, exist_ok=True)
-        final_df.to_csv(SENTIMENT_TREND_PATH, index=False, encoding='utf-8-sig')
+        _append_trend_rows(merged.loc[patch.index], merged, physical_rows)
     except Exception as e:
         st.error(f"自动保存趋势报告失败: {e}")
 
-    return final_df
+    return merged.drop(columns=flags)
+
+
+def backfill_sentiment_trend(date_list: list, max_workers: int = None, chunksize: int = None) -> pd.DataFrame:
+    """
+    进程池回填：把日期分块派发给多个进程，各进程独立读数并只返回单日统计字典，
+    汇总后按增量逻辑并入趋势表。适合一次重算几十到上百个交易日。
+    """
+    if not date_list:
+        return pd.DataFrame()
+    workers = max(1, min(max_workers or os.cpu_count() or 1, len(date_list)))
+    chunksize = chunksize or max(1, len(date_list) // (workers * 4))
+
+    t0 = time.perf_counter()
+    # 工作进程只产出统计值、用不到 stock_id：关闭新代码登记，各进程不会各自给同一批新代码编号
+    with stage('回填: 进程池计算', rows=len(date_list)), \
+            ProcessPoolExecutor(max_workers=workers, initializer=set_id_registration, initargs=(False,)) as executor:
+        results = [r for r in executor.map(process_single_date, date_list, chunksize=chunksize) if r is not None]
+    print(f"⏱️ 回填 {len(results)}/{len(date_list)} 个交易日，{workers} 进程，耗时 {time.perf_counter() - t0:.2f}s")
+
+    with stage('回填: 合并趋势表') as rec:
+        store, physical_rows = _read_trend_store()
+        if not results and store.empty:
+            return pd.DataFrame()
+        merged = _merge_trend_results(store, physical_rows, results)
+        rec['行数'] = len(merged)
+    return merged
+
+
+if __name__ == "__main__":
+    # 重建指定区间的情绪趋势：python -m modules.analyzer_market 2025-12-01 2026-01-29 [进程数]
+    if len(sys.argv) < 3:
+        print("用法: python -m modules.analyzer_market 开始日期 结束日期 [进程数]")
+        sys.exit(1)
+    dates = get_trade_calendar().range(sys.argv[1], sys.argv[2])
+    report = backfill_sentiment_trend(dates, int(sys.argv[3]) if len(sys.argv) > 3 else None)
+    print(f"✅ 趋势表共 {len(report)} 行 -> {SENTIMENT_TREND_PATH}")
+    dump_profile('analyzer_market')
@@ -0,0 +1,259 @@
+# modules/auction_bundle.py
+"""
+竞价分析结果包：main.py 保存竞价快照后立即计算整套分析（资金流向、结构/涨停标签、题材统计、报告对象）
+并按日期落盘，看板首次打开时直接读取，无需现场计算。
+每个日期一个目录：df / auto_df / df_zt / hot_stats 为 parquet，报告结构、Markdown 正文、overview 与输入指纹放在 meta.json。
+输入文件（当日/对比日行情、对比日涨跌停、所属概念、题材矩阵）、分析参数或分析代码变化后指纹不再匹配，读取方回退现场计算。
+stock_id 只在本进程内有效，落盘前去掉，读取时按股票代码重新映射。
+批量出报告：python -m modules.auction_bundle 开始日期 结束日期 [进程数]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+from pathlib import Path
+import datetime
+from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from .config import (AUCTION_BUNDLE_DIR, AUCTION_REPORT_DIR, CONCEPT_PATH, CONCEPT_MATRIX_PATH, DATA_DIR,
+                     HOT_KEYWORDS, HOT_CONCEPT_LIST, BLACKLIST)
+from .trade_calendar import get_trade_calendar
+from .analyzer import analyze_auction_flow, calculate_hot_concepts, calculate_auto_concepts, build_zt_tags
+from .reporter import Report, build_auction_report
+from .profiler import profiled, stage, dump_profile
+from .stock_master import assign_stock_ids
+
+BUNDLE_FRAMES = ['df', 'auto_df', 'df_zt']
+# 结果包格式版本：目录结构或 meta 字段有不兼容改动时递增
+BUNDLE_VERSION = 2
+# 这些模块的源码参与指纹，改了阈值、标签规则或报告结构后旧结果包自动失效
+LOGIC_MODULES = ['analyzer', 'keyword_tagger', 'concept_matrix', 'reporter', 'auction_bundle']
+
+
+def compute_auction_analysis(today_date, prev_date) -> Optional[dict]:
+    """完整的竞价分析流程（不涉及任何 st 组件）；竞价数据缺失时返回 None"""
+    result = analyze_auction_flow(today_date, prev_date)
+    if result is None:
+        return None
+
+    df, overview = result
+
+    # 提前构建涨停/热点标签并合并
+    df_zt = build_zt_tags(today_date, prev_date)
+    if not df_zt.empty and '热点标签' in df_zt.columns:
+        tag_slice = df_zt[['股票代码', '热点标签']].drop_duplicates('股票代码')
+        df = pd.merge(df, tag_slice, on='股票代码', how='left')
+        df['热点标签'] = df['热点标签'].fillna('')
+    else:
+        df['热点标签'] = ''
+
+    # 题材数据
+    hot_concept_stats = calculate_hot_concepts(df)
+    auto_concept_df = calculate_auto_concepts(df)
+
+    # 报告只组装章节，各格式用到时再渲染
+    with stage('组装报告'):
+        report = build_auction_report(today_date, prev_date, overview, df, hot_concept_stats, auto_concept_df, df_zt)
+
+    return {
+        "df": df,
+        "hot_stats": hot_concept_stats,
+        "auto_df": auto_concept_df,
+        "report": report,
+        "df_zt": df_zt,
+        "overview": overview
+    }
+
+
+def _read_frame(path) -> pd.DataFrame:
+    """parquet 会把 object 列里的 NaN 读回成 None，还原成 NaN 与现场计算保持一致"""
+    df = pd.read_parquet(path)
+    for col in df.columns[df.dtypes == object]:
+        df[col] = df[col].where(df[col].notna(), np.nan)
+    return df
+
+
+def _to_builtin(obj):
+    """json.dump 的 default：numpy 标量转成 Python 原生类型"""
+    return obj.item() if hasattr(obj, 'item') else str(obj)
+
+
+def _records(df) -> list:
+    """DataFrame -> 记录列表（NaN 转 null）"""
+    if df is None or len(df) == 0:
+        return []
+    return json.loads(pd.DataFrame(df).to_json(orient='records', force_ascii=False))
+
+
+def _bundle_dir(today_date):
+    return AUCTION_BUNDLE_DIR / today_date.strftime('%Y-%m-%d')
+
+
+def _input_fingerprint(today_date, prev_date) -> str:
+    """分析输入、参数与代码的内容指纹（不用 mtime：git 检出会改写 mtime）"""
+    paths = [
+        DATA_DIR / f"{today_date.strftime('%Y-%m-%d')}_竞价行情.csv",
+        DATA_DIR / f"{prev_date.strftime('%Y-%m-%d')}_竞价行情.csv",
+        DATA_DIR / f"{prev_date.strftime('%Y-%m-%d')}_收盘行情.csv",
+        DATA_DIR / f"{prev_date.strftime('%Y-%m-%d')}_收盘涨跌停.csv",
+        CONCEPT_PATH,
+        CONCEPT_MATRIX_PATH,
+    ] + [Path(__file__).parent / f"{m}.py" for m in LOGIC_MODULES]
+    params = {'version': BUNDLE_VERSION, 'HOT_KEYWORDS': HOT_KEYWORDS,
+              'HOT_CONCEPT_LIST': HOT_CONCEPT_LIST, 'BLACKLIST': sorted(BLACKLIST)}
+    h = hashlib.sha1(json.dumps(params, ensure_ascii=False, sort_keys=True).encode())
+    for p in paths:
+        h.update(p.name.encode())
+        h.update(p.read_bytes() if p.exists() else b'-')
+    return h.hexdigest()
+
+
+@profiled()
+def save_auction_bundle(today_date, prev_date, data: dict) -> bool:
+    """把分析结果写入日期目录（先写临时目录再整体替换）"""
+    target = _bundle_dir(today_date)
+    tmp = target.with_name(target.name + '.tmp')
+    try:
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        for name in BUNDLE_FRAMES:
+            data[name].drop(columns=['stock_id'], errors='ignore').to_parquet(tmp / f"{name}.parquet")
+        pd.DataFrame(data['hot_stats']).to_parquet(tmp / 'hot_stats.parquet')
+        meta = {
+            'today': today_date.strftime('%Y-%m-%d'),
+            'prev': prev_date.strftime('%Y-%m-%d'),
+            'fingerprint': _input_fingerprint(today_date, prev_date),
+            'built_at': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'report': data['report'].to_dict(),
+            'md_report': data['report'].to_markdown(),
+            'overview': data.get('overview'),
+            'columns': {name: list(data[name].columns) for name in BUNDLE_FRAMES},
+        }
+        with open(tmp / 'meta.json', 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, default=_to_builtin)
+        shutil.rmtree(target, ignore_errors=True)
+        tmp.rename(target)
+        return True
+    except Exception as e:
+        print(f"⚠️ 竞价分析结果包写入失败: {e}")
+        shutil.rmtree(tmp, ignore_errors=True)
+        return False
+
+
+@profiled()
+def load_auction_bundle(today_date, prev_date) -> Optional[dict]:
+    """读取预计算结果；不存在、对比日不同或输入已变化时返回 None"""
+    target = _bundle_dir(today_date)
+    meta_path = target / 'meta.json'
+    if not meta_path.exists():
+        return None
+    try:
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta['prev'] != prev_date.strftime('%Y-%m-%d'):
+            return None
+        if meta['fingerprint'] != _input_fingerprint(today_date, prev_date):
+            print(f"ℹ️ {meta['today']} 竞价分析结果包已过期（输入数据、参数或分析代码有变化）")
+            return None
+        data = {}
+        for name in BUNDLE_FRAMES:
+            df = _read_frame(target / f"{name}.parquet")
+            columns = meta['columns'][name]
+            if 'stock_id' in columns and '股票代码' in df.columns:
+                df['stock_id'] = assign_stock_ids(df['股票代码'])
+            data[name] = df[columns]
+        data['hot_stats'] = _read_frame(target / 'hot_stats.parquet').to_dict(orient='records')
+        data['report'] = Report.from_dict(meta['report'], markdown=meta['md_report'])
+        data['overview'] = meta.get('overview')
+        return data
+    except Exception as e:
+        print(f"⚠️ 竞价分析结果包读取失败: {e}")
+        return None
+
+
+def build_auction_bundle(today_date, prev_date) -> Optional[dict]:
+    """计算并落盘（采集脚本在保存竞价快照后调用）"""
+    data = compute_auction_analysis(today_date, prev_date)
+    if data is None:
+        print(f"⚠️ {today_date.strftime('%Y-%m-%d')} 竞价数据缺失，跳过分析结果包")
+        return None
+    if save_auction_bundle(today_date, prev_date, data):
+        print(f"✅ 竞价分析结果包已生成: {_bundle_dir(today_date)}")
+    return data
+
+
+def _write_report(today_date, prev_date, data: dict):
+    """写出 竞价分析_YYYYMMDD.md 与同名 JSON（概览 + 题材/共振/涨停 三张完整表 + 报告章节）"""
+    stem = AUCTION_REPORT_DIR / f"竞价分析_{today_date.strftime('%Y%m%d')}"
+    with open(stem.with_suffix('.md'), 'w', encoding='utf-8') as f:
+        f.write(data['report'].to_markdown())
+    payload = {
+        'today': today_date.strftime('%Y-%m-%d'),
+        'prev': prev_date.strftime('%Y-%m-%d'),
+        'overview': data.get('overview'),
+        'hot_concepts': _records(data['hot_stats']),
+        'auto_concepts': _records(data['auto_df']),
+        'zt_stocks': _records(data['df_zt']),
+        'sections': data['report'].to_dict()['sections'],
+    }
+    with open(stem.with_suffix('.json'), 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False, indent=1, default=_to_builtin)
+
+
+def _report_chunk(pairs: list) -> list:
+    """
+    单个进程顺序处理一段连续交易日。相邻两天共用一份竞价行情（当天即下一天的对比日），
+    读过的快照留在本进程的行情缓存里，不会重复解析。
+    """
+    done = []
+    for today_date, prev_date in pairs:
+        try:
+            data = load_auction_bundle(today_date, prev_date) or compute_auction_analysis(today_date, prev_date)
+            if data is None:
+                print(f"⚠️ {today_date.strftime('%Y-%m-%d')} 竞价数据缺失，跳过")
+                continue
+            _write_report(today_date, prev_date, data)
+            done.append(today_date)
+        except Exception as e:
+            print(f"⚠️ {today_date.strftime('%Y-%m-%d')} 报告生成失败: {e}")
+    return done
+
+
+def generate_reports(date_list: list, max_workers: int = None) -> list:
+    """
+    批量生成区间内每个交易日的竞价报告。
+    date_list 需按日期升序且包含区间首日的前一个交易日（只作为对比日，不出报告）。
+    日期切成连续的段分给进程池，保证段内相邻日期的行情复用。
+    """
+    pairs = list(zip(date_list[1:], date_list[:-1]))
+    if not pairs:
+        return []
+    AUCTION_REPORT_DIR.mkdir(parents=True, exist_ok=True)
+    workers = max(1, min(max_workers or os.cpu_count() or 1, len(pairs)))
+    size = -(-len(pairs) // workers)
+    chunks = [pairs[i:i + size] for i in range(0, len(pairs), size)]
+
+    t0 = time.perf_counter()
+    with stage('批量报告: 进程池计算', rows=len(pairs)), ProcessPoolExecutor(max_workers=len(chunks)) as executor:
+        done = [d for part in executor.map(_report_chunk, chunks) for d in part]
+    print(f"⏱️ 生成 {len(done)}/{len(pairs)} 份报告，{len(chunks)} 进程，耗时 {time.perf_counter() - t0:.2f}s")
+    return done
+
+
+if __name__ == "__main__":
+    # 批量生成区间内的竞价报告：python -m modules.auction_bundle 2025-12-01 2026-01-29 [进程数]
+    if len(sys.argv) < 3:
+        print("用法: python -m modules.auction_bundle 开始日期 结束日期 [进程数]")
+        sys.exit(1)
+    calendar = get_trade_calendar()
+    dates = calendar.range(sys.argv[1], sys.argv[2])
+    first_prev = calendar.prev(sys.argv[1])
+    if first_prev:
+        dates = [first_prev] + dates
+    done = generate_reports(dates, int(sys.argv[3]) if len(sys.argv) > 3 else None)
+    print(f"✅ 共生成 {len(done)} 份报告 -> {AUCTION_REPORT_DIR}")
+    dump_profile('auction_bundle')
@@ -0,0 +1,166 @@
+# modules/auction_stream.py
+"""
+集合竞价流式采集：09:15–09:25 每隔几秒拉取一次全市场行情，
+只把相对上一帧发生变化的单元格追加写入当日逐笔文件（gzip 分段追加），
+内存中只保留最新一帧全量状态；窗口结束时的状态即为 竞价行情 快照。
+每次采集写入独立的场次文件（文件名带开始时间），首帧为全量；同日重跑不会覆盖之前的场次，回放时按场次先后合并。
+"""
+import gzip
+import time
+import datetime
+import pandas as pd
+from typing import Callable, List, Optional
+from .config import TICK_DIR
+
+
+# 逐笔文件中"该字段变为缺失"的标记；留空表示"与上一帧相同"
+CLEARED = '__NA__'
+
+
+def tick_store_path(trade_date: str, run: Optional[str] = None):
+    """逐笔文件路径；run 为场次开始时间 (HHMMSS)，为空时是旧版不分场次的文件名"""
+    suffix = f"_{run}" if run else ""
+    return TICK_DIR / f"{trade_date}_竞价逐笔{suffix}.csv.gz"
+
+
+def tick_run_paths(trade_date: str) -> list:
+    """当日所有场次文件，按开始时间升序（旧版无场次文件排最前）"""
+    return sorted(TICK_DIR.glob(f"{trade_date}_竞价逐笔*.csv.gz"), key=lambda p: p.name)
+
+
+class AuctionTickStore:
+    """
+    当日单个场次的逐笔存储。每行 = (时间, 代码键, 各字段)，未变化的字段留空，变为缺失的字段写 CLEARED；
+    首帧为全量，之后每帧只写变化过的股票与字段。
+    """
+
+    def __init__(self, trade_date: str, columns: List[str], run: Optional[str] = None):
+        run = run or _beijing_now().strftime('%H%M%S')
+        self.path = tick_store_path(trade_date, run)
+        n = 1
+        while self.path.exists():  # 同一秒内再次启动：加序号，绝不覆盖已有场次
+            self.path = tick_store_path(trade_date, f"{run}_{n}")
+            n += 1
+        self.columns = list(columns)
+        self.state: Optional[pd.DataFrame] = None  # 最新全量状态 (index = 代码键)
+        self.frames = 0
+        self.rows_written = 0
+
+    def _frame(self, raw_map: dict) -> pd.DataFrame:
+        frame = pd.DataFrame(raw_map).T.reindex(columns=self.columns)
+        frame.index.name = 'key'
+        return frame
+
+    def append(self, raw_map: dict, ts: str) -> int:
+        """写入一帧，返回本帧变化的股票数"""
+        frame = self._frame(raw_map)
+        first = self.state is None
+        if first:
+            delta = frame
+        else:
+            last = self.state.reindex(frame.index)
+            same = (frame == last) | (frame.isna() & last.isna())
+            cleared = frame.isna() & last.notna()
+            delta = frame.astype(object).where(~same).mask(cleared, CLEARED)
+            delta = delta[(~same).any(axis=1)]
+            # 本帧缺失的股票沿用上一帧；本帧里的股票以本帧为准（包括变为缺失的字段）
+            frame = pd.concat([frame, self.state[~self.state.index.isin(frame.index)]])
+        self.state = frame
+
+        if not delta.empty:
+            out = delta.reset_index()
+            out.insert(0, 'ts', ts)
+            # 首帧带表头，之后按帧追加：gzip 支持多段拼接，无需重写历史
+            payload = out.to_csv(index=False, header=first, lineterminator='\n').encode('utf-8')
+            with open(self.path, 'ab') as f:
+                f.write(gzip.compress(payload))
+        self.frames += 1
+        self.rows_written += len(delta)
+        return len(delta)
+
+    def snapshot(self) -> pd.DataFrame:
+        """当前全量状态，格式与 quotation.stocks() 转成的 DataFrame 一致"""
+        return pd.DataFrame() if self.state is None else self.state.rename_axis(None)
+
+
+def _replay_run(path, until: Optional[str] = None) -> pd.DataFrame:
+    """回放单个场次文件，返回该场次截至 until 的全量状态"""
+    df = pd.read_csv(path, dtype={'code': str})
+    if until:
+        df = df[df['ts'] <= until]
+    if df.empty:
+        return pd.DataFrame()
+    state = df.drop(columns=['ts']).groupby('key', sort=False).ffill()
+    state['key'] = df['key']
+    state = state.groupby('key', sort=False).last()
+
+    # 还原 CLEARED 为缺失；含标记的列被读成了字符串，还原后能全部转成数值的再转回数值
+    for col in state.columns:
+        values = state[col]
+        if pd.api.types.is_numeric_dtype(values) or not values.eq(CLEARED).any():
+            continue
+        values = values.mask(values.eq(CLEARED))
+        numeric = pd.to_numeric(values, errors='coerce')
+        state[col] = numeric if numeric.notna().sum() == values.notna().sum() else values
+    return state
+
+
+def load_ticks(trade_date: str, until: Optional[str] = None) -> pd.DataFrame:
+    """
+    回放当日逐笔文件，得到截至 until (HH:MM:SS[.fff]) 的全量状态；until 为空时返回收尾状态。
+    多个场次各自回放后合并：同一股票以较晚场次的状态为准，只在较早场次出现的股票保留。
+    """
+    runs = [r for r in (_replay_run(p, until) for p in tick_run_paths(trade_date)) if not r.empty]
+    if not runs:
+        return pd.DataFrame()
+    state = runs[0] if len(runs) == 1 else pd.concat(runs).groupby(level=0, sort=False).tail(1)
+    return state.rename_axis(None)
+
+
+def _beijing_now():
+    return datetime.datetime.now(datetime.timezone(datetime.timedelta(hours=8)))
+
+
+def capture_auction_stream(fetch: Callable[[], dict], columns: List[str],
+                           start=datetime.time(9, 15), end=datetime.time(9, 25, 3),
+                           interval: float = 3.0) -> pd.DataFrame:
+    """
+    在 [start, end] 窗口内按 interval 秒轮询 fetch()，逐帧写入逐笔文件；
+    到达 end 后再取最后一帧，返回收尾全量状态（即 竞价行情）。
+    """
+    now = _beijing_now()
+    trade_date = now.strftime('%Y-%m-%d')
+    TICK_DIR.mkdir(parents=True, exist_ok=True)
+    store = AuctionTickStore(trade_date, columns)
+
+    def wait_until(t: datetime.time):
+        target = datetime.datetime.combine(now.date(), t, tzinfo=now.tzinfo)
+        remaining = (target - _beijing_now()).total_seconds()
+        if remaining > 0:
+            time.sleep(remaining)
+
+    wait_until(start)
+    print(f"📡 竞价流式采集开始 ({_beijing_now().strftime('%H:%M:%S')})，间隔 {interval}s，截止 {end.strftime('%H:%M:%S')}")
+
+    end_at = datetime.datetime.combine(now.date(), end, tzinfo=now.tzinfo)
+    while True:
+        t0 = time.monotonic()
+        now_bj = _beijing_now()
+        final = now_bj >= end_at  # 截止后再取最后一帧作为收尾
+        try:
+            raw_map = fetch()
+            if raw_map:
+                changed = store.append(raw_map, now_bj.strftime('%H:%M:%S.%f')[:-3])
+                if store.frames % 10 == 1 or final:
+                    print(f"⏳ {now_bj.strftime('%H:%M:%S')} 第{store.frames}帧，变化 {changed} 只，耗时 {time.monotonic() - t0:.2f}s")
+        except Exception as e:
+            print(f"⚠️ 竞价轮询失败 ({now_bj.strftime('%H:%M:%S')}): {e}")
+        if final:
+            break
+        # 下一次轮询时间，不越过截止时刻
+        sleep = min(t0 + interval - time.monotonic(), (end_at - _beijing_now()).total_seconds())
+        if sleep > 0:
+            time.sleep(sleep)
+
+    print(f"✅ 竞价流式采集结束：{store.frames} 帧，写入 {store.rows_written} 行 -> {store.path}")
+    return store.snapshot()
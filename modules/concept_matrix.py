@@ -0,0 +1,121 @@
+# modules/concept_matrix.py
+"""
+股票 × 题材 稀疏关联矩阵 (CSR)：行 = stock_id，列 = 题材名称（所属概念 + 所属行业），值 = 出现次数。
+由 update_concepts_daily 在写出 所属概念.csv 后预先生成；
+题材层面的家数 / 红盘率 / 平均涨跌 / 增量合计都变成稀疏矩阵与当日数组的乘积。
+"""
+import hashlib
+import threading
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from dataclasses import dataclass
+from .config import CONCEPT_PATH, CONCEPT_MATRIX_PATH
+from .data_loader import load_concept_data
+from .stock_master import assign_stock_ids, get_stock_index
+
+_LOCK = threading.Lock()
+_STATE = {'key': None, 'matrix': None}
+
+
+@dataclass
+class ConceptMatrix:
+    matrix: sp.csr_matrix     # (stock_id 数 × 题材数)
+    concepts: np.ndarray      # 列名，按字典序排列（与 groupby 顺序一致）
+
+    def rows(self, stock_ids) -> sp.csr_matrix:
+        """按给定 stock_id 顺序取出子矩阵；未知或无效 ID 对应全零行"""
+        ids = np.asarray(stock_ids, dtype='int64')
+        valid = (ids >= 0) & (ids < self.matrix.shape[0])
+        sub = self.matrix[np.where(valid, ids, 0)]
+        return sp.diags(valid.astype(float)) @ sub
+
+
+def _source_hash() -> str:
+    return hashlib.sha1(CONCEPT_PATH.read_bytes()).hexdigest() if CONCEPT_PATH.exists() else ''
+
+
+def _build_from_csv() -> ConceptMatrix:
+    """与 load_concept_data 一致：每只股票取第一行，按 ';' 切分 所属概念 与 所属行业"""
+    df = load_concept_data()
+    if df.empty:
+        return ConceptMatrix(sp.csr_matrix((0, 0)), np.array([], dtype=object))
+    df = df[df['stock_id'] >= 0].drop_duplicates('stock_id')
+
+    tags = (df['所属概念'].fillna('') + ';' + df['所属行业'].fillna('')).str.replace('，', ';').str.split(';')
+    pairs = pd.DataFrame({'stock_id': df['stock_id'].to_numpy(), '题材名称': tags.to_numpy()}).explode('题材名称')
+    pairs = pairs[pairs['题材名称'].fillna('').str.len() > 0]
+
+    concepts, cols = np.unique(pairs['题材名称'].to_numpy(dtype=str), return_inverse=True)
+    rows = pairs['stock_id'].to_numpy(dtype='int64')
+    shape = (int(df['stock_id'].max()) + 1, len(concepts))
+    matrix = sp.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=shape)  # 重复项自动累加
+    return ConceptMatrix(matrix, concepts.astype(object))
+
+
+def save_concept_matrix(cm: ConceptMatrix, source_hash: str):
+    """行以股票代码保存，加载时再映射为 stock_id，避免依赖主表的具体编号"""
+    codes = get_stock_index().to_numpy(dtype=object)[:cm.matrix.shape[0]]
+    np.savez_compressed(
+        CONCEPT_MATRIX_PATH,
+        data=cm.matrix.data, indices=cm.matrix.indices, indptr=cm.matrix.indptr,
+        shape=np.array(cm.matrix.shape), concepts=cm.concepts.astype(str),
+        codes=codes.astype(str), source_hash=np.array(source_hash)
+    )
+
+
+def _load_saved(source_hash: str):
+    """读取已保存的矩阵；与当前 所属概念.csv 不匹配时返回 None"""
+    if not CONCEPT_MATRIX_PATH.exists():
+        return None
+    with np.load(CONCEPT_MATRIX_PATH) as z:
+        if str(z['source_hash']) != source_hash:
+            return None
+        saved = sp.csr_matrix((z['data'], z['indices'], z['indptr']), shape=tuple(z['shape']))
+        concepts, codes = z['concepts'].astype(object), z['codes'].astype(object)
+
+    # 保存时的行号 -> 当前主表 stock_id（通常为恒等映射）
+    ids = assign_stock_ids(pd.Series(codes))
+    if np.array_equal(ids, np.arange(len(ids))):
+        return ConceptMatrix(saved, concepts)
+    rows = np.nonzero(ids >= 0)[0]
+    perm = sp.csr_matrix((np.ones(len(rows)), (ids[rows], rows)), shape=(int(ids.max(initial=-1)) + 1, saved.shape[0]))
+    return ConceptMatrix((perm @ saved).tocsr(), concepts)
+
+
+def build_concept_matrix() -> ConceptMatrix:
+    """由 所属概念.csv 重建矩阵并写盘（update_concepts_daily 调用）"""
+    cm = _build_from_csv()
+    save_concept_matrix(cm, _source_hash())
+    print(f"✅ 题材矩阵: {cm.matrix.shape[0]} 只 × {cm.matrix.shape[1]} 个题材, 非零 {cm.matrix.nnz}")
+    return cm
+
+
+def load_concept_matrix() -> ConceptMatrix:
+    """加载题材矩阵，按 所属概念.csv 的 (mtime, 大小) 在进程内缓存；文件内容变化时自动重建"""
+    stat = CONCEPT_PATH.stat() if CONCEPT_PATH.exists() else None
+    key = (stat.st_mtime, stat.st_size) if stat else None
+    with _LOCK:
+        if _STATE['matrix'] is not None and _STATE['key'] == key:
+            return _STATE['matrix']
+
+        source_hash = _source_hash()
+        cm = None
+        try:
+            cm = _load_saved(source_hash)
+        except Exception as e:
+            print(f"⚠️ 读取题材矩阵失败，将重新构建: {e}")
+        if cm is None:
+            cm = _build_from_csv()
+            try:
+                save_concept_matrix(cm, source_hash)
+            except Exception as e:
+                print(f"⚠️ 题材矩阵写盘失败，仅在内存中生效: {e}")
+
+        _STATE['key'], _STATE['matrix'] = key, cm
+        return cm
+
+
+if __name__ == "__main__":
+    # 手动重建：python -m modules.concept_matrix
+    build_concept_matrix()
@@ -5,15 +5,27 @@ import os
 # 使用相对路径，确保在 GitHub Actions 和 Streamlit Cloud 都能运行
 BASE_DIR = Path(__file__).parent.parent
 DATA_DIR = BASE_DIR / 'data' / 'raw'
+TICK_DIR = BASE_DIR / 'data' / 'ticks'  # 集合竞价逐笔 (流式采集模式)
 METADATA_DIR = BASE_DIR / 'metadata'
 CONCEPT_PATH = METADATA_DIR / '所属概念.csv'
 CALENDAR_PATH = METADATA_DIR / '交易日历.csv'
 SAVE_DIR = BASE_DIR / 'analysis_results'
+STOCK_LIST_PATH = BASE_DIR / '代码.csv'
+UNIVERSE_PATH = METADATA_DIR / '股票池.json'  # 行情抓取用股票池（已加 sh/sz/bj 前缀，带版本号）
+STOCK_MASTER_PATH = METADATA_DIR / '股票主表.csv'  # 股票代码 -> 整数 ID（只追加，不重排）
+CONCEPT_MATRIX_PATH = METADATA_DIR / '概念矩阵.npz'  # 股票 × 题材 稀疏关联矩阵，由 所属概念.csv 生成
+ZT_REASON_STORE_PATH = METADATA_DIR / '涨停原因明细.csv'  # 近 30 个涨停文件拆分后的 (日期, 代码, 原因)，供增量聚合
+CONCEPT_META_PATH = METADATA_DIR / '概念元数据.csv'  # 每只股票最新已知的 概念/行业 及其来源日期，按日增量更新
+CONCEPT_CHANGELOG_PATH = METADATA_DIR / '概念变更记录.csv'  # 概念/行业 变化流水 (日期, 代码, 字段, 旧值, 新值)
 
 # 在 config.py 中补充
 MARKET_REPORT_DIR = SAVE_DIR / 'market_daily'  # 专门存放市场分析结果
 MARKET_REPORT_DIR.mkdir(parents=True, exist_ok=True) # 自动创建
 
+PROFILE_DIR = SAVE_DIR / 'profile'  # 命令行脚本的耗时埋点 JSON
+AUCTION_BUNDLE_DIR = SAVE_DIR / 'auction_bundle'  # 每日竞价分析结果包（main.py 抓取后预生成）
+AUCTION_REPORT_DIR = SAVE_DIR / 'auction_report'  # 批量生成的 竞价分析_YYYYMMDD.md / .json
+
 # 趋势表的文件路径
 SENTIMENT_TREND_PATH = MARKET_REPORT_DIR / 'daily_sentiment_trend.csv'
 
@@ -1,8 +1,16 @@
+import threading
+import numpy as np
 import pandas as pd
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime,timedelta
-from typing import Optional, Tuple
-from .config import CALENDAR_PATH, DATA_DIR, CONCEPT_PATH
-from .utils import safe_read_csv, clean_dataframe,standardize_code
+from typing import Optional, Tuple, List, Dict
+from .config import DATA_DIR, CONCEPT_PATH
+from .utils import safe_read_csv, clean_dataframe,standardize_codes
+from .stock_master import assign_stock_ids, get_stock_index
+from .profiler import stage
+from .trade_calendar import get_trade_calendar
 
 # 1. 自动判断服务器时区并转换
 def get_beijing_now():
@@ -11,62 +19,33 @@ def get_beijing_now():
     return datetime.now(timezone.utc).astimezone(timezone(timedelta(hours=8)))
 
 def get_trade_dates(count: int = 10) -> list:
-    """获取最近的 N 个交易日序列"""
-    if not CALENDAR_PATH.exists():
-        print(f"❌ 交易日历文件不存在：{CALENDAR_PATH}")
+    """获取最近的 N 个交易日序列（日历在进程内只解析一次，见 trade_calendar）"""
+    calendar = get_trade_calendar()
+    if not len(calendar):
         return []
 
-    df = safe_read_csv(CALENDAR_PATH)
-    if df.empty:
-        return []
-        
-    # 处理编码和列名
-    date_col = next((c for c in df.columns if 'date' in c.lower()), df.columns[0])
-    if date_col.startswith('\ufeff'):
-        df.columns = [c[1:] if c.startswith('\ufeff') else c for c in df.columns]
-        date_col = date_col[1:]
-
-    df[date_col] = pd.to_datetime(df[date_col], errors='coerce')
-    df = df.dropna(subset=[date_col]).sort_values(date_col)
-    
-    # 时间判定逻辑
-    '''
-    now = datetime.now()
-    # 早上 9:00 前取昨天作为参考起点
-    if now.hour < 9:
-        reference_today = (now - timedelta(days=1)).date()
-    else:
-        reference_today = now.date()
-
-    from datetime import datetime, timedelta
-    '''
-
-
+    # 时间判定逻辑：北京时间早上 9:00 前取昨天作为参考起点
     now_bj = get_beijing_now()
-    
-    # 后面的逻辑就稳了
     if now_bj.hour < 9:
         reference_today = (now_bj - timedelta(days=1)).date()
     else:
         reference_today = now_bj.date()
 
-    # 在日历中寻找小于等于参考日期的记录
-    valid = df[df[date_col].dt.date <= reference_today]
-    if valid.empty:
-        return []
+    # 在日历中取小于等于参考日期的最后 count 个交易日
+    return calendar.recent(count, until=reference_today)
 
-    # 获取最后 count 个交易日日期
-    # 注意：为了后续计算“对比昨日”指标，通常建议多取 1 天（即取 11 天）
-    # 这里严格按照要求取最近 10 个有效交易日
-    result_dates = valid.iloc[-count:][date_col].dt.date.tolist()
-    
-    return result_dates
+
+def _market_csv_path(trade_date: datetime, data_type: str):
+    return DATA_DIR / f"{trade_date.strftime('%Y-%m-%d')}_{data_type}.csv"
+
+
+def _market_snapshot_path(trade_date: datetime, data_type: str):
+    """列式快照与原始 CSV 同目录同名，仅扩展名为 .parquet"""
+    return DATA_DIR / f"{trade_date.strftime('%Y-%m-%d')}_{data_type}.parquet"
 
 
-def read_market_data(trade_date: datetime, data_type: str) -> pd.DataFrame:
-    """读取并统一市场数据格式，自动识别竞价或收盘"""
-    file_path = DATA_DIR / f"{trade_date.strftime('%Y-%m-%d')}_{data_type}.csv"
-    df = safe_read_csv(file_path)
+def _normalize_market_data(df: pd.DataFrame, data_type: str) -> pd.DataFrame:
+    """将原始行情表统一为分析用格式（列名、代码、价格/金额/涨跌幅数值化）"""
     if df.empty:
         return df
 
@@ -103,6 +82,166 @@ def read_market_data(trade_date: datetime, data_type: str) -> pd.DataFrame:
     return df
 
 
+def _read_market_snapshot(path) -> pd.DataFrame:
+    """读取完整的列式快照；列投影在 read_market_data 的缓存之后进行，缓存里始终是整表"""
+    return pd.read_parquet(path)
+
+
+def build_market_snapshot(trade_date: datetime, data_type: str) -> bool:
+    """
+    由原始 CSV 生成列式快照（已清洗、已数值化）。
+    采集脚本保存 CSV 后调用一次，之后 read_market_data 直接读取快照，无需重复解析。
+    """
+    csv_path = _market_csv_path(trade_date, data_type)
+    df = _normalize_market_data(safe_read_csv(csv_path), data_type)
+    if df.empty:
+        return False
+    try:
+        df.to_parquet(_market_snapshot_path(trade_date, data_type), index=False)
+        return True
+    except Exception as e:
+        print(f"⚠️ 写入列式快照失败 {csv_path.name}: {e}")
+        return False
+
+
+def _load_market_data(csv_path, snap_path, data_type: str) -> pd.DataFrame:
+    """从磁盘加载完整的单日数据：优先快照，回退 CSV；附加整数 stock_id 列"""
+    df = None
+    # 快照必须不早于 CSV，避免 CSV 被重新下载后读到旧数据
+    if snap_path.exists() and (not csv_path.exists() or snap_path.stat().st_mtime >= csv_path.stat().st_mtime):
+        try:
+            df = _read_market_snapshot(snap_path)
+        except Exception as e:
+            print(f"⚠️ 读取列式快照失败，回退 CSV：{snap_path.name} ({e})")
+
+    if df is None:
+        df = _normalize_market_data(safe_read_csv(csv_path), data_type)
+    if '股票代码' in df.columns:
+        df['stock_id'] = assign_stock_ids(df['股票代码'])
+    return df
+
+
+# ==================== 进程内快照缓存 ====================
+# 键为 (日期, 数据类型, 源文件 mtime)，文件被重新写入后自动失效；按 LRU 淘汰
+MARKET_CACHE_SIZE = 64
+MARKET_CACHE_STATS = {'hits': 0, 'misses': 0}
+_MARKET_CACHE = OrderedDict()
+_MARKET_CACHE_LOCK = threading.Lock()
+
+
+def get_market_cache_stats() -> dict:
+    """返回快照缓存的命中统计"""
+    with _MARKET_CACHE_LOCK:
+        return {**MARKET_CACHE_STATS, 'size': len(_MARKET_CACHE), 'max_size': MARKET_CACHE_SIZE}
+
+
+def clear_market_cache():
+    """清空快照缓存（统计数据保留）"""
+    with _MARKET_CACHE_LOCK:
+        _MARKET_CACHE.clear()
+
+
+def read_market_data(trade_date: datetime, data_type: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """读取并统一市场数据格式，自动识别竞价或收盘
+
+    优先读取列式快照（.parquet），快照缺失、过期或不可读时回退到 CSV。
+    同一进程内相同 (日期, 类型) 只解析一次：缓存中的 DataFrame 不对外暴露，
+    每次返回独立副本，调用方可以随意修改。
+    columns 不为空时只返回其中存在的列。
+    """
+    with stage('read_market_data') as rec:
+        csv_path = _market_csv_path(trade_date, data_type)
+        snap_path = _market_snapshot_path(trade_date, data_type)
+        mtimes = tuple(p.stat().st_mtime if p.exists() else None for p in (csv_path, snap_path))
+        if mtimes == (None, None):
+            return pd.DataFrame()
+
+        key = (trade_date.strftime('%Y-%m-%d'), data_type, mtimes)
+        with _MARKET_CACHE_LOCK:
+            df = _MARKET_CACHE.get(key)
+            if df is not None:
+                _MARKET_CACHE.move_to_end(key)
+                MARKET_CACHE_STATS['hits'] += 1
+        rec['缓存'] = '命中' if df is not None else '未命中'
+
+        if df is None:
+            df = _load_market_data(csv_path, snap_path, data_type)
+            with _MARKET_CACHE_LOCK:
+                MARKET_CACHE_STATS['misses'] += 1
+                _MARKET_CACHE[key] = df
+                _MARKET_CACHE.move_to_end(key)
+                while len(_MARKET_CACHE) > MARKET_CACHE_SIZE:
+                    _MARKET_CACHE.popitem(last=False)
+
+        rec['行数'] = len(df)
+        if columns is not None and not df.empty:
+            return df[[c for c in columns if c in df.columns]].copy()
+        return df.copy()
+
+
+@dataclass
+class MarketPanel:
+    """多日行情面板：每个数值列都是 (日期数 × 股票数) 的 float 数组，缺失为 NaN"""
+    dates: list
+    codes: np.ndarray                      # 稳定的股票索引：codes[stock_id] 为对应股票代码
+    values: Dict[str, np.ndarray] = field(default_factory=dict)
+    available: np.ndarray = None           # 每个日期是否成功读到数据
+
+    def __getitem__(self, col: str) -> np.ndarray:
+        return self.values[col]
+
+    def to_frame(self, col: str) -> pd.DataFrame:
+        """以 日期 × 股票代码 的 DataFrame 形式返回某一列"""
+        return pd.DataFrame(self.values[col], index=self.dates, columns=self.codes)
+
+
+def load_panel(dates: list, data_type: str, columns: List[str], max_workers: int = 8) -> MarketPanel:
+    """
+    并行读取多日数据并按股票主表 (stock_id) 对齐成稠密面板，第 j 列即 stock_id == j 的股票，
+    多日指标可直接对 panel[col] 做 axis=0/1 的向量化归约，不必逐日循环。
+    """
+    dates = list(dates)
+
+    def load(d):
+        return read_market_data(d, data_type, columns=['stock_id'] + list(columns))
+
+    if dates:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(dates)))) as executor:
+            frames = list(executor.map(load, dates))
+    else:
+        frames = []
+
+    # 读取过程中可能登记了新股票，主表索引在加载完成后再取
+    codes = get_stock_index().to_numpy(dtype=object)
+    values = {col: np.full((len(dates), len(codes)), np.nan) for col in columns}
+    available = np.zeros(len(dates), dtype=bool)
+    for i, f in enumerate(frames):
+        if f.empty or 'stock_id' not in f.columns:
+            continue
+        available[i] = True
+        f = f[f['stock_id'] >= 0].drop_duplicates('stock_id')
+        pos = f['stock_id'].to_numpy()
+        for col in columns:
+            if col in f.columns:
+                values[col][i, pos] = pd.to_numeric(f[col], errors='coerce').to_numpy(dtype=float)
+
+    return MarketPanel(dates=dates, codes=codes, values=values, available=available)
+
+
+def rebuild_market_snapshots() -> int:
+    """为 data/raw 下所有行情 CSV 补建列式快照，返回生成数量"""
+    count = 0
+    for csv_path in sorted(DATA_DIR.glob('*_*.csv')):
+        date_str, data_type = csv_path.stem.split('_', 1)
+        try:
+            trade_date = datetime.strptime(date_str, '%Y-%m-%d')
+        except ValueError:
+            continue
+        if build_market_snapshot(trade_date, data_type):
+            count += 1
+    return count
+
+
 
 
 
@@ -114,5 +253,12 @@ def load_concept_data() -> pd.DataFrame:
     if df.empty:
         return pd.DataFrame()
     df['code'] = df['code'].astype(str).str.zfill(6)
-    df['code'] = df['code'].apply(standardize_code)
-    return df[['code', '所属概念', '所属行业','历史涨停原因类别']].drop_duplicates()
+    df['code'] = standardize_codes(df['code'])
+    df = df[['code', '所属概念', '所属行业','历史涨停原因类别']].drop_duplicates()
+    df['stock_id'] = assign_stock_ids(df['code'])
+    return df
+
+
+if __name__ == "__main__":
+    # 历史数据补建快照：python -m modules.data_loader
+    print(f"✅ 已生成 {rebuild_market_snapshots()} 个列式快照")
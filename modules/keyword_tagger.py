@@ -0,0 +1,104 @@
+# modules/keyword_tagger.py
+"""
+多关键词标签匹配：把整组关键词编译成一条字典树正则，一次扫描找出文本中出现的全部关键词。
+整列打标签时优先走 股票×题材 矩阵：每个题材名称只匹配一次（结果缓存），
+再用稀疏矩阵乘法汇总到每只股票，耗时取决于命中数而不是关键词数量。
+"""
+import re
+from functools import lru_cache
+from typing import Iterable, List
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+
+def _trie_regex(words: List[str]) -> str:
+    """把关键词组织成字典树并转成正则，同一位置上总是匹配最长的关键词"""
+    trie = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[''] = {}  # 词尾标记
+
+    def build(node) -> str:
+        is_end = '' in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if is_end:
+            # 已是完整关键词时后续分支可选（贪婪匹配保证优先取更长的词）
+            body = body + '?' if len(branches) == 1 and len(body) == 1 else '(?:' + body + ')?'
+        return body
+
+    return build(trie)
+
+
+class KeywordTagger:
+    """编译后的关键词匹配器，输出按关键词列表原顺序排列"""
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = list(dict.fromkeys(k for k in keywords if k))
+        self._rank = {k: i for i, k in enumerate(self.keywords)}
+        # 零宽前瞻 + 捕获组：在每个起点都尝试匹配，重叠出现的关键词也不会漏掉
+        self._pattern = re.compile('(?=(' + _trie_regex(self.keywords) + '))') if self.keywords else None
+        # 同一起点上更短的关键词一定是最长匹配的前缀，预先展开
+        self._prefixes = {k: [p for p in self.keywords if k.startswith(p)] for k in self.keywords}
+        self._token_cache = {}  # 题材名称 -> 命中关键词序号
+
+    def match(self, text: str) -> List[str]:
+        if self._pattern is None or not text:
+            return []
+        found = set()
+        for m in self._pattern.findall(text):
+            found.update(self._prefixes.get(m, ()))
+        return sorted(found, key=self._rank.__getitem__)
+
+    def tag(self, texts: pd.Series, sep: str) -> pd.Series:
+        """整列打标签：相同文本只匹配一次，返回用 sep 连接的命中关键词（无命中为空串）"""
+        codes, uniques = pd.factorize(texts.fillna('').astype(str))
+        labels = np.array([sep.join(self.match(t)) for t in uniques] + [''], dtype=object)
+        return pd.Series(labels[codes], index=texts.index)
+
+    def crosses(self, separators: str) -> bool:
+        """关键词本身是否包含分隔符（此时不能按题材名称逐个匹配）"""
+        return any(ch in k for k in self.keywords for ch in separators)
+
+    def token_hits(self, tokens) -> sp.csr_matrix:
+        """题材名称 × 关键词 的 0/1 命中矩阵"""
+        rows, cols = [], []
+        for i, token in enumerate(tokens):
+            hit = self._token_cache.get(token)
+            if hit is None:
+                hit = self._token_cache[token] = [self._rank[k] for k in self.match(str(token))]
+            rows.extend([i] * len(hit))
+            cols.extend(hit)
+        return sp.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(len(tokens), len(self.keywords)))
+
+    def tag_incidence(self, incidence: sp.spmatrix, tokens, sep: str) -> np.ndarray:
+        """
+        按 行×题材 关联矩阵打标签：等价于对每行的题材名称逐个做子串匹配，
+        前提是关键词不跨越题材之间的分隔符（见 crosses）。
+        """
+        hits = sp.csr_matrix(incidence @ self.token_hits(tokens))
+        hits.eliminate_zeros()
+        hits.sort_indices()  # 行内按关键词列表顺序
+        labels = np.full(incidence.shape[0], '', dtype=object)
+        indptr, indices, joined = hits.indptr, hits.indices, {}
+        for i in np.nonzero(np.diff(indptr))[0]:
+            key = indices[indptr[i]:indptr[i + 1]].tobytes()  # 命中组合通常很少，按组合复用字符串
+            if key not in joined:
+                joined[key] = sep.join(self.keywords[j] for j in indices[indptr[i]:indptr[i + 1]])
+            labels[i] = joined[key]
+        return labels
+
+
+@lru_cache(maxsize=16)
+def _cached_tagger(keywords: tuple) -> KeywordTagger:
+    return KeywordTagger(keywords)
+
+
+def get_keyword_tagger(keywords: Iterable[str]) -> KeywordTagger:
+    """按关键词组缓存编译结果"""
+    return _cached_tagger(tuple(keywords))
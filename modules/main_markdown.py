@@ -1,17 +1,11 @@
 import streamlit as st
-import io
-import contextlib
-import pandas as pd
 from datetime import datetime
 from modules.config import SAVE_DIR
 from modules.data_loader import get_trade_dates
-from modules.analyzer import (
-    analyze_auction_flow, calculate_hot_concepts, calculate_auto_concepts, build_zt_tags
-)
-from modules.reporter import (
-    report_overview, report_top_stocks, report_sector_flow, report_top_amount_stocks,
-    report_hot_concepts, report_auto_concepts, report_zt_stocks
-)
+from modules.trade_calendar import get_trade_calendar
+from modules.profiler import profiled
+from modules.auction_bundle import compute_auction_analysis, load_auction_bundle
+from modules.reporter import Report, ReportTable
 def highlight_6_2(row):
     # 1. 定义 6.2 的五个核心条件判定
     c1 = row['家数'] > 10
@@ -44,53 +38,61 @@ def highlight_6_2(row):
 #@st.cache_data
 
 # --- 第一部分：只负责数据计算 (保留缓存) ---
-@st.cache_data
+class _NoAuctionData(Exception):
+    """竞价数据尚未就绪：以异常跳出缓存函数，避免把 None 缓存下来"""
+
+
+# cache_resource 不做拷贝：同一日期始终是同一个 Report 对象，各格式渲染一次后即留在对象上
+# ttl 让盘中重新生成的结果包在 1 小时内生效；“同步最新数据”会立即清空
+@profiled(cache=st.cache_resource(ttl=3600, max_entries=30))
+def _load_auction_analysis(today_date, prev_date):
+    data = load_auction_bundle(today_date, prev_date)
+    if data is None:
+        data = compute_auction_analysis(today_date, prev_date)
+    if data is None:
+        raise _NoAuctionData
+    return data
+
 def get_auction_analysis_data(today_date, prev_date):
     """
-    这个函数只跑逻辑，不涉及任何 st.xxx 组件
+    这个函数只跑逻辑，不涉及任何 st.xxx 组件，返回结果视为只读。
+    优先读取 main.py 抓取后预生成的结果包，缺失或过期时才现场计算；数据缺失返回 None（不缓存）
     """
-    # 1. 执行核心分析逻辑
-    result = analyze_auction_flow(today_date, prev_date)
-    if result is None:
+    try:
+        return _load_auction_analysis(today_date, prev_date)
+    except _NoAuctionData:
         return None
 
-    df, overview = result
-    
-    # 提前构建涨停/热点标签并合并
-    df_zt = build_zt_tags(today_date, prev_date)
-    if not df_zt.empty and '热点标签' in df_zt.columns:
-        tag_slice = df_zt[['股票代码', '热点标签']].drop_duplicates('股票代码')
-        df = pd.merge(df, tag_slice, on='股票代码', how='left')
-        df['热点标签'] = df['热点标签'].fillna('')
-    else:
-        df['热点标签'] = ''
-
-    # 2. 计算其他题材数据
-    total_abs = df['增量(亿)'].abs().sum()
-    hot_concept_stats = calculate_hot_concepts(df)
-    auto_concept_df = calculate_auto_concepts(df)
-
-    # 3. 捕获 Markdown 输出
-    output_buffer = io.StringIO()
-    with contextlib.redirect_stdout(output_buffer):
-        report_overview(today_date, prev_date, overview)
-        report_top_amount_stocks(df, top_n=12)
-        report_top_stocks(df)
-        report_sector_flow(df, total_abs)
-        report_hot_concepts(hot_concept_stats)
-        report_auto_concepts(auto_concept_df, top_n=10)
-        report_zt_stocks(today_date, prev_date, df_zt)
-    
-    report_md_content = output_buffer.getvalue()
-
-    # 返回所有计算好的结果
-    return {
-        "df": df,
-        "hot_stats": hot_concept_stats,
-        "auto_df": auto_concept_df,
-        "md_report": report_md_content,
-        "df_zt": df_zt
-    }
+get_auction_analysis_data.clear = _load_auction_analysis.clear
+
+def render_report(report: Report):
+    """按章节原生渲染报告：文字走 st.markdown，表格直接用 st.dataframe，不经过 Markdown 字符串"""
+    st.markdown(f"# {report.title}")
+    if report.subtitle:
+        st.markdown(f"> {report.subtitle}")
+    for sec in report.sections:
+        st.markdown(f"{'#' * sec.level} {sec.title}")
+        for block in sec.blocks:
+            if isinstance(block, ReportTable):
+                if block.df.empty and block.title:
+                    continue
+                if block.title:
+                    st.markdown(f"**{block.title}**" + (f"  \n*{block.subtitle}*" if block.subtitle else ""))
+                if block.df.columns.duplicated().any():
+                    # 情绪指标表左右并排、列名重复，Arrow 不支持，按 Markdown 表格显示
+                    st.markdown(block.df.to_markdown(index=False))
+                else:
+                    st.dataframe(block.df, use_container_width=True, hide_index=True)
+            elif block.strip():
+                st.markdown(block)
+
+
+REPORT_DOWNLOADS = {
+    'Markdown': ('markdown', 'md', 'text/markdown'),
+    'HTML': ('html', 'html', 'text/html'),
+    'JSON': ('json', 'json', 'application/json'),
+}
+
 
 # --- 第二部分：只负责界面渲染 (去掉缓存装饰器) ---
 def render_auction_report_tab(selected_date=None, prev_date=None):
@@ -110,11 +112,7 @@ def render_auction_report_tab(selected_date=None, prev_date=None):
     else:
         today_date = selected_date
         if prev_date is None:
-            try:
-                idx = date_list.index(today_date)
-                prev_date = date_list[idx-1]
-            except:
-                prev_date = date_list[-2]
+            prev_date = get_trade_calendar().prev(today_date) or date_list[-2]
 
     st.info(f"📅 当前分析：{today_date.strftime('%Y-%m-%d')} (对比日：{prev_date.strftime('%Y-%m-%d')})")
 
@@ -147,15 +145,18 @@ def render_auction_report_tab(selected_date=None, prev_date=None):
 
         st.divider()
         st.subheader("📝 完整报告正文")
+        report = data["report"]
         with st.container(border=True):
-            st.markdown(data["md_report"])
+            render_report(report)
 
-        # ✅ 现在 download_button 在非缓存函数中，不会再报错
+        # ✅ 现在 download_button 在非缓存函数中，不会再报错；只序列化选中的格式
+        fmt_label = st.radio("下载格式", list(REPORT_DOWNLOADS), horizontal=True)
+        fmt, ext, mime = REPORT_DOWNLOADS[fmt_label]
         st.download_button(
-            label="📥 下载报告 (.md)",
-            data=data["md_report"],
-            file_name=f"竞价分析_{today_date.strftime('%Y%m%d')}.md",
-            mime="text/markdown"
+            label=f"📥 下载报告 (.{ext})",
+            data=report.render(fmt),
+            file_name=f"竞价分析_{today_date.strftime('%Y%m%d')}.{ext}",
+            mime=mime
         )
 # 保持兼容性
 if __name__ == "__main__":
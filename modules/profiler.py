@@ -0,0 +1,160 @@
+# modules/profiler.py
+"""
+轻量耗时埋点：按阶段记录耗时、处理行数与缓存命中，写入进程内环形缓冲区。
+  with stage('读取行情') as rec: ...; rec['行数'] = len(df)
+  @profiled() / @profiled(cache=st.cache_data)  —— 后者替代直接使用 @st.cache_data，可区分缓存命中
+看板 "⏱️ 性能" 页读取 profile_summary() / profile_frame()，命令行脚本结束时 dump_profile() 写出 JSON。
+"""
+import json
+import time
+import datetime
+import functools
+import threading
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Optional
+import pandas as pd
+from .config import PROFILE_DIR
+
+PROFILE_BUFFER_SIZE = 2000
+_RECORDS = deque(maxlen=PROFILE_BUFFER_SIZE)
+_LOCK = threading.Lock()
+_LOCAL = threading.local()  # 每个线程的阶段栈，以及被包装的缓存函数是否真正执行
+
+
+def _stack():
+    if not hasattr(_LOCAL, 'stack'):
+        _LOCAL.stack = []
+    return _LOCAL.stack
+
+
+def _count_rows(result) -> Optional[int]:
+    """从常见返回值推断处理行数：DataFrame、(DataFrame, ...)、{'df': DataFrame}"""
+    if isinstance(result, tuple) and result:
+        result = result[0]
+    elif isinstance(result, dict) and isinstance(result.get('df'), pd.DataFrame):
+        result = result['df']
+    if isinstance(result, (pd.DataFrame, pd.Series)):
+        return len(result)
+    return None
+
+
+@contextmanager
+def stage(name: str, rows: Optional[int] = None):
+    """记录一个阶段；可在 with 块内给 rec['行数'] / rec['缓存'] 赋值，嵌套阶段会记下上级阶段"""
+    stack = _stack()
+    rec = {
+        '时间': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        '阶段': name,
+        '上级': stack[-1]['阶段'] if stack else '',
+        '耗时ms': 0.0,
+        '行数': rows,
+        '缓存': '',
+        '线程': threading.current_thread().name,
+    }
+    stack.append(rec)
+    t0 = time.perf_counter()
+    try:
+        yield rec
+    finally:
+        rec['耗时ms'] = round((time.perf_counter() - t0) * 1000, 3)
+        stack.pop()
+        with _LOCK:
+            _RECORDS.append(rec)
+
+
+def profiled(name: Optional[str] = None, cache: Optional[Callable] = None):
+    """
+    函数级埋点装饰器，行数由返回值推断。
+    cache 传入缓存装饰器（如 st.cache_data）时在其外层计时：内层函数未执行即记为缓存命中；
+    返回的函数保留 .clear()。
+    """
+    def decorator(func):
+        label = name or func.__name__
+        target = func
+        if cache is not None:
+            @functools.wraps(func)
+            def compute(*args, **kwargs):
+                _LOCAL.computed = True  # 只有缓存未命中才会执行到这里
+                return func(*args, **kwargs)
+            target = cache(compute)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(label) as rec:
+                outer = getattr(_LOCAL, 'computed', False)
+                _LOCAL.computed = False
+                try:
+                    result = target(*args, **kwargs)
+                    if cache is not None:
+                        rec['缓存'] = '未命中' if _LOCAL.computed else '命中'
+                finally:
+                    _LOCAL.computed = outer
+                rec['行数'] = _count_rows(result)
+            return result
+
+        if hasattr(target, 'clear'):
+            wrapper.clear = target.clear
+        return wrapper
+    return decorator
+
+
+def get_profile_records(limit: Optional[int] = None) -> list:
+    """最近的埋点记录（旧 -> 新）"""
+    with _LOCK:
+        records = list(_RECORDS)
+    return records[-limit:] if limit else records
+
+
+def clear_profile():
+    with _LOCK:
+        _RECORDS.clear()
+
+
+def profile_frame(limit: Optional[int] = None) -> pd.DataFrame:
+    return pd.DataFrame(get_profile_records(limit),
+                        columns=['时间', '阶段', '上级', '耗时ms', '行数', '缓存', '线程'])
+
+
+def profile_summary() -> pd.DataFrame:
+    """按阶段汇总：次数、总/平均/P95/最大耗时、平均行数、缓存命中率"""
+    df = profile_frame()
+    if df.empty:
+        return pd.DataFrame()
+    df['命中'] = df['缓存'].eq('命中')
+    df['有缓存'] = df['缓存'].ne('')
+    g = df.groupby('阶段', sort=False)
+    summary = pd.DataFrame({
+        '次数': g.size(),
+        '总耗时ms': g['耗时ms'].sum().round(1),
+        '平均ms': g['耗时ms'].mean().round(1),
+        'P95ms': g['耗时ms'].quantile(0.95).round(1),
+        '最大ms': g['耗时ms'].max().round(1),
+        '平均行数': pd.to_numeric(df['行数'], errors='coerce').groupby(df['阶段'], sort=False).mean().round(0),
+        '缓存命中率%': (g['命中'].sum() / g['有缓存'].sum().replace(0, float('nan')) * 100).round(1),
+    })
+    return summary.sort_values('总耗时ms', ascending=False).reset_index()
+
+
+def dump_profile(tag: str, path: Optional[Path] = None) -> Optional[Path]:
+    """把汇总与明细写成 JSON（默认 analysis_results/profile/{tag}.json，每次覆盖为最近一次运行）"""
+    path = Path(path) if path else PROFILE_DIR / f"{tag}.json"
+    summary = profile_summary()
+    if not summary.empty:
+        print(summary.to_markdown(index=False))
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            'tag': tag,
+            'generated_at': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'summary': json.loads(summary.to_json(orient='records', force_ascii=False)),
+            'records': get_profile_records(),
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False, indent=1, default=str)
+        print(f"⏱️ 性能记录已写出: {path}")
+        return path
+    except Exception as e:
+        print(f"⚠️ 性能记录写出失败: {e}")
+        return None
@@ -0,0 +1,103 @@
+# modules/quote_fetcher.py
+"""
+分片并发行情抓取：沿用 easyquotation 的分片规则与解析器，
+各分片由 asyncio 并发调度、单独重试（指数退避），共用一个带连接池的 requests.Session，
+并记录每个分片的耗时。一个慢分片或失败分片不再拖累整批。
+
+接口地址可替换（api 参数），便于指向本地回放服务做测试：
+    python benchmarks/qq_standin.py  → http://127.0.0.1:8765/q=
+"""
+import asyncio
+import time
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import Dict, List, Optional
+
+
+class ShardedQuoteFetcher:
+    def __init__(self, quotation, api: Optional[str] = None, shard_size: Optional[int] = None,
+                 concurrency: int = 64, retries: int = 3, backoff: float = 0.5, timeout: float = 5.0):
+        """
+        quotation: easyquotation.use('qq') 返回的对象（提供分片与解析）
+        shard_size: 每片股票数，默认沿用接口上限 quotation.max_num
+        """
+        self.quotation = quotation
+        self.api = api or quotation.stock_api
+        self.shard_size = shard_size or quotation.max_num
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        # 专用线程池，避免默认执行器的线程数限制实际并发
+        self.executor = ThreadPoolExecutor(max_workers=concurrency)
+        self.headers = quotation._get_headers() if hasattr(quotation, '_get_headers') else {}
+        self.last_stats: List[Dict] = []
+
+    def _shards(self, codes: List[str]) -> List[str]:
+        # 预构建股票池已带前缀（见 modules/universe.py），直接分片
+        prefixed = codes if codes and codes[0][:2] in ('sh', 'sz', 'bj') else self.quotation._gen_stock_prefix(codes)
+        return [",".join(prefixed[i:i + self.shard_size]) for i in range(0, len(prefixed), self.shard_size)]
+
+    def _get(self, params: str) -> str:
+        r = self.session.get(self.api + params, headers=self.headers, timeout=self.timeout)
+        r.raise_for_status()
+        return r.text
+
+    async def _fetch_shard(self, idx: int, params: str, sem: asyncio.Semaphore) -> Optional[str]:
+        loop = asyncio.get_running_loop()
+        stat = {'分片': idx, '股票数': params.count(',') + 1, '尝试次数': 0, '耗时ms': 0.0, '成功': False, '错误': ''}
+        async with sem:
+            t0 = time.perf_counter()
+            for attempt in range(1, self.retries + 1):
+                stat['尝试次数'] = attempt
+                try:
+                    text = await loop.run_in_executor(self.executor, self._get, params)
+                    stat['成功'] = True
+                    break
+                except Exception as e:
+                    text, stat['错误'] = None, str(e)[:80]
+                    if attempt < self.retries:
+                        await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+            stat['耗时ms'] = round((time.perf_counter() - t0) * 1000, 1)
+        self.last_stats.append(stat)
+        return text
+
+    async def fetch_async(self, codes: List[str], prefix: bool = False) -> dict:
+        shards = self._shards(codes)
+        self.last_stats = []
+        sem = asyncio.Semaphore(self.concurrency)
+        texts = await asyncio.gather(*(self._fetch_shard(i, p, sem) for i, p in enumerate(shards)))
+        self.last_stats.sort(key=lambda s: s['分片'])
+        return self.quotation.format_response_data([t for t in texts if t], prefix=prefix)
+
+    def fetch(self, codes: List[str], prefix: bool = False) -> dict:
+        """同步入口，返回值与 quotation.stocks(codes, prefix) 相同"""
+        return asyncio.run(self.fetch_async(codes, prefix=prefix))
+
+    def warm(self, codes: List[str]):
+        """预热：并发发出若干单只请求，提前建立连接池里的 keep-alive 连接"""
+        sample = self._shards(codes[:self.concurrency])[0].split(',') if codes else []
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(*(loop.run_in_executor(self.executor, self._get, c) for c in sample),
+                                 return_exceptions=True)
+
+        asyncio.run(run())
+
+    def report(self) -> str:
+        """单行耗时汇总：分片数、失败数、P50/最大耗时及最慢分片"""
+        if not self.last_stats:
+            return "无分片记录"
+        lat = sorted(s['耗时ms'] for s in self.last_stats)
+        failed = [s['分片'] for s in self.last_stats if not s['成功']]
+        retried = sum(1 for s in self.last_stats if s['尝试次数'] > 1)
+        slowest = max(self.last_stats, key=lambda s: s['耗时ms'])
+        msg = (f"📶 分片 {len(lat)} 个 | P50 {lat[len(lat) // 2]:.0f}ms | 最大 {lat[-1]:.0f}ms (第{slowest['分片']}片)"
+               f" | 重试 {retried} 片 | 失败 {len(failed)} 片")
+        return msg + (f" {failed}" if failed else "")
@@ -1,29 +1,198 @@
+"""
+竞价报告对象模型：报告由若干章节组成，章节内按顺序放文字段落与表格（DataFrame），并附带关键指标。
+report_* 只负责组装章节，不再 print；Markdown / HTML / JSON 在真正需要时才渲染，
+同一个 Report 对象上每种格式只渲染一次。
+"""
+import re
+import html
+import json
 import pandas as pd
 from datetime import datetime
-from .utils import print_md_table
+from dataclasses import dataclass, field
+from typing import Optional, Union
 
-def report_overview(today_date: datetime, prev_date: datetime, overview: dict):
-    """输出市场概览报告 (定制增强版)"""
-    print(f"# 📊 A股竞价资金流向监控报告 ({today_date.strftime('%Y-%m-%d')})")
-    print(f"\n> 对比交易日：{prev_date.strftime('%Y-%m-%d')} | 数据来源：本地行情导出")
-    
+
+@dataclass
+class ReportTable:
+    """章节内的一张表；title 为空时直接输出表格（不带小标题）"""
+    df: pd.DataFrame
+    title: str = ''
+    subtitle: str = ''
+
+
+@dataclass
+class ReportSection:
+    """报告章节：level 为标题级别，blocks 为按顺序排列的段落文字 (str) 与表格"""
+    title: str
+    level: int = 2
+    blocks: list = field(default_factory=list)
+    metrics: dict = field(default_factory=dict)
+
+    def text(self, line: str):
+        self.blocks.append(line)
+        return self
+
+    def table(self, df: pd.DataFrame, title: str = '', subtitle: str = ''):
+        self.blocks.append(ReportTable(df, title, subtitle))
+        return self
+
+    def tables(self) -> list:
+        return [b for b in self.blocks if isinstance(b, ReportTable)]
+
+
+def _rows(df: pd.DataFrame) -> list:
+    """按行输出值列表（情绪指标表有重名列，不能用 records），NaN 转 null"""
+    return json.loads(df.to_json(orient='values', force_ascii=False)) if not df.empty else []
+
+
+def _md_lines(block: Union[str, ReportTable]) -> list:
+    """与原先逐行 print 的输出一致：带标题的表格前加 ### 小标题与斜体说明，空表不输出"""
+    if isinstance(block, str):
+        return [block]
+    if not block.title:
+        return [block.df.to_markdown(index=False)]
+    if block.df.empty:
+        return []
+    lines = [f"\n### {block.title}"]
+    if block.subtitle:
+        lines.append(f"*{block.subtitle}*")
+    return lines + [block.df.to_markdown(index=False), "\n"]
+
+
+def _text_html(text: str) -> str:
+    """段落里用到的少量 Markdown（标题 / 引用 / 加粗）转成 HTML"""
+    text = text.strip()
+    if not text:
+        return ''
+    body = re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', html.escape(text.lstrip('#> ').strip()))
+    heading = re.match(r'^(#{1,6}) ', text)
+    if heading:
+        level = len(heading.group(1))
+        return f"<h{level}>{body}</h{level}>"
+    if text.startswith('>'):
+        return f"<blockquote>{body}</blockquote>"
+    return f"<p>{body}</p>"
+
+
+class Report:
+    """一份报告：标题、副标题、章节列表与元信息（日期、概览数据等）"""
+
+    FORMATS = ('markdown', 'html', 'json')
+
+    def __init__(self, title: str, subtitle: str = '', meta: Optional[dict] = None):
+        self.title = title
+        self.subtitle = subtitle
+        self.meta = meta or {}
+        self.sections = []
+        self._rendered = {}
+
+    def add(self, section: Optional[ReportSection]):
+        """追加章节；None 表示该部分无数据，直接跳过"""
+        if section is not None:
+            self.sections.append(section)
+            self._rendered.clear()
+        return self
+
+    def render(self, fmt: str = 'markdown') -> str:
+        """按格式渲染并缓存结果"""
+        if fmt not in self.FORMATS:
+            raise ValueError(f"不支持的报告格式: {fmt}")
+        if fmt not in self._rendered:
+            self._rendered[fmt] = getattr(self, f"_render_{fmt}")()
+        return self._rendered[fmt]
+
+    def to_markdown(self) -> str:
+        return self.render('markdown')
+
+    def to_html(self) -> str:
+        return self.render('html')
+
+    def to_json(self) -> str:
+        return self.render('json')
+
+    def _render_markdown(self) -> str:
+        lines = [f"# {self.title}"]
+        if self.subtitle:
+            lines.append(f"\n> {self.subtitle}")
+        for sec in self.sections:
+            lines.append(f"\n{'#' * sec.level} {sec.title}")
+            for block in sec.blocks:
+                lines.extend(_md_lines(block))
+        return '\n'.join(lines) + '\n'
+
+    def _render_html(self) -> str:
+        parts = [f"<h1>{html.escape(self.title)}</h1>"]
+        if self.subtitle:
+            parts.append(f"<blockquote>{html.escape(self.subtitle)}</blockquote>")
+        for sec in self.sections:
+            parts.append(f"<h{sec.level}>{html.escape(sec.title)}</h{sec.level}>")
+            for block in sec.blocks:
+                if isinstance(block, str):
+                    parts.append(_text_html(block))
+                elif not block.df.empty or not block.title:
+                    if block.title:
+                        parts.append(f"<h3>{html.escape(block.title)}</h3>")
+                    if block.subtitle:
+                        parts.append(f"<p><em>{html.escape(block.subtitle)}</em></p>")
+                    parts.append(block.df.to_html(index=False, border=0, na_rep=''))
+        body = '\n'.join(p for p in parts if p)
+        return f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>{html.escape(self.title)}</title></head>\n<body>\n{body}\n</body></html>\n"
+
+    def _render_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=1,
+                          default=lambda o: o.item() if hasattr(o, 'item') else str(o))
+
+    def to_dict(self) -> dict:
+        sections = []
+        for sec in self.sections:
+            blocks = []
+            for block in sec.blocks:
+                if isinstance(block, str):
+                    blocks.append({'type': 'text', 'text': block})
+                else:
+                    blocks.append({'type': 'table', 'title': block.title, 'subtitle': block.subtitle,
+                                   'columns': [str(c) for c in block.df.columns], 'rows': _rows(block.df)})
+            sections.append({'title': sec.title, 'level': sec.level, 'metrics': sec.metrics, 'blocks': blocks})
+        return {'title': self.title, 'subtitle': self.subtitle, 'meta': self.meta, 'sections': sections}
+
+    @classmethod
+    def from_dict(cls, payload: dict, markdown: Optional[str] = None) -> 'Report':
+        """由 to_dict 的结果还原；markdown 为当初渲染好的正文时直接作为缓存，保证与原文一致"""
+        report = cls(payload['title'], payload.get('subtitle', ''), payload.get('meta'))
+        for s in payload.get('sections', []):
+            sec = ReportSection(s['title'], s.get('level', 2), metrics=s.get('metrics', {}))
+            for b in s.get('blocks', []):
+                if b['type'] == 'text':
+                    sec.text(b['text'])
+                else:
+                    df = pd.DataFrame(b['rows'], columns=b['columns'])
+                    sec.table(df.where(df.notna(), float('nan')), b['title'], b['subtitle'])
+            report.add(sec)
+        if markdown is not None:
+            report._rendered['markdown'] = markdown
+        return report
+
+
+def report_overview(overview: dict) -> list:
+    """市场概览 (定制增强版)：核心资金面 + 市场情绪指标 两个章节"""
     m_now = overview['metrics_now']
     m_old = overview['metrics_old']
 
     # 1. 核心资金面
-    print("\n## 1. 核心资金面")
     data = [
         ["今日竞价总额", f"{overview['total_today']:.2f} 亿", f"{m_now['sh_main_amt']:.2f} 亿", f"{m_now['cyb_amt']:.2f} 亿"],
         ["昨日竞价总额", f"{overview['total_yest']:.2f} 亿", f"{m_old['sh_main_amt']:.2f} 亿", f"{m_old['cyb_amt']:.2f} 亿"],
-        ["资金净增减", f"{overview['net_change']:+.2f} 亿 ({overview['ratio']:.2%})", 
-         f"{m_now['sh_main_amt'] - m_old['sh_main_amt']:+.2f} 亿", 
+        ["资金净增减", f"{overview['net_change']:+.2f} 亿 ({overview['ratio']:.2%})",
+         f"{m_now['sh_main_amt'] - m_old['sh_main_amt']:+.2f} 亿",
          f"{m_now['cyb_amt'] - m_old['cyb_amt']:+.2f} 亿"]
     ]
-    print(pd.DataFrame(data, columns=["指标", "全市场", "上海市场", "创业板"]).to_markdown(index=False))
+    money = ReportSection("1. 核心资金面", metrics={
+        '今日竞价总额(亿)': overview['total_today'], '昨日竞价总额(亿)': overview['total_yest'],
+        '资金净增减(亿)': overview['net_change'], '增减比例': overview['ratio'],
+    })
+    money.table(pd.DataFrame(data, columns=["指标", "全市场", "上海市场", "创业板"]))
 
     # 2. 市场情绪指标 (左右并排布局)
-    print("\n## 2. 市场情绪指标")
-    
     # 计算涨跌比 (上涨家数 : 下跌家数)
     ratio_now = f"{(m_now['up_count'] / (m_now['down_count'] or 1)):.2f}"
     ratio_old = f"{(m_old['up_count'] / (m_old['down_count'] or 1)):.2f}"
@@ -33,35 +202,38 @@ def report_overview(today_date: datetime, prev_date: datetime, overview: dict):
         ["竞价极弱(<-7%)", m_now['weak'], m_old['weak'], "竞价跌停", m_now['limit_down'], m_old['limit_down']],
         ["竞价涨停", m_now['limit_up'], m_old['limit_up'], "竞价20cm涨停", m_now['limit_up_20cm'], m_old['limit_up_20cm']]
     ]
-    
+    emotion = ReportSection("2. 市场情绪指标", metrics={
+        k: m_now[k] for k in ('strong', 'weak', 'limit_up', 'limit_down', 'limit_up_20cm', 'up_count', 'down_count')
+    })
     headers = ["指标", "今日", "昨日", "指标", "今日", "昨日"]
-    print(pd.DataFrame(emo_data, columns=headers).to_markdown(index=False))
+    emotion.table(pd.DataFrame(emo_data, columns=headers))
+    return [money, emotion]
 
 
-def report_top_amount_stocks(df: pd.DataFrame, top_n: int = 12):
-    """输出成交额前N名的个股报告"""
-    print(f"\n## 7. 竞价成交额 Top {top_n}")
+def report_top_amount_stocks(df: pd.DataFrame, top_n: int = 12) -> ReportSection:
+    """成交额前N名的个股"""
     top_amt = df.nlargest(top_n, '竞价金额_今').copy()
     top_amt['竞价金额(亿)'] = (top_amt['竞价金额_今'] / 1e8).round(4)
     cols = ['股票简称', '涨跌幅', '竞价金额(亿)', '增量(亿)', '结构标签', '热点标签']
-    print_md_table(top_amt[cols], f"7.1 竞价成交额前 {top_n} 名", "全市场竞价吸金最强的个股")
+    return ReportSection(f"7. 竞价成交额 Top {top_n}").table(
+        top_amt[cols], f"7.1 竞价成交额前 {top_n} 名", "全市场竞价吸金最强的个股")
 
 
-def report_top_stocks(df: pd.DataFrame):
-    """输出个股异动报告"""
-    print("\n## 3. 个股竞价异动穿透")
+def report_top_stocks(df: pd.DataFrame) -> ReportSection:
+    """个股异动"""
+    sec = ReportSection("3. 个股竞价异动穿透")
     top_inc = df.nlargest(10, '增量(亿)')
-    print_md_table(top_inc[['股票简称', '涨跌幅', '增量(亿)', '结构标签', '热点标签']], 
-                   "3.1 竞价增量 Top 10", "资金流入最显著的个股")
+    sec.table(top_inc[['股票简称', '涨跌幅', '增量(亿)', '结构标签', '热点标签']],
+              "3.1 竞价增量 Top 10", "资金流入最显著的个股")
     top_dec = df.nsmallest(10, '增量(亿)')
-    print_md_table(top_dec[['股票简称', '涨跌幅', '增量(亿)', '结构标签', '热点标签']], 
-                   "3.2 竞价减量 Top 10", "资金流出最显著的个股")
+    sec.table(top_dec[['股票简称', '涨跌幅', '增量(亿)', '结构标签', '热点标签']],
+              "3.2 竞价减量 Top 10", "资金流出最显著的个股")
+    return sec
 
 
-def report_sector_flow(df: pd.DataFrame, total_abs: float):
-    """输出行业流向报告"""
-    if '所属行业' not in df.columns: return
-    print("\n## 4. 行业资金分布")
+def report_sector_flow(df: pd.DataFrame, total_abs: float) -> Optional[ReportSection]:
+    """行业流向"""
+    if '所属行业' not in df.columns: return None
     sector_grp = df.groupby('所属行业').agg(
         增量_亿=('增量(亿)', 'sum'),
         平均涨幅=('涨跌幅', 'mean'),
@@ -69,67 +241,72 @@ def report_sector_flow(df: pd.DataFrame, total_abs: float):
     ).reset_index()
     sector_grp['占比%'] = (sector_grp['增量_亿'].abs() / total_abs * 100).round(2)
     top_sectors = sector_grp.sort_values('增量_亿', ascending=False).head(10)
-    print_md_table(top_sectors, "4.1 行业增量榜", "资金流入前十行业")
+    return ReportSection("4. 行业资金分布").table(top_sectors, "4.1 行业增量榜", "资金流入前十行业")
 
 
-def report_hot_concepts(stats: list):
-    """输出热门概念报告"""
-    if not stats: return
-    print("\n## 5. 重点题材穿透")
+def report_hot_concepts(stats: list) -> Optional[ReportSection]:
+    """热门概念"""
+    if not stats: return None
+    sec = ReportSection("5. 重点题材穿透")
     stats_df = pd.DataFrame(stats).sort_values('强度得分', ascending=False)
-    print_md_table(stats_df[['热门概念', '个股数', '红盘率%', '平均涨跌%', '增量(亿)', '强度得分', '增量先锋', '先锋标签']].head(15),
-                   "5.1 热门题材动能监控", "核心动能榜")
-    print_md_table(stats_df[['热门概念', '关键异动']].head(20),
-                   "5.2 题材异动个股穿透", "板块内部活跃结构明细")
+    sec.table(stats_df[['热门概念', '个股数', '红盘率%', '平均涨跌%', '增量(亿)', '强度得分', '增量先锋', '先锋标签']].head(15),
+              "5.1 热门题材动能监控", "核心动能榜")
+    sec.table(stats_df[['热门概念', '关键异动']].head(20),
+              "5.2 题材异动个股穿透", "板块内部活跃结构明细")
+    return sec
 
 
-def report_auto_concepts(final_df: pd.DataFrame, top_n: int = 10):
-    """输出题材共振雷达报告"""
-    if final_df.empty: return
-    print("\n## 6. 🚀 题材资金共振雷达")
+def report_auto_concepts(final_df: pd.DataFrame, top_n: int = 10) -> Optional[ReportSection]:
+    """题材共振雷达"""
+    if final_df.empty: return None
+    sec = ReportSection("6. 🚀 题材资金共振雷达")
     display_df = final_df.head(top_n)
     cols = ['题材名称', '家数', '红盘率%', '平均涨跌%', '资金增量(亿)', '状态', '增量先锋']
-    print_md_table(display_df[cols], "6.1 题材资金共振雷达 (Top 10)", "综合增量、合力程度及领涨个股性质")
+    sec.table(display_df[cols], "6.1 题材资金共振雷达 (Top 10)", "综合增量、合力程度及领涨个股性质")
 
-    print("\n### 6.2 强势或主流方向可能的概念题材扩散方向")
+    sec.text("\n### 6.2 强势或主流方向可能的概念题材扩散方向")
     filter_cond = (
-        (final_df['家数'] > 10) & 
-        (final_df['红盘率%'] > 75) & 
-        (final_df['平均涨跌%'] > 1.2) & 
-        (final_df['资金增量(亿)'] > 1) & 
+        (final_df['家数'] > 10) &
+        (final_df['红盘率%'] > 75) &
+        (final_df['平均涨跌%'] > 1.2) &
+        (final_df['资金增量(亿)'] > 1) &
         (final_df['增量先锋'].str.contains('突发放量', na=False))
     )
     strong_concepts = final_df[filter_cond].copy()
+    sec.metrics['强势题材数'] = len(strong_concepts)
 
     if strong_concepts.empty:
-        print("暂无满足「家数>10、红盘率>75%、平均涨跌>1.2%、资金增量>1亿、增量先锋含突发放量」的强势题材")
+        sec.text("暂无满足「家数>10、红盘率>75%、平均涨跌>1.2%、资金增量>1亿、增量先锋含突发放量」的强势题材")
     else:
         strong_concepts_sorted = strong_concepts.sort_values('资金增量(亿)', ascending=False)
         output_cols = ['题材名称', '家数', '红盘率%', '平均涨跌%', '资金增量(亿)', '状态', '增量先锋']
-        print_md_table(strong_concepts_sorted[output_cols], "强势题材扩散候选池", "满足高活跃度+资金增量+突发放量的主流方向，具备题材扩散潜力")
-        
+        sec.table(strong_concepts_sorted[output_cols], "强势题材扩散候选池", "满足高活跃度+资金增量+突发放量的主流方向，具备题材扩散潜力")
+
         top_3_concepts = strong_concepts_sorted['题材名称'].head(3).tolist()
-        print(f"\n#### 扩散方向分析：")
-        print(f"1. 核心扩散主线：{', '.join(top_3_concepts) if top_3_concepts else '无'}（资金增量领先+高红盘率+放量领涨）；")
-        print(f"2. 扩散逻辑：这类题材具备「资金充足+板块共识+放量突破」特征，后续可能向细分赛道/上下游题材扩散；")
-        print(f"3. 关注要点：优先跟踪增量先锋中「突发放量」个股的持续性，以及题材内补涨标的机会。")
-        print(f"**4. 板块强势股的低吸，前两日异动竞价个股的承接。//抑或是新题材发力抢夺资金（平量缩量市场）**")
+        sec.text(f"\n#### 扩散方向分析：")
+        sec.text(f"1. 核心扩散主线：{', '.join(top_3_concepts) if top_3_concepts else '无'}（资金增量领先+高红盘率+放量领涨）；")
+        sec.text(f"2. 扩散逻辑：这类题材具备「资金充足+板块共识+放量突破」特征，后续可能向细分赛道/上下游题材扩散；")
+        sec.text(f"3. 关注要点：优先跟踪增量先锋中「突发放量」个股的持续性，以及题材内补涨标的机会。")
+        sec.text(f"**4. 板块强势股的低吸，前两日异动竞价个股的承接。//抑或是新题材发力抢夺资金（平量缩量市场）**")
+    return sec
 
 
-def report_zt_stocks(today_date: datetime, prev_date: datetime, df_zt: pd.DataFrame) -> None:
-    """ 输出报告 """
-    print(f"\n# 🎯 竞价涨停/强单分析 ({today_date.strftime('%Y-%m-%d')})")
-    
+def report_zt_stocks(today_date: datetime, df_zt: pd.DataFrame) -> ReportSection:
+    """竞价涨停/强单"""
+    sec = ReportSection(f"🎯 竞价涨停/强单分析 ({today_date.strftime('%Y-%m-%d')})", level=1)
+
     # 1. 统计
     zt_count = len(df_zt)
     cm20_count = len(df_zt[df_zt['涨跌幅'] > 19]) if '涨跌幅' in df_zt.columns else 0
-    
-    print(f"\n**今日竞价封死总数**: {zt_count} 只 (其中 20CM: {cm20_count} 只)")
-    
+    sec.metrics.update({'竞价封死总数': zt_count, '20CM': cm20_count})
+
+    sec.text(f"\n**今日竞价封死总数**: {zt_count} 只 (其中 20CM: {cm20_count} 只)")
+
     if '封单额(亿)' in df_zt.columns:
         pos = len(df_zt[df_zt['封单额(亿)'] > 0])
         neg = len(df_zt[df_zt['封单额(亿)'] < 0])
-        print(f"**封单分布**: 买盘净封死 {pos} 只 | 卖盘强压 {neg} 只")
+        sec.metrics.update({'买盘净封死': pos, '卖盘强压': neg})
+        sec.text(f"**封单分布**: 买盘净封死 {pos} 只 | 卖盘强压 {neg} 只")
 
     # 2. 详情表
     df_display = df_zt.copy()
@@ -139,5 +316,23 @@ def report_zt_stocks(today_date: datetime, prev_date: datetime, df_zt: pd.DataFr
 
     show_cols = ['股票简称', '涨跌幅', '封单(亿)', '所属行业', '流通市值(亿)', '历史涨停原因类别']
     final_show = [c for c in show_cols if c in df_display.columns]
-    
-    print_md_table(df_display[final_show], "竞价涨停列表 (按封单额降序)")
\ No newline at end of file
+
+    sec.table(df_display[final_show], "竞价涨停列表 (按封单额降序)")
+    return sec
+
+
+def build_auction_report(today_date: datetime, prev_date: datetime, overview: dict, df: pd.DataFrame,
+                         hot_stats: list, auto_df: pd.DataFrame, df_zt: pd.DataFrame) -> Report:
+    """按固定顺序组装完整的竞价资金流向报告"""
+    report = Report(f"📊 A股竞价资金流向监控报告 ({today_date.strftime('%Y-%m-%d')})",
+                    f"对比交易日：{prev_date.strftime('%Y-%m-%d')} | 数据来源：本地行情导出",
+                    meta={'today': today_date.strftime('%Y-%m-%d'), 'prev': prev_date.strftime('%Y-%m-%d')})
+    for sec in report_overview(overview):
+        report.add(sec)
+    report.add(report_top_amount_stocks(df, top_n=12))
+    report.add(report_top_stocks(df))
+    report.add(report_sector_flow(df, df['增量(亿)'].abs().sum()))
+    report.add(report_hot_concepts(hot_stats))
+    report.add(report_auto_concepts(auto_df, top_n=10))
+    report.add(report_zt_stocks(today_date, df_zt))
+    return report
@@ -0,0 +1,70 @@
+# modules/scheduler.py
+"""
+定点触发：把北京时间目标时刻换算成 time.monotonic() 截止点，
+先粗睡到截止前的预热时刻执行预热（名单、连接池），再精确睡到截止点触发，并记录触发抖动。
+单调时钟不受系统对时跳变影响，也不再每秒轮询一次墙上时间。
+"""
+import time
+import datetime
+from typing import Callable, Optional
+
+BEIJING_TZ = datetime.timezone(datetime.timedelta(hours=8))
+SPIN_SECONDS = 0.005  # 最后几毫秒改为自旋，避免 sleep 的唤醒误差
+
+
+def beijing_now() -> datetime.datetime:
+    return datetime.datetime.now(BEIJING_TZ)
+
+
+def monotonic_deadline(hour: int, minute: int, second: int, now: Optional[datetime.datetime] = None) -> float:
+    """北京时间当天 hh:mm:ss 对应的 monotonic 截止点（已过则为当前时刻）"""
+    now = now or beijing_now()
+    target = now.replace(hour=hour, minute=minute, second=second, microsecond=0)
+    return time.monotonic() + max(0.0, (target - now).total_seconds())
+
+
+def sleep_until(deadline: float, log_every: float = 0.0):
+    """睡到 monotonic 截止点；log_every > 0 时按该间隔打印剩余时间"""
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= SPIN_SECONDS:
+            break
+        step = remaining - SPIN_SECONDS
+        if log_every:
+            print(f"⏳ 等待中... 当前北京时间: {beijing_now().strftime('%H:%M:%S')}，距离对时点还差 {remaining:.1f} 秒")
+            step = min(step, log_every)
+        time.sleep(step)
+    while time.monotonic() < deadline:
+        pass
+
+
+class TargetTimeScheduler:
+    """在北京时间 hh:mm:ss 精确触发，截止前 prewarm_lead 秒执行预热"""
+
+    def __init__(self, hour: int, minute: int, second: int, prewarm_lead: float = 60.0):
+        self.label = f"{hour:02d}:{minute:02d}:{second:02d}"
+        self.deadline = monotonic_deadline(hour, minute, second)
+        self.prewarm_lead = prewarm_lead
+        self.stats = {}
+
+    def wait(self, prewarm: Optional[Callable[[], None]] = None) -> dict:
+        print(f"🚀 精准对时，目标北京时间: {self.label}，剩余 {self.deadline - time.monotonic():.1f} 秒")
+        if prewarm is not None:
+            sleep_until(self.deadline - self.prewarm_lead, log_every=30)
+            t0 = time.monotonic()
+            try:
+                prewarm()
+            except Exception as e:
+                print(f"⚠️ 预热失败，继续等待触发: {e}")
+            self.stats['预热耗时s'] = round(time.monotonic() - t0, 3)
+            print(f"🔥 预热完成，耗时 {self.stats['预热耗时s']}s，距离触发 {self.deadline - time.monotonic():.1f} 秒")
+
+        sleep_until(self.deadline, log_every=30)
+        fired = time.monotonic()
+        self.stats['触发抖动ms'] = round((fired - self.deadline) * 1000, 3)
+        print(f"⏰ 触发 ({beijing_now().strftime('%H:%M:%S.%f')[:-3]})，抖动 {self.stats['触发抖动ms']}ms")
+        return self.stats
+
+    def elapsed_ms(self) -> float:
+        """距目标时刻已过去的毫秒数，用于记录抓取完成相对触发点的延迟"""
+        return round((time.monotonic() - self.deadline) * 1000, 1)
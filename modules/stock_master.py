@@ -0,0 +1,141 @@
+# modules/stock_master.py
+"""
+股票主表：为每个标准化股票代码 (sh/sz/bj + 6位) 分配紧凑的整数 stock_id。
+ID 只追加不重排，加载后的行情/概念表都带 stock_id 列，
+表之间按 ID 做数组对齐，替代按字符串 '股票代码' 的哈希 merge。
+磁盘上的主表只由 build_stock_master 写入；读数时遇到的新代码只在本进程内编号，
+因此 stock_id 不能跨进程传递或落盘（需要持久化时保存股票代码）。
+"""
+import os
+import threading
+import numpy as np
+import pandas as pd
+from typing import Iterable, List
+from .config import STOCK_MASTER_PATH, STOCK_LIST_PATH, CONCEPT_PATH
+from .utils import safe_read_csv, standardize_codes
+
+_LOCK = threading.RLock()
+# 进程内主表缓存：master 为磁盘上的主表，overlay 为本进程读数时遇到的新代码（只在内存中编号）。
+# 磁盘 mtime 变化时重新加载；但 overlay 非空时不再重载，避免新写入的 ID 与本进程已发出的 overlay ID 冲突。
+_STATE = {'mtime': None, 'master': None, 'overlay': [], 'index': None, 'register': True}
+
+
+def _file_mtime():
+    return STOCK_MASTER_PATH.stat().st_mtime if STOCK_MASTER_PATH.exists() else None
+
+
+def _read_master() -> pd.DataFrame:
+    df = safe_read_csv(STOCK_MASTER_PATH)
+    if df.empty:
+        return pd.DataFrame({'stock_id': pd.Series(dtype='int64'), '股票代码': pd.Series(dtype=object)})
+    df['stock_id'] = df['stock_id'].astype('int64')
+    return df.sort_values('stock_id').reset_index(drop=True)[['stock_id', '股票代码']]
+
+
+def _rebuild_index():
+    _STATE['index'] = pd.Index(list(_STATE['master']['股票代码']) + _STATE['overlay'])
+
+
+def _set_master(master: pd.DataFrame):
+    _STATE['master'] = master
+    _STATE['overlay'] = []
+    _STATE['mtime'] = _file_mtime()
+    _rebuild_index()
+
+
+def _load_master() -> pd.DataFrame:
+    with _LOCK:
+        if _STATE['master'] is None or (not _STATE['overlay'] and _STATE['mtime'] != _file_mtime()):
+            _set_master(_read_master())
+        return _STATE['master']
+
+
+def _register_codes(codes: Iterable[str]):
+    """把主表中尚不存在的代码按字典序登记到本进程的 overlay（紧接主表末尾编号，不写磁盘）"""
+    with _LOCK:
+        _load_master()
+        known = set(_STATE['index'])
+        new_codes = sorted({c for c in codes if c and c not in known})
+        if new_codes:
+            _STATE['overlay'].extend(new_codes)
+            _rebuild_index()
+
+
+def set_id_registration(enabled: bool):
+    """关闭后未知代码一律映射为 -1（用作进程池 initializer：只做统计、不需要 ID 的工作进程）"""
+    _STATE['register'] = enabled
+
+
+def build_stock_master() -> pd.DataFrame:
+    """
+    由 代码.csv 与 所属概念.csv 补全股票主表并写回磁盘，返回完整主表。
+    这是主表唯一的写入方（update_concepts_daily.py 调用），读数路径只登记到进程内 overlay。
+    """
+    codes: List[str] = []
+    for path, cols in [(STOCK_LIST_PATH, ['code']), (CONCEPT_PATH, ['股票代码', 'code'])]:
+        df = safe_read_csv(path)
+        col = next((c for c in cols if c in df.columns), None)
+        if col:
+            codes.extend(standardize_codes(df[col].astype(str).str.zfill(6)).tolist())
+
+    with _LOCK:
+        # overlay 中已发出的 ID 原样落盘，新代码接在其后，已有 ID 保持不变
+        _register_codes(codes)
+        master = pd.DataFrame({'stock_id': np.arange(len(_STATE['index']), dtype='int64'),
+                               '股票代码': _STATE['index'].to_numpy(dtype=object)})
+        if len(master) != len(_STATE['master']) or not STOCK_MASTER_PATH.exists():
+            try:
+                STOCK_MASTER_PATH.parent.mkdir(parents=True, exist_ok=True)
+                # 临时文件 + 替换：读取方不会看到半截文件
+                tmp = STOCK_MASTER_PATH.with_name(f"{STOCK_MASTER_PATH.name}.{os.getpid()}.tmp")
+                master.to_csv(tmp, index=False, encoding='utf-8-sig')
+                os.replace(tmp, STOCK_MASTER_PATH)
+                _set_master(master)
+            except Exception as e:
+                print(f"⚠️ 股票主表写回失败，仅在内存中生效: {e}")
+    print(f"✅ 股票主表: {len(master)} 只")
+    return master
+
+
+def get_stock_index() -> pd.Index:
+    """返回 代码 -> 位置(即 stock_id) 的索引（含本进程 overlay）"""
+    with _LOCK:
+        _load_master()
+        return _STATE['index']
+
+
+def assign_stock_ids(codes: pd.Series) -> np.ndarray:
+    """把标准化代码列映射为 stock_id；新代码登记到进程内 overlay（关闭登记时为 -1），空代码返回 -1"""
+    ids = get_stock_index().get_indexer(codes)
+    unknown = (ids < 0) & (codes.to_numpy() != '')
+    if unknown.any() and _STATE['register']:
+        _register_codes(codes[unknown].tolist())
+        ids = get_stock_index().get_indexer(codes)
+    return ids.astype('int64')
+
+
+def align_by_id(target_ids, source: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+    """
+    按 stock_id 把 source 的若干列对齐到 target_ids（等价于以 ID 为键的 left join，且不改变行序）。
+    source 中同一 ID 出现多次时取第一行；匹配不到的位置为 NaN。
+    """
+    index = target_ids.index if isinstance(target_ids, pd.Series) else None
+    target_ids = np.asarray(target_ids, dtype='int64')
+    src_ids = source['stock_id'].to_numpy(dtype='int64')
+    size = int(max(target_ids.max(initial=-1), src_ids.max(initial=-1))) + 1
+
+    # pos[stock_id] = source 中的行号；倒序写入保证重复 ID 取第一行
+    pos = np.full(size, -1, dtype='int64')
+    valid = src_ids >= 0
+    rows = np.nonzero(valid)[0]
+    pos[src_ids[valid][::-1]] = rows[::-1]
+
+    take = np.where(target_ids >= 0, pos[np.clip(target_ids, 0, None)] if size else -1, -1)
+    aligned = source[columns].reset_index(drop=True).reindex(take)
+    # target_ids 为 Series 时沿用其索引，结果可直接 df.join
+    return aligned.set_axis(index if index is not None else pd.RangeIndex(len(take)))
+
+
+if __name__ == "__main__":
+    # 手动重建：python -m modules.stock_master
+    build_stock_master()
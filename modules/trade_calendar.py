@@ -0,0 +1,97 @@
+# modules/trade_calendar.py
+"""
+交易日历：交易日历.csv 每个进程只解析一次，得到有序的交易日数组。
+prev / next / nearest / range / recent 均用 bisect 定位，日期到下标的映射为字典查找。
+所有模块与脚本共用 get_trade_calendar()，文件 mtime 变化时自动重新加载。
+"""
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime
+from typing import Iterator, List, Optional
+import pandas as pd
+from .config import CALENDAR_PATH
+from .utils import safe_read_csv
+
+_LOCK = threading.Lock()
+_STATE = {'key': None, 'calendar': None}
+
+
+def _to_date(d) -> date:
+    """统一成 datetime.date：支持 date / datetime / Timestamp / 'YYYY-MM-DD'"""
+    if isinstance(d, datetime):
+        return d.date()
+    if isinstance(d, date):
+        return d
+    return pd.Timestamp(d).date()
+
+
+class TradeCalendar:
+    """有序交易日序列；查询参数可以是任意日期（不要求本身是交易日），返回值均为 datetime.date"""
+
+    def __init__(self, dates):
+        self.dates: List[date] = sorted({_to_date(d) for d in dates})
+        self._pos = {d: i for i, d in enumerate(self.dates)}
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __iter__(self) -> Iterator[date]:
+        return iter(self.dates)
+
+    def __contains__(self, d) -> bool:
+        return _to_date(d) in self._pos
+
+    def index(self, d) -> Optional[int]:
+        """交易日在日历中的下标，非交易日返回 None"""
+        return self._pos.get(_to_date(d))
+
+    def prev(self, d, n: int = 1) -> Optional[date]:
+        """d 之前（不含 d）的第 n 个交易日"""
+        i = bisect_left(self.dates, _to_date(d)) - n
+        return self.dates[i] if 0 <= i < len(self.dates) else None
+
+    def next(self, d, n: int = 1) -> Optional[date]:
+        """d 之后（不含 d）的第 n 个交易日"""
+        i = bisect_right(self.dates, _to_date(d)) + n - 1
+        return self.dates[i] if 0 <= i < len(self.dates) else None
+
+    def nearest(self, d, side: str = 'before') -> Optional[date]:
+        """离 d 最近的交易日：side='before' 取 <= d 的最后一个，'after' 取 >= d 的第一个"""
+        d = _to_date(d)
+        if d in self._pos:
+            return d
+        return self.prev(d) if side == 'before' else self.next(d)
+
+    def range(self, start=None, end=None) -> List[date]:
+        """闭区间 [start, end] 内的交易日，端点为 None 表示不限"""
+        lo = bisect_left(self.dates, _to_date(start)) if start is not None else 0
+        hi = bisect_right(self.dates, _to_date(end)) if end is not None else len(self.dates)
+        return self.dates[lo:hi]
+
+    def recent(self, count: int, until=None) -> List[date]:
+        """截至 until（含）的最近 count 个交易日，升序"""
+        hi = bisect_right(self.dates, _to_date(until)) if until is not None else len(self.dates)
+        return self.dates[max(0, hi - count):hi]
+
+
+def _read_calendar() -> TradeCalendar:
+    df = safe_read_csv(CALENDAR_PATH)
+    if df.empty:
+        return TradeCalendar([])
+    # 处理编码和列名
+    df.columns = [c[1:] if c.startswith('\ufeff') else c for c in df.columns]
+    date_col = next((c for c in df.columns if 'date' in c.lower()), df.columns[0])
+    return TradeCalendar(pd.to_datetime(df[date_col], errors='coerce').dropna().dt.date)
+
+
+def get_trade_calendar() -> TradeCalendar:
+    """进程内共享的交易日历（按文件 mtime 失效）"""
+    mtime = CALENDAR_PATH.stat().st_mtime if CALENDAR_PATH.exists() else None
+    key = (str(CALENDAR_PATH), mtime)
+    with _LOCK:
+        if _STATE['key'] != key:
+            if mtime is None:
+                print(f"❌ 交易日历文件不存在：{CALENDAR_PATH}")
+            _STATE['calendar'] = _read_calendar() if mtime is not None else TradeCalendar([])
+            _STATE['key'] = key
+        return _STATE['calendar']
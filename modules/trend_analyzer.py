@@ -1,11 +1,15 @@
 # modules/trend_analyzer.py
 import pandas as pd
+import numpy as np
 import os
 import streamlit as st
 import plotly.graph_objects as go
-from modules.data_loader import get_trade_dates, read_market_data
-from modules.utils import standardize_code
+from modules.data_loader import read_market_data, load_panel
+from modules.trade_calendar import get_trade_calendar
+from modules.utils import standardize_codes
+from modules.stock_master import align_by_id
 from modules.analyzer import build_structure_tags
+from modules.profiler import profiled
 
 # --- 优化点 4: 使用 nlargest 和向量化计算 ---
 def calculate_top_amount_percentage(df, type_prefix, top_n=15):
@@ -20,7 +24,7 @@ def calculate_top_amount_percentage(df, type_prefix, top_n=15):
     
     # 2. 预先标准化代码 (存入临时列，避免在后续循环中反复调用函数)
     if '股票代码' in df.columns:
-        df['std_code'] = df['股票代码'].apply(standardize_code)
+        df['std_code'] = standardize_codes(df['股票代码'])
     
     # 3. 统一转换为“亿元”单位 (向量化判定)
     max_val = df[amt_col].max()
@@ -44,55 +48,56 @@ def calculate_top_amount_percentage(df, type_prefix, top_n=15):
     top_amount = df_top[amt_col].sum()
     return (top_amount / total_amount) * 100, df_top
 
+def _top_share_and_mask(amounts, top_n=15):
+    """按日计算前N成交额占比(%)与前N成员掩码；无数据的日期占比为 NaN、掩码全 False"""
+    amts = np.nan_to_num(amounts, nan=0.0)
+    totals = amts.sum(axis=1)
+    mask = np.zeros(amts.shape, dtype=bool)
+    k = min(top_n, amts.shape[1])
+    if k:
+        idx = np.argpartition(-amts, k - 1, axis=1)[:, :k]
+        np.put_along_axis(mask, idx, True, axis=1)
+    valid = totals > 0
+    mask &= valid[:, None]
+    top = np.where(mask, amts, 0).sum(axis=1)
+    share = np.full(len(totals), np.nan)
+    share[valid] = top[valid] / totals[valid] * 100
+    return share, mask
+
+
+def _map_streak(std_codes, mask, panel_codes):
+    """按面板股票索引，返回从最近一日往回连续位于 Top 掩码中的天数"""
+    streak = np.cumprod(mask[::-1], axis=0).sum(axis=0)
+    return std_codes.map(pd.Series(streak, index=panel_codes)).fillna(0).astype(int)
+
 # --- 优化点 3: 增加缓存装饰器 ---
-@st.cache_data(ttl=3600) # 缓存1小时，相同日期请求秒回
+@profiled(cache=st.cache_data(ttl=3600)) # 缓存1小时，相同日期请求秒回
 def analyze_and_plot_top_stocks_trend(today_date, num_days=30):
     """生成趋势图数据和今日详情，优化了连续天数的计算逻辑"""
-    all_dates = get_trade_dates(count=60) # 取多一点确保有足够日期回溯
-    recent_dates = [d for d in all_dates if d <= today_date][-num_days:]
-
-    plot_data = []
-    # 存储每日Top15的代码集合，用于极速计算连续天数
-    auc_history_sets = {} 
-    cls_history_sets = {}
-    
-    current_day_auc = pd.DataFrame()
-    current_day_cls = pd.DataFrame()
+    recent_dates = get_trade_calendar().recent(num_days, until=today_date)
 
-    # 1. 遍历日期，收集数据
-    for d in recent_dates:
-        df_auction = read_market_data(d, '竞价行情')
-        df_close = read_market_data(d, '收盘行情')
+    # 1. 多日面板一次性读入 (日期 × 股票)，占比与成员掩码按行向量化计算
+    auc_panel = load_panel(recent_dates, '竞价行情', ['竞价金额'])
+    cls_panel = load_panel(recent_dates, '收盘行情', ['收盘金额'])
+    auc_share, auc_mask = _top_share_and_mask(auc_panel['竞价金额'])
+    cls_share, cls_mask = _top_share_and_mask(cls_panel['收盘金额'])
 
-        auc_p, df_auc_t = calculate_top_amount_percentage(df_auction, "竞价")
-        cls_p, df_cls_t = calculate_top_amount_percentage(df_close, "收盘")
+    plot_data = [
+        {'date': d, 'auc': auc_share[i], 'cls': None if np.isnan(cls_share[i]) else cls_share[i]}
+        for i, d in enumerate(recent_dates) if not np.isnan(auc_share[i])
+    ]
 
-        if auc_p is not None:
-            plot_data.append({'date': d, 'auc': auc_p, 'cls': cls_p})
-            # 记录标准化代码集合
-            auc_history_sets[d] = set(df_auc_t['std_code'])
-            if d == today_date: current_day_auc = df_auc_t
-            
-        if cls_p is not None:
-            cls_history_sets[d] = set(df_cls_t['std_code'])
-            if d == today_date: current_day_cls = df_cls_t
-
-    # 2. 优化连续天数计算 (减少 standardize_code 调用)
-    sorted_dates_desc = sorted(recent_dates, reverse=True)
-
-    def get_streak(std_code, history_dict):
-        streak = 0
-        for d in sorted_dates_desc:
-            if std_code in history_dict.get(d, set()):
-                streak += 1
-            else:
-                break
-        return streak
+    current_day_auc = pd.DataFrame()
+    current_day_cls = pd.DataFrame()
+    if recent_dates and recent_dates[-1] == today_date:
+        _, current_day_auc = calculate_top_amount_percentage(read_market_data(today_date, '竞价行情'), "竞价")
+        _, current_day_cls = calculate_top_amount_percentage(read_market_data(today_date, '收盘行情'), "收盘")
 
+    # 2. 连续天数：从最近一日往回数，连续位于 Top15 的天数
     if not current_day_auc.empty:
-        current_day_auc['连续天数'] = current_day_auc['std_code'].apply(lambda x: get_streak(x, auc_history_sets))
+        current_day_auc['连续天数'] = _map_streak(current_day_auc['std_code'], auc_mask, auc_panel.codes)
     if not current_day_cls.empty:
-        current_day_cls['连续天数'] = current_day_cls['std_code'].apply(lambda x: get_streak(x, cls_history_sets))
+        current_day_cls['连续天数'] = _map_streak(current_day_cls['std_code'], cls_mask, cls_panel.codes)
 
     # 3. 绘图逻辑
     fig = None
@@ -147,19 +152,16 @@ def display_trend_analysis(selected_date):
     
     # 2. 注入结构标签 (仅针对当前页面的 Top15 股票进行 Merge，极快)
     try:
-        all_dates = get_trade_dates(count=40)
-        curr_idx = all_dates.index(selected_date)
-        prev_date = all_dates[curr_idx - 1] if curr_idx > 0 else None
+        prev_date = get_trade_calendar().prev(selected_date)
         
         if prev_date:
             # 这里的 build_structure_tags 建议也加上 @st.cache_data
             tags_df = build_structure_tags(selected_date, prev_date)
             if not tags_df.empty:
-                tags_subset = tags_df[['股票代码', '结构标签']]
                 if not df_auc.empty:
-                    df_auc = df_auc.merge(tags_subset, on='股票代码', how='left').fillna('')
+                    df_auc = df_auc.join(align_by_id(df_auc['stock_id'], tags_df, ['结构标签'])).reset_index(drop=True).fillna('')
                 if not df_cls.empty:
-                    df_cls = df_cls.merge(tags_subset, on='股票代码', how='left').fillna('')
+                    df_cls = df_cls.join(align_by_id(df_cls['stock_id'], tags_df, ['结构标签'])).reset_index(drop=True).fillna('')
     except Exception as e:
         pass
 
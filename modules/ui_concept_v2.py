@@ -2,6 +2,7 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime
 from modules.data_loader import get_trade_dates
+from modules.trade_calendar import get_trade_calendar
 from modules.analyzer import analyze_auction_flow, calculate_auto_concepts
 
 def highlight_6_2(row):
@@ -55,11 +56,7 @@ def render_concept_dashboard(selected_date=None, prev_date=None):
         today_date = selected_date
         # 如果没传 prev_date，从列表中找选中日期的前一个
         if prev_date is None:
-            try:
-                idx = date_list.index(today_date)
-                prev_date = date_list[idx-1]
-            except:
-                prev_date = date_list[-2]
+            prev_date = get_trade_calendar().prev(today_date) or date_list[-2]
 
     # 在界面显示当前锁定的分析日期
     st.info(f"📅 当前分析：{today_date.strftime('%Y-%m-%d')} (对比日：{prev_date.strftime('%Y-%m-%d')})")
@@ -0,0 +1,47 @@
+# modules/ui_performance.py
+import json
+import streamlit as st
+from modules.data_loader import get_market_cache_stats
+from modules.profiler import profile_summary, profile_frame, clear_profile, PROFILE_BUFFER_SIZE
+
+
+def render_performance_page():
+    st.header("⏱️ 性能")
+    st.caption(f"本进程内各分析阶段的耗时记录（环形缓冲，最多保留 {PROFILE_BUFFER_SIZE} 条）")
+
+    # 1. 行情快照缓存
+    cache = get_market_cache_stats()
+    total = cache['hits'] + cache['misses']
+    col1, col2, col3 = st.columns(3)
+    col1.metric("行情缓存命中", cache['hits'], f"{cache['hits'] / total * 100:.0f}%" if total else None)
+    col2.metric("行情缓存未命中", cache['misses'])
+    col3.metric("缓存占用", f"{cache['size']} / {cache['max_size']}")
+
+    # 2. 阶段汇总
+    summary = profile_summary()
+    if summary.empty:
+        st.info("暂无记录，先打开其它页面触发一次分析。")
+        return
+
+    st.subheader("📊 阶段汇总")
+    st.dataframe(summary, use_container_width=True, hide_index=True)
+    st.bar_chart(summary.set_index('阶段')['总耗时ms'].head(15))
+
+    # 3. 最近明细
+    st.subheader("🧾 最近记录")
+    limit = st.slider("显示条数", 20, PROFILE_BUFFER_SIZE, 100, step=20)
+    st.dataframe(profile_frame(limit).iloc[::-1], use_container_width=True, hide_index=True)
+
+    col_a, col_b = st.columns(2)
+    with col_a:
+        st.download_button(
+            "📥 导出 JSON",
+            data=json.dumps({'summary': json.loads(summary.to_json(orient='records', force_ascii=False)),
+                             'records': json.loads(profile_frame().to_json(orient='records', force_ascii=False))},
+                            ensure_ascii=False),
+            file_name="profile.json", mime="application/json", use_container_width=True
+        )
+    with col_b:
+        if st.button("🧹 清空记录", use_container_width=True):
+            clear_profile()
+            st.rerun()
@@ -1,7 +1,8 @@
 # modules/ui_top_stocks.py
 import streamlit as st
+import numpy as np
 import pandas as pd
-from modules.data_loader import read_market_data
+from modules.data_loader import read_market_data, load_panel
 
 def render_top_turnover_page(target_date_obj):
     st.header(f"🏆 成交额活跃榜单 ({target_date_obj.strftime('%Y-%m-%d')})")
@@ -40,12 +41,13 @@ def render_top_turnover_page(target_date_obj):
     from modules.data_loader import get_trade_dates
     dates = get_trade_dates(lookback)
     
-    combined_data = []
-    for d in dates:
-        tmp_df = read_market_data(d, '收盘行情')
-        if not tmp_df.empty:
-            total_amt = tmp_df['收盘金额'].sum() / 1e8
-            combined_data.append({"日期": d.strftime('%Y-%m-%d'), "总成交额(亿)": total_amt})
+    # 多日面板一次读入，按日期求和即为每日总成交额
+    panel = load_panel(dates, '收盘行情', ['收盘金额'])
+    totals = np.nansum(panel['收盘金额'], axis=1) / 1e8
+    combined_data = pd.DataFrame({
+        "日期": [d.strftime('%Y-%m-%d') for d in panel.dates],
+        "总成交额(亿)": totals
+    })[panel.available]
     
-    if combined_data:
-        st.line_chart(pd.DataFrame(combined_data).set_index("日期"))
+    if not combined_data.empty:
+        st.line_chart(combined_data.set_index("日期"))
@@ -0,0 +1,64 @@
+# modules/universe.py
+"""
+预构建的行情股票池：代码已规范为 6 位并按 easyquotation 规则加好 sh/sz/bj 前缀，
+由 update_universe.py 在采集前单独刷新并落盘；main.py 直接读取，9:25 抓取前无需任何预处理。
+内容变化时版本号 +1，未变化时不改写文件。
+"""
+import json
+import hashlib
+import datetime
+from typing import List, Optional
+from .config import UNIVERSE_PATH
+
+_BJ_HEAD = ("43", "83", "87", "92")
+_SH_HEAD = ("5", "6", "7", "9", "110", "113", "118", "132", "204")
+
+
+def quote_prefix(code: str) -> str:
+    """与 easyquotation.helpers.get_stock_type 相同的市场判定（qq 接口要求的前缀）"""
+    if code.startswith(_BJ_HEAD):
+        return "bj"
+    if code.startswith(_SH_HEAD):
+        return "sh"
+    return "sz"
+
+
+def load_universe() -> Optional[dict]:
+    """读取股票池；文件不存在或损坏时返回 None"""
+    if not UNIVERSE_PATH.exists():
+        return None
+    try:
+        with open(UNIVERSE_PATH, encoding='utf-8') as f:
+            universe = json.load(f)
+        return universe if universe.get('prefixed') else None
+    except Exception as e:
+        print(f"⚠️ 股票池读取失败: {e}")
+        return None
+
+
+def save_universe(codes: List[str]) -> dict:
+    """由 6 位代码列表生成股票池；内容有变化才递增版本并写盘"""
+    codes = sorted({c for c in codes if len(c) == 6 and c.isdigit()})
+    digest = hashlib.sha1(",".join(codes).encode()).hexdigest()
+
+    old = load_universe() or {}
+    if old.get('hash') == digest:
+        print(f"✅ 股票池无变化: v{old['version']} ({old['count']} 只)")
+        return old
+
+    universe = {
+        'version': int(old.get('version', 0)) + 1,
+        'built_at': datetime.datetime.now(datetime.timezone(datetime.timedelta(hours=8))).strftime('%Y-%m-%d %H:%M:%S'),
+        'hash': digest,
+        'count': len(codes),
+        'added': sorted(set(codes) - set(old.get('codes', []))) if old else [],
+        'codes': codes,
+        'prefixed': [quote_prefix(c) + c for c in codes],
+    }
+    UNIVERSE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = UNIVERSE_PATH.with_name(UNIVERSE_PATH.name + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(universe, f, ensure_ascii=False)
+    tmp.replace(UNIVERSE_PATH)
+    print(f"✅ 股票池已更新: v{universe['version']} ({universe['count']} 只，新增 {len(universe['added'])} 只)")
+    return universe
@@ -1,4 +1,6 @@
 import sys
+import codecs
+import numpy as np
 import pandas as pd
 from pathlib import Path
 from .config import COLUMN_MAPPING
@@ -23,15 +25,55 @@ class Logger:
         sys.stdout = self.terminal
 
 
+# 编码探测缓存：{路径: (mtime, 编码)}，文件被改写后 mtime 变化自动失效
+_ENCODING_CACHE = {}
+# sniffed: 实际探测次数；cache_hits: 命中缓存次数；fallback_parses: 首选编码解析失败、改用其他编码重读的次数
+ENCODING_STATS = {'sniffed': 0, 'cache_hits': 0, 'fallback_parses': 0}
+_SNIFF_BYTES = 64 * 1024
+
+
+def detect_encoding(file_path: Path) -> str:
+    """根据文件头部字节判断编码（BOM / UTF-8 校验），否则视为 gbk"""
+    key = str(file_path)
+    mtime = file_path.stat().st_mtime
+    cached = _ENCODING_CACHE.get(key)
+    if cached and cached[0] == mtime:
+        ENCODING_STATS['cache_hits'] += 1
+        return cached[1]
+
+    ENCODING_STATS['sniffed'] += 1
+    with open(file_path, 'rb') as f:
+        head = f.read(_SNIFF_BYTES)
+
+    if head.startswith(codecs.BOM_UTF8):
+        encoding = 'utf-8-sig'
+    else:
+        try:
+            head.decode('utf-8')
+            encoding = 'utf-8-sig'
+        except UnicodeDecodeError as e:
+            # 截断处恰好落在多字节字符中间时仍按 UTF-8 处理
+            truncated = len(head) == _SNIFF_BYTES and e.start >= len(head) - 3
+            encoding = 'utf-8-sig' if truncated else 'gbk'
+
+    _ENCODING_CACHE[key] = (mtime, encoding)
+    return encoding
+
+
 def safe_read_csv(file_path: Path) -> pd.DataFrame:
-    """安全读取CSV，支持gbk和utf-8-sig编码"""
+    """安全读取CSV，支持gbk和utf-8-sig编码（先探测编码，失败再回退）"""
     if not file_path.exists():
         return pd.DataFrame()
-    for encoding in ['gbk', 'utf-8-sig']:
+    first = detect_encoding(file_path)
+    for encoding in [first] + [e for e in ['gbk', 'utf-8-sig'] if e != first]:
         try:
-            return pd.read_csv(file_path, encoding=encoding  , dtype=str)
+            df = pd.read_csv(file_path, encoding=encoding, dtype=str)
         except Exception:
             continue
+        if encoding != first:
+            ENCODING_STATS['fallback_parses'] += 1
+            _ENCODING_CACHE[str(file_path)] = (file_path.stat().st_mtime, encoding)
+        return df
     print(f"⚠️ 无法读取文件（编码失败）：{file_path}")
     return pd.DataFrame()
 
@@ -49,6 +91,44 @@ def standardize_code(code: str) -> str:
     return f"sz{digits}"
 
 
+def extract_stock_codes(series: pd.Series) -> pd.Series:
+    """提取每个值中的第一个 6 位数字（整列 str.extract）；无匹配为 NaN，便于后续 dropna"""
+    return series.astype(str).str.extract(r'(\d{6})', expand=False)
+
+
+def standardize_codes(codes: pd.Series) -> pd.Series:
+    """
+    standardize_code 的整列向量化版本（NumPy 字符矩阵），对 ASCII 数字输入结果与逐行 apply 一致。
+    超过 6 位数字的少数异常值回退到逐个调用 standardize_code。
+    """
+    arr = codes.fillna('').astype(str).to_numpy(dtype=str)
+    n = len(arr)
+    width = max(arr.dtype.itemsize // 4, 1)
+    chars = np.ascontiguousarray(arr).view(np.uint32).reshape(n, width)
+    isdig = (chars >= ord('0')) & (chars <= ord('9'))
+    ndig = isdig.sum(axis=1)
+    short = ndig <= 6
+
+    # 输出为 8 列字符矩阵：2 位前缀 + 6 位数字；第 k 个数字右对齐落在 6 - ndig + k 列，其余补 '0'（即 zfill）
+    out = np.zeros((n, 8), dtype=np.uint32)
+    out[:, 2:] = ord('0')
+    rows, cols = np.nonzero(isdig & short[:, None])
+    rank = np.cumsum(isdig, axis=1)[rows, cols] - 1
+    out[rows, 2 + 6 - ndig[rows] + rank] = chars[rows, cols]
+
+    first = out[:, 2]
+    is_sh = first == ord('6')
+    is_bj = (first == ord('4')) | (first == ord('8')) | (first == ord('9'))
+    out[:, 0] = np.where(is_bj, ord('b'), ord('s'))
+    out[:, 1] = np.where(is_sh, ord('h'), np.where(is_bj, ord('j'), ord('z')))
+    out[ndig == 0] = 0  # 全 0 字符在 numpy 中即空串
+
+    result = out.view('<U8').ravel().astype(object)
+    if not short.all():
+        result[~short] = [standardize_code(c) for c in arr[~short]]
+    return pd.Series(result, index=codes.index)
+
+
 def clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     """统一清洗：列名映射、代码标准化、去除重复列"""
     if df.empty:
@@ -63,21 +143,10 @@ def clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
 
     # 标准化股票代码
     if '股票代码' in df.columns:
-        df['股票代码'] = df['股票代码'].apply(standardize_code)
+        df['股票代码'] = standardize_codes(df['股票代码'])
 
     return df
 
-def print_md_table(df: pd.DataFrame, title: str, subtitle: str = ""):
-    """打印Markdown格式的表格"""
-    if df.empty:
-        return
-    print(f"\n### {title}")
-    if subtitle:
-        print(f"*{subtitle}*")
-    print(df.to_markdown(index=False))
-    print("\n")
-
-
 # modules/utils.py
 import streamlit as st
 import requests
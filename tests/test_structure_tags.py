@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+回归测试：build_structure_tags 中向量化的 昨日形态 判定与原逐行 apply 版本逐只一致。
+覆盖 data/raw 下所有收盘行情，以及所有 (今日竞价, 对比日) 相邻日期对。
+"""
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 分析代码按 pandas 2 的 object 字符串列编写
+try:
+    pd.set_option('future.infer_string', False)
+except Exception:
+    pass
+
+from modules.config import DATA_DIR
+from modules.data_loader import read_market_data
+from modules.analyzer import build_structure_tags, classify_yesterday_style
+
+
+def yesterday_style(row):
+    """原逐行实现（改为向量化之前的版本），作为对照"""
+    high = pd.to_numeric(row.get('最高价', 0), errors='coerce') or 0
+    close = pd.to_numeric(row.get('收盘价', 0), errors='coerce') or 0
+    limit = pd.to_numeric(row.get('涨停价', 0), errors='coerce') or 0
+    pct = pd.to_numeric(row.get('涨跌幅', 0), errors='coerce') or 0
+    if high >= limit > close:
+        return '昨日炸板'
+    elif pct <= -5:
+        return '昨日大跌'
+    elif pct >= 5:
+        return '昨日大涨'
+    return '普通震荡'
+
+
+def _dates(data_type):
+    return sorted(pd.Timestamp(f.name.split('_')[0]) for f in DATA_DIR.glob(f'*_{data_type}.csv'))
+
+
+CLOSE_DATES = _dates('收盘行情')
+AUCTION_DATES = _dates('竞价行情')
+DATE_PAIRS = list(zip(AUCTION_DATES[1:], AUCTION_DATES[:-1]))
+
+
+@pytest.mark.parametrize('trade_date', CLOSE_DATES, ids=lambda d: d.strftime('%Y-%m-%d'))
+def test_classify_matches_rowwise(trade_date):
+    df_close = read_market_data(trade_date, '收盘行情')
+    assert not df_close.empty
+    expected = df_close.apply(yesterday_style, axis=1).to_numpy()
+    assert (classify_yesterday_style(df_close) == expected).all()
+
+
+@pytest.mark.parametrize('today_date,prev_date', DATE_PAIRS, ids=lambda d: d.strftime('%Y-%m-%d'))
+def test_build_structure_tags_matches_rowwise(today_date, prev_date):
+    result = build_structure_tags(today_date, prev_date)
+    if result.empty:
+        pytest.skip('竞价行情缺失')
+
+    df_close = read_market_data(prev_date, '收盘行情')
+    if df_close.empty:
+        expected = pd.Series('普通震荡', index=result.index)
+    else:
+        df_close['昨日形态'] = df_close.apply(yesterday_style, axis=1)
+        expected = result[['股票代码']].merge(df_close[['股票代码', '昨日形态']].drop_duplicates('股票代码'),
+                                           on='股票代码', how='left')['昨日形态'].fillna('普通震荡')
+    assert result['昨日形态'].tolist() == expected.tolist()
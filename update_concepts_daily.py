@@ -11,16 +11,22 @@ import time
 import random
 import glob
 import re
+import threading
 import pandas as pd
 import pywencai
 from datetime import datetime, timedelta
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # =====================================================================
 # --- 0. 全局路径与环境配置 ---
 # =====================================================================
 
-from modules.config import CONCEPT_PATH, CALENDAR_PATH, DOWNLOAD_CONFIGS,THS_DATA_ROOT
+from modules.config import (CONCEPT_PATH, CALENDAR_PATH, DOWNLOAD_CONFIGS,THS_DATA_ROOT, ZT_REASON_STORE_PATH,
+                            CONCEPT_META_PATH, CONCEPT_CHANGELOG_PATH)
+from modules.stock_master import build_stock_master
+from modules.concept_matrix import build_concept_matrix
+from modules.trade_calendar import get_trade_calendar
+from modules.profiler import profiled, stage, dump_profile
 # =====================================================================
 # --- I. 下载配置部分 (新增 keep_cols) ---
 # =====================================================================
@@ -57,6 +63,9 @@ DOWNLOAD_CONFIGS = {
 
 SCENARIO_ORDER = ['收盘数据', '涨跌停数据', '所属概念']
 
+# 全局限速：所有场景、所有线程合计，相邻两次 pywencai 请求至少间隔该秒数
+WENCAI_MIN_INTERVAL = 1.5
+
 # =====================================================================
 # --- II. 核心工具函数 ---
 # =====================================================================
@@ -70,21 +79,12 @@ def get_closest_trade_date():
     if not os.path.exists(CALENDAR_PATH):
         print(f"❌ 错误：交易日历文件未找到: {CALENDAR_PATH}")
         return None
-    try:
-        jyrl = pd.read_csv(CALENDAR_PATH)
-        if 'date' not in jyrl.columns:
-             jyrl['date'] = pd.to_datetime(jyrl['trade_date']).dt.date
-    except Exception as e:
-        print(f"❌ 读取交易日历失败: {e}")
-        return None
 
-    now_date = get_beijing_now().date()
-    filtered_trades = jyrl[jyrl['date'] <= now_date].sort_values(by='date', ascending=False)
-    
-    if filtered_trades.empty:
+    target = get_trade_calendar().nearest(get_beijing_now().date())
+    if target is None:
         return None
-    
-    target_date_str = filtered_trades.iloc[0]['trade_date']
+
+    target_date_str = target.strftime('%Y-%m-%d')
     print(f"✅ 选定处理日期: {target_date_str}")
     return target_date_str
 
@@ -94,6 +94,11 @@ def format_code(code):
     res = re.findall(r'\d+', s)
     return res[0].zfill(6) if res else ""
 
+def format_codes(series):
+    """format_code 的整列版本：取第一段数字补齐 6 位，无数字或空值为空串"""
+    return series.astype(object).where(series.notna(), '').astype(str) \
+        .str.extract(r'(\d+)', expand=False).str.zfill(6).fillna('')
+
 def clean_old_files(backup_dir, keep_days=30):
     if not os.path.exists(backup_dir): return
     files = glob.glob(os.path.join(backup_dir, "*.csv"))
@@ -108,7 +113,26 @@ def clean_old_files(backup_dir, keep_days=30):
 # --- III. 下载逻辑 (优化：列过滤) ---
 # =====================================================================
 
-def download_task(date, config_name, config):
+class RateLimiter:
+    """线程安全的最小间隔限速器：按预约时间排队，各线程各自睡到自己的时间点"""
+
+    def __init__(self, min_interval):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.min_interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
+def download_task(date, config_name, config, limiter=None, stats=None):
     max_retries = 3 
     backup_dir = config['backup_dir']
     question_suffix = config['question_suffix']
@@ -120,10 +144,17 @@ def download_task(date, config_name, config):
     question = f'{date_chinese}{question_suffix}'
     save_path = os.path.join(backup_dir, f'{date}.csv')
     
+    stats = stats if stats is not None else {}
+    stats.update({'尝试': 0, '限速等待s': 0.0, '请求s': 0.0, '条数': 0})
     for retry in range(max_retries):
         try:
             time.sleep(random.uniform(*config['query_delay_range']))
+            if limiter is not None:
+                stats['限速等待s'] += limiter.wait()
+            stats['尝试'] += 1
+            t0 = time.perf_counter()
             res = pywencai.get(question=question, loop=True)
+            stats['请求s'] += time.perf_counter() - t0
 
             if res is None:
                 print(f"  ⚠️ [{config_name}] 返回空，重试 {retry+1}")
@@ -155,6 +186,7 @@ def download_task(date, config_name, config):
 
             # 保存
             res.to_csv(save_path, index=False, encoding='utf-8-sig')
+            stats['条数'] = len(res)
             print(f"  ✅ [{config_name}] 下载成功: {len(res)} 条")
             clean_old_files(backup_dir)
             return True
@@ -165,126 +197,274 @@ def download_task(date, config_name, config):
 
     return False
 
-def run_downloads(target_date):
-    print(f"\n🚀 [第一步] 下载数据 ({target_date})...")
-    success_count = 0
-    with ThreadPoolExecutor(max_workers=1) as executor:
-        futures = {}
-        for name in SCENARIO_ORDER:
-            config = DOWNLOAD_CONFIGS[name]
-            futures[executor.submit(download_task, target_date, name, config)] = name
-        for future in futures:
-            if future.result(): success_count += 1
-    return success_count > 0 
+def run_downloads(target_date, min_interval=WENCAI_MIN_INTERVAL):
+    """
+    并发下载各场景数据。target_date 可为单个日期或日期列表（补数据）。
+    每个场景按 max_threads 限制同时在跑的任务数，所有请求共用一个全局限速器。
+    """
+    dates = [target_date] if isinstance(target_date, str) else list(target_date)
+    print(f"\n🚀 [第一步] 下载数据 ({', '.join(dates)})...")
+    limiter = RateLimiter(min_interval)
+    limits = {name: max(1, int(DOWNLOAD_CONFIGS[name].get('max_threads', 1))) for name in SCENARIO_ORDER}
+    slots = {name: threading.Semaphore(n) for name, n in limits.items()}
+
+    def run_one(date, name):
+        stats = {}
+        t0 = time.perf_counter()
+        with slots[name]:
+            stats['排队s'] = time.perf_counter() - t0
+            ok = download_task(date, name, DOWNLOAD_CONFIGS[name], limiter, stats)
+        stats['总耗时s'] = time.perf_counter() - t0
+        return ok, stats
+
+    tasks = [(d, name) for d in dates for name in SCENARIO_ORDER]
+    workers = min(len(tasks), sum(limits.values()))
+    results = []
+    t_all = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {executor.submit(run_one, d, name): (d, name) for d, name in tasks}
+        for future in as_completed(futures):
+            d, name = futures[future]
+            try:
+                ok, stats = future.result()
+            except Exception as e:
+                print(f"  ❌ [{name}] {d} 任务异常: {e}")
+                ok, stats = False, {}
+            results.append({'日期': d, '场景': name, '成功': ok, **stats})
+            print(f"  ⏱️ [{name}] {d} {'成功' if ok else '失败'} | 总 {stats.get('总耗时s', 0):.1f}s "
+                  f"(排队 {stats.get('排队s', 0):.1f}s, 限速 {stats.get('限速等待s', 0):.1f}s, "
+                  f"请求 {stats.get('请求s', 0):.1f}s, 尝试 {stats.get('尝试', 0)} 次)")
+
+    success_count = sum(r['成功'] for r in results)
+    print(f"📦 下载完成: {success_count}/{len(tasks)} 成功，总耗时 {time.perf_counter() - t_all:.1f}s")
+    return success_count > 0
 
 # =====================================================================
 # --- IV. 数据合成逻辑 ---
 # =====================================================================
 
-def process_and_merge_files():
+REASON_FILES = 30  # 历史涨停原因统计最近多少个涨停文件
+REASON_STORE_COLS = ['file_date', '股票代码', '原因']
+
+def read_reason_parts(f):
+    """读取单个涨停文件并拆成 (file_date, 股票代码, 原因) 长表，保持文件内行序与 '+' 拆分顺序"""
+    try: df = pd.read_csv(f, encoding='gbk', dtype=str)
+    except: df = pd.read_csv(f, encoding='utf-8-sig', dtype=str)
+
+    col_code = next((c for c in ['code', '股票代码', '代码'] if c in df.columns), None)
+    reason_cols = [c for c in df.columns if '涨停原因类别' in c]
+    if not col_code or not reason_cols:
+        return pd.DataFrame(columns=REASON_STORE_COLS)
+
+    reason = df[reason_cols[0]]
+    keep = reason.notna() & ~reason.isin(['', 'nan', 'None', '-'])
+    parts = pd.DataFrame({'股票代码': format_codes(df[col_code])[keep], '原因': reason[keep].str.split('+')})
+    parts = parts.explode('原因')
+    parts['原因'] = parts['原因'].str.strip()
+    parts = parts[parts['原因'].fillna('') != '']
+    parts.insert(0, 'file_date', os.path.basename(f)[:10])
+    return parts.reset_index(drop=True)
+
+def aggregate_reasons(parts):
+    """长表 (按文件日期倒序) -> {代码: '原因1+原因2'}，每只股票内按首次出现顺序去重"""
+    if parts.empty:
+        return {}
+    uniq = parts.drop_duplicates(['股票代码', '原因'])
+    return uniq.groupby('股票代码', sort=False)['原因'].agg('+'.join).to_dict()
+
+@profiled()
+def load_reason_parts(zt_dir, incremental=True):
+    """
+    最近 REASON_FILES 个涨停文件的拆分长表。
+    增量模式下复用已落盘的明细，只读取窗口内尚未收录的文件（通常只有当天一个），并剔除滑出窗口的日期；
+    最新一天总是重新读取，以免重跑当天时沿用旧内容。
+    """
+    files = sorted(glob.glob(os.path.join(zt_dir, "*.csv")), reverse=True)[:REASON_FILES]
+    window = {os.path.basename(f)[:10]: f for f in files}
+    if not window:
+        print(f"  📑 涨停原因: {zt_dir} 下没有涨停文件")
+        return pd.DataFrame(columns=REASON_STORE_COLS)
+
+    store = pd.DataFrame(columns=REASON_STORE_COLS)
+    if incremental and ZT_REASON_STORE_PATH.exists():
+        try:
+            store = pd.read_csv(ZT_REASON_STORE_PATH, dtype=str, keep_default_na=False)
+            store = store[store['file_date'].isin(window) & (store['file_date'] != max(window))]
+        except Exception as e:
+            print(f"⚠️ 涨停原因明细读取失败，改为全量重建: {e}")
+            store = pd.DataFrame(columns=REASON_STORE_COLS)
+
+    have = set(store['file_date'])
+    new_parts = []
+    for d, f in window.items():
+        if d in have: continue
+        try: new_parts.append(read_reason_parts(f))
+        except Exception as e: print(f"⚠️ 处理涨停文件 {os.path.basename(f)} 时出错: {e}")
+    print(f"  📑 涨停原因: 复用 {len(have)} 天，新读取 {len(new_parts)} 个文件")
+
+    parts = pd.concat([store] + new_parts, ignore_index=True)
+    # 文件日期倒序；同一天内保持原行序（稳定排序）
+    parts = parts.sort_values('file_date', ascending=False, kind='stable').reset_index(drop=True)
+
+    tmp = ZT_REASON_STORE_PATH.with_name(ZT_REASON_STORE_PATH.name + '.tmp')
+    parts[REASON_STORE_COLS].to_csv(tmp, index=False, encoding='utf-8-sig')
+    os.replace(tmp, ZT_REASON_STORE_PATH)
+    return parts
+
+CONCEPT_FILES = 10  # 概念取最近多少个所属概念文件内的最新值
+INDUSTRY_FILES = 5  # 行业取最近多少个收盘文件内的最新值
+META_COLS = ['股票代码', '股票简称', '所属概念', '概念日期', '所属行业', '行业日期']
+
+def read_concept_file(f):
+    """单个所属概念文件 -> (股票代码, 股票简称, 所属概念)，同一代码保留文件内首行"""
+    try: df = pd.read_csv(f, encoding='gbk', dtype=str)
+    except: df = pd.read_csv(f, encoding='utf-8-sig', dtype=str)
+
+    # 统一“股票代码”列名
+    if '代码' in df.columns and '股票代码' not in df.columns:
+        df.rename(columns={'代码': '股票代码'}, inplace=True)
+    # “股票简称” 不存在则填空
+    if '股票简称' not in df.columns and '股票名称' not in df.columns:
+        df['股票简称'] = ''
+    elif '股票名称' in df.columns:
+        df.rename(columns={'股票名称': '股票简称'}, inplace=True)
+
+    # 排除掉“所属概念数量”，只找名字完全等于“所属概念”的列
+    if '所属概念' not in df.columns or '股票代码' not in df.columns:
+        return None
+    df['股票代码'] = format_codes(df['股票代码'])
+    return df[['股票代码', '股票简称', '所属概念']].drop_duplicates('股票代码')
+
+def read_industry_file(f):
+    """单个收盘文件 -> (股票代码, 所属行业)，同一代码保留文件内首行"""
+    try: df = pd.read_csv(f, encoding='gbk', dtype=str)
+    except: df = pd.read_csv(f, encoding='utf-8-sig', dtype=str)
+
+    df.rename(columns={'代码': '股票代码'}, inplace=True)
+    ind_col = next((c for c in df.columns if '所属同花顺行业' in c), None)
+    if not ind_col:
+        return None
+    df.rename(columns={ind_col: '所属行业'}, inplace=True)
+    df['股票代码'] = format_codes(df['股票代码'])
+    return df[['股票代码', '所属行业']].drop_duplicates('股票代码')
+
+def _changed(field, old, new):
+    """概念按 ';' 拆成集合比较，只换顺序不算变化"""
+    if field == '所属概念':
+        return set(str(old).split(';')) != set(str(new).split(';'))
+    return str(old) != str(new)
+
+def _fold(meta, part, fields, date_col, file_date, changes):
+    """把一天的数据覆盖进 meta（以代码为索引）；changes 为 None 时不记录变更"""
+    part = part.set_index('股票代码')
+    if changes is not None:
+        known = part.index.intersection(meta.index)
+        added = part.index.difference(meta.index)
+        for field in fields:
+            if field == '股票简称':
+                continue
+            old = meta.loc[known, field].fillna('')
+            new = part.loc[known, field].fillna('')
+            for code in known[(old != new).values]:
+                if _changed(field, old[code], new[code]):
+                    changes.append([file_date, code, field, old[code], new[code]])
+            for code, value in part.loc[added, field].fillna('').items():
+                changes.append([file_date, code, field, '', value])
+    meta = meta.reindex(meta.index.union(part.index))
+    meta.loc[part.index, fields] = part[fields].values
+    meta.loc[part.index, date_col] = file_date
+    return meta
+
+@profiled()
+def update_concept_meta(daily_dir, closing_dir, incremental=True):
+    """
+    维护每只股票最新已知的 概念/行业（含来源日期）并落盘。
+    增量模式下只读取比已有表更新的文件（通常只有当天一个），并把概念/行业的变化追加到变更记录；
+    表不存在时按最近 CONCEPT_FILES / INDUSTRY_FILES 个文件全量重建。
+    返回概念窗口内的股票（按代码排序），行业超出窗口的置空；无可用数据时返回 None。
+    """
+    c_files = sorted(glob.glob(os.path.join(daily_dir, "*.csv")), reverse=True)[:CONCEPT_FILES]
+    i_files = sorted(glob.glob(os.path.join(closing_dir, "*.csv")), reverse=True)[:INDUSTRY_FILES]
+    if not c_files:
+        return None
+
+    meta, changes = None, None
+    if incremental and CONCEPT_META_PATH.exists():
+        try:
+            meta = pd.read_csv(CONCEPT_META_PATH, dtype=str, keep_default_na=False).set_index('股票代码')
+            changes = []
+        except Exception as e:
+            print(f"⚠️ 概念元数据读取失败，改为全量重建: {e}")
+            meta = None
+    if meta is None:
+        meta = pd.DataFrame(columns=META_COLS).set_index('股票代码')
+
+    def pending(files, date_col):
+        # 比表中最新日期更新的文件，加上最新一天（重跑当天时覆盖旧内容）；按日期从旧到新折叠
+        seen = meta[date_col].dropna()
+        last = seen[seen != ''].max() if (seen != '').any() else ''
+        return [f for f in sorted(files) if os.path.basename(f)[:10] > last or f == files[0]]
+
+    read_count = 0
+    for f in pending(c_files, '概念日期'):
+        try:
+            part = read_concept_file(f)
+        except Exception as e:
+            print(f"⚠️ 处理文件 {os.path.basename(f)} 时出错: {e}")
+            continue
+        if part is not None:
+            meta = _fold(meta, part, ['股票简称', '所属概念'], '概念日期', os.path.basename(f)[:10], changes)
+            read_count += 1
+    for f in pending(i_files, '行业日期') if i_files else []:
+        try:
+            part = read_industry_file(f)
+        except Exception:
+            continue
+        if part is not None:
+            meta = _fold(meta, part, ['所属行业'], '行业日期', os.path.basename(f)[:10], changes)
+            read_count += 1
+
+    meta = meta.fillna('').sort_index()
+    meta.index.name = '股票代码'
+    tmp = CONCEPT_META_PATH.with_name(CONCEPT_META_PATH.name + '.tmp')
+    meta.reset_index()[META_COLS].to_csv(tmp, index=False, encoding='utf-8-sig')
+    os.replace(tmp, CONCEPT_META_PATH)
+    print(f"  📑 概念元数据: 读取 {read_count} 个文件，共 {len(meta)} 只")
+
+    log = pd.DataFrame(changes or [], columns=['日期', '股票代码', '字段', '旧值', '新值'])
+    if not CONCEPT_CHANGELOG_PATH.exists() or len(log):
+        log.to_csv(CONCEPT_CHANGELOG_PATH, mode='a', index=False, encoding='utf-8-sig',
+                   header=not CONCEPT_CHANGELOG_PATH.exists())
+    if len(log):
+        print(f"  📝 概念/行业变更 {len(log)} 条: " + ", ".join(f"{k} {v}" for k, v in log['字段'].value_counts().items()))
+
+    # 只保留窗口内出现过的股票；行业超出窗口的置空
+    c_cutoff = os.path.basename(c_files[-1])[:10]
+    i_cutoff = os.path.basename(i_files[-1])[:10] if i_files else '9999'
+    out = meta[meta['概念日期'] >= c_cutoff].copy()
+    out.loc[out['行业日期'] < i_cutoff, '所属行业'] = ''
+    return out.reset_index()
+
+def process_and_merge_files(incremental=True):
     print(f"\n🚀 [第二步] 合成 [所属概念.csv]...")
     daily_dir = DOWNLOAD_CONFIGS['所属概念']['backup_dir']
     closing_dir = DOWNLOAD_CONFIGS['收盘数据']['backup_dir']
     zt_dir = DOWNLOAD_CONFIGS['涨跌停数据']['backup_dir']
 
-    # --- 1. 概念 ---
-    # --- 1. 概念 ---
-    c_list = []
-    if os.path.exists(daily_dir):
-        files = sorted(glob.glob(os.path.join(daily_dir, "*.csv")), reverse=True)[:10]
-        for f in files:
-            try:
-                # 1. 读取数据
-                try: df = pd.read_csv(f, encoding='gbk', dtype=str)
-                except: df = pd.read_csv(f, encoding='utf-8-sig', dtype=str)
-                
-                # 2. 统一“股票代码”列名
-                # 自动寻找包含'代码'字样的列，或者直接指定
-                if '代码' in df.columns and '股票代码' not in df.columns:
-                    df.rename(columns={'代码': '股票代码'}, inplace=True)
-                
-                # 3. 处理“股票简称” (如果不存在则填空，防止报错)
-                if '股票简称' not in df.columns and '股票名称' not in df.columns:
-                    df['股票简称'] = '' # 或者根据业务逻辑去其他文件找简称
-                elif '股票名称' in df.columns:
-                    df.rename(columns={'股票名称': '股票简称'}, inplace=True)
-    
-    # --- 关键修改点 3: 精确匹配“所属概念” ---
-                # 排除掉“所属概念数量”，只找名字完全等于“所属概念”的列
-                concept_col = next((c for c in df.columns if c == '所属概念'), None)
-                
-                if concept_col and '股票代码' in df.columns:
-                    # 标准化列名
-                    df.rename(columns={concept_col: '所属概念'}, inplace=True)
-                    df['股票代码'] = df['股票代码'].apply(format_code)
-                    df['file_date'] = os.path.basename(f)[:10]
-                    
-                    # 只选取存在的列，避免 KeyError
-                    available_cols = [c for c in ['股票代码', '股票简称', '所属概念', 'file_date'] if c in df.columns]
-                    c_list.append(df[available_cols])
-                    
-            except Exception as e:
-                print(f"⚠️ 处理文件 {os.path.basename(f)} 时出错: {e}") # 建议打印错误，方便调试
-                pass
-
-    df_c = pd.concat(c_list, ignore_index=True)
-    df_c = df_c.sort_values(by=['股票代码', 'file_date'], ascending=[True, False]).drop_duplicates('股票代码')
-    
-    # --- 2. 行业 ---
-    df_i = pd.DataFrame()
-    if os.path.exists(closing_dir):
-        files = sorted(glob.glob(os.path.join(closing_dir, "*.csv")), reverse=True)[:5]
-        i_list = []
-        for f in files:
-            try:
-                try: df = pd.read_csv(f, encoding='gbk', dtype=str)
-                except: df = pd.read_csv(f, encoding='utf-8-sig', dtype=str)
-                
-                df.rename(columns={'代码': '股票代码'}, inplace=True)
-                ind_col = next((c for c in df.columns if '所属同花顺行业' in c), None)
-                
-                if ind_col:
-                    df.rename(columns={ind_col: '所属行业'}, inplace=True)
-                    df['股票代码'] = df['股票代码'].apply(format_code)
-                    df['file_date'] = os.path.basename(f)[:10]
-                    i_list.append(df[['股票代码', '所属行业', 'file_date']])
-            except: pass
-        if i_list:
-            df_i = pd.concat(i_list).sort_values(by=['file_date'], ascending=False).drop_duplicates('股票代码')
+    # --- 1/2. 概念与行业（最新已知值，增量维护） ---
+    meta = update_concept_meta(daily_dir, closing_dir, incremental=incremental)
+    if meta is None:
+        print("❌ 无可用的所属概念数据，跳过合成")
+        return
 
     # --- 3. 涨停原因 ---
-    reason_dict = {}
+    processed_reasons = {}
     if os.path.exists(zt_dir):
-        files = sorted(glob.glob(os.path.join(zt_dir, "*.csv")), reverse=True)[:30]
-        for f in files:
-            try:
-                try: df = pd.read_csv(f, encoding='gbk', dtype=str)
-                except: df = pd.read_csv(f, encoding='utf-8-sig', dtype=str)
-                
-                col_code = next((c for c in ['code', '股票代码', '代码'] if c in df.columns), None)
-                reason_cols = [c for c in df.columns if '涨停原因类别' in c]
-                
-                if col_code and reason_cols:
-                    for _, row in df.iterrows():
-                        code = format_code(row[col_code])
-                        reason = str(row[reason_cols[0]])
-                        if reason and reason not in ['nan', 'None', '-']:
-                            parts = [p.strip() for p in reason.split('+') if p.strip()]
-                            if code not in reason_dict: reason_dict[code] = []
-                            reason_dict[code].extend(parts)
-            except: pass
-
-    processed_reasons = {k: "+".join(list(dict.fromkeys(v))) for k, v in reason_dict.items()}
+        processed_reasons = aggregate_reasons(load_reason_parts(zt_dir, incremental=incremental))
 
     # --- 4. 合并 ---
     print("  🔄 执行合并...")
-    if not df_i.empty:
-        final_df = pd.merge(df_c[['股票代码', '股票简称', '所属概念']], 
-                            df_i[['股票代码', '所属行业']], 
-                            on='股票代码', how='left')
-    else:
-        final_df = df_c[['股票代码', '股票简称', '所属概念']].copy()
-        final_df['所属行业'] = ''
+    final_df = meta[['股票代码', '股票简称', '所属概念', '所属行业']].copy()
 
     final_df['历史涨停原因类别'] = final_df['股票代码'].map(processed_reasons).fillna('')
     final_df['code'] = final_df['股票代码']
@@ -298,12 +478,20 @@ def process_and_merge_files():
     final_df.to_csv(CONCEPT_PATH, index=False, encoding='utf-8-sig')
     print(f"✅ 更新成功: {len(final_df)} 条")
 
+    # 新上市股票登记到股票主表（已有 ID 不变），再据此预生成 股票×题材 稀疏矩阵
+    build_stock_master()
+    build_concept_matrix()
+
 if __name__ == '__main__':
     target_date = get_closest_trade_date()
     if target_date:
-        if run_downloads(target_date):
-            process_and_merge_files()
-        else:
+        with stage('下载'):
+            ok = run_downloads(target_date)
+        if ok:
+            with stage('合成所属概念'):
+                process_and_merge_files()
+        dump_profile('update_concepts_daily')
+        if not ok:
             sys.exit(1)
     else:
 
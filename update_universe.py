@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+股票池刷新任务：合并 代码.csv 与本月新股（pywencai），生成带前缀的 metadata/股票池.json
+在采集任务之前单独运行（GitHub Actions 中位于 main.py 之前），把名单维护移出 9:25 的关键路径。
+"""
+
+import re
+import sys
+import io
+import pandas as pd
+import pywencai
+
+from modules.config import STOCK_LIST_PATH
+from modules.universe import save_universe
+
+sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+
+def refresh_stock_list() -> pd.DataFrame:
+    """读取 代码.csv，并补入本月上市的新股（失败时沿用原名单）"""
+    df_stocks = pd.read_csv(STOCK_LIST_PATH, dtype={'code': str})
+    try:
+        print("🕒 正在同步本月新股名单...")
+        df_new = pywencai.get(question='本月上市的新股', loop=True)
+        if df_new is not None and not df_new.empty:
+            df_new_clean = df_new[['code', '股票简称']].rename(columns={'股票简称': 'code_name'})
+            merged = pd.concat([df_stocks, df_new_clean]).drop_duplicates(subset=['code']).reset_index(drop=True)
+            if len(merged) != len(df_stocks):
+                merged.to_csv(STOCK_LIST_PATH, index=False, encoding='utf-8-sig')
+                print(f"✅ 名单更新完成，新增 {len(merged) - len(df_stocks)} 只")
+            df_stocks = merged
+    except Exception as e:
+        print(f"⚠️ 新股同步跳过: {e}")
+    return df_stocks
+
+
+if __name__ == '__main__':
+    df = refresh_stock_list()
+    codes = df['code'].apply(lambda x: re.sub(r'\D', '', str(x)).zfill(6)).tolist()
+    save_universe(codes)